@@ -534,21 +534,8 @@ class TagTool(CommandLineInterface):
                      .format(self.options.preserve.name))
 
     def emulate_tt3_tag(self, tag):
-        def ndef_read(block_number, rb, re):
-            log.debug("tt3 read block #{0}".format(block_number))
-            if block_number < len(self.options.tt3_data) / 16:
-                first, last = block_number*16, (block_number+1)*16
-                block_data = self.options.tt3_data[first:last]
-                return block_data
-        def ndef_write(block_number, block_data, wb, we):
-            log.debug("tt3 write block #{0}".format(block_number))
-            if block_number < len(self.options.tt3_data) / 16:
-                first, last = block_number*16, (block_number+1)*16
-                self.options.tt3_data[first:last] = block_data
-                return True
-
-        tag.add_service(0x0009, ndef_read, ndef_write)
-        tag.add_service(0x000B, ndef_read, lambda: False)
+        tag.add_memory_service(0x0009, self.options.tt3_data)
+        tag.add_memory_service(0x000B, self.options.tt3_data, False)
         return True
 
 class ArgparseError(SystemExit):
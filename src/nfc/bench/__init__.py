@@ -0,0 +1,168 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Benchmarks for the nfcpy protocol stack. Micro-benchmarks measure
+single protocol functions like PDU encoding or CRC calculation,
+macro-benchmarks measure complete tag and peer-to-peer sessions over
+the simulated (``sim``) and loopback (``loop``) drivers, so that no
+hardware is needed. The suite is run from the command line. ::
+
+    $ python -m nfc.bench --output baseline.json
+    $ python -m nfc.bench --baseline baseline.json 'llcp.*'
+
+Each benchmark reports the best rate over a number of rounds, in
+units processed per second. Results can be saved as JSON and later
+runs compared against such a baseline, a rate that dropped by more
+than the threshold is reported as a regression.
+
+Benchmarks are setup functions registered with :func:`benchmark`.
+The setup function prepares the test data and yields a function that
+performs the measured operation and returns the number of units it
+has processed. Code after the yield is run when the measurement is
+complete. ::
+
+    @nfc.bench.benchmark("clf.crc_a", unit="B")
+    def crc_a():
+        data = bytearray(64)
+        def run():
+            nfc.clf.device.Device.add_crc_a(data)
+            return len(data)
+        yield run
+
+The rate is measured with the host clock, unless the run function
+has a ``timer`` attribute that returns the time in seconds of
+another clock, for example the simulated time on air of the
+:mod:`nfc.clf.sim` driver.
+
+"""
+import collections
+import contextlib
+import fnmatch
+import timeit
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class Skip(Exception):
+    """Raised by a setup function when the benchmark can not run in
+    this environment, for example if an optional library is missing.
+
+    """
+    pass
+
+
+class Benchmark(object):
+    """A registered benchmark. The *setup* function is a generator
+    that yields the function to measure, *unit* names what that
+    function counts and *group* is either ``"micro"`` or ``"macro"``.
+
+    """
+    def __init__(self, name, setup, unit="op", group="micro"):
+        self.name = name
+        self.setup = contextlib.contextmanager(setup)
+        self.unit = unit
+        self.group = group
+        self.doc = (setup.__doc__ or "").strip()
+
+    def __str__(self):
+        return "{0} ({1}/s)".format(self.name, self.unit)
+
+    def measure(self, min_time=0.2, repeat=3):
+        """Run the benchmark for *repeat* rounds of at least *min_time*
+        seconds each and return a result dictionary with the best
+        rate and the rates of all rounds. The result has a ``skipped``
+        reason if the setup function raised :exc:`Skip`.
+
+        """
+        result = {'group': self.group, 'unit': self.unit}
+        try:
+            with self.setup() as run:
+                run()  # warm up caches and lazy initialization
+                timer = getattr(run, "timer", timeit.default_timer)
+                rates = []
+                for _ in range(repeat):
+                    count, elapsed = 0, 0.0
+                    started = timer()
+                    while not elapsed or elapsed < min_time:
+                        count += run()
+                        elapsed = timer() - started
+                    rates.append(count / elapsed)
+        except Skip as error:
+            log.debug("skipped %s: %s", self.name, error)
+            result['skipped'] = str(error)
+        else:
+            result['rate'] = max(rates)
+            result['rates'] = rates
+        return result
+
+
+registry = collections.OrderedDict()
+"""All registered benchmarks by name, in order of registration."""
+
+
+def benchmark(name, unit="op", group="micro"):
+    """Decorator that registers a benchmark setup function under
+    *name*. See the module documentation for an example.
+
+    """
+    def register(setup):
+        registry[name] = Benchmark(name, setup, unit, group)
+        return setup
+    return register
+
+
+def select(patterns=None, group=None):
+    """Return the registered benchmarks whose names match any of the
+    shell-style *patterns* (all if None or empty) and that belong to
+    *group* (any if None).
+
+    """
+    return [bench for bench in registry.values()
+            if (group is None or bench.group == group) and
+            (not patterns or any(fnmatch.fnmatchcase(bench.name, pattern)
+                                 for pattern in patterns))]
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare the *results* of a benchmark run with the *baseline*
+    results, both dictionaries that map benchmark names to result
+    dictionaries. Returns a dictionary that maps each name measured
+    in both runs to a tuple of the rate ratio and a verdict, which
+    is ``"regressed"`` or ``"improved"`` if the ratio differs by more
+    than *threshold* from 1, else ``"unchanged"``.
+
+    """
+    verdicts = collections.OrderedDict()
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        if result.get('rate') and base.get('rate'):
+            ratio = result['rate'] / base['rate']
+            if ratio < 1 - threshold:
+                verdicts[name] = (ratio, "regressed")
+            elif ratio > 1 + threshold:
+                verdicts[name] = (ratio, "improved")
+            else:
+                verdicts[name] = (ratio, "unchanged")
+    return verdicts
+
+
+from . import micro, macro  # noqa: E402,F401
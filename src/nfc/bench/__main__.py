@@ -0,0 +1,142 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+import nfc
+import nfc.bench
+
+import sys
+import json
+import logging
+import platform
+import argparse
+
+description = """
+
+Run the nfcpy benchmark suite. Micro-benchmarks measure single
+protocol functions, macro-benchmarks measure tag and peer-to-peer
+sessions with simulated and loopback devices. Results can be written
+as JSON and compared against the JSON of an earlier run, the exit
+status is 1 if any benchmark regressed by more than the threshold.
+
+"""
+
+
+def si_format(value):
+    for prefix in ("", "k", "M", "G"):
+        if value < 1000:
+            break
+        value /= 1000.0
+    return "{0:7.2f} {1}".format(value, prefix)
+
+
+def main(args):
+    logging.basicConfig()
+    log_levels = (logging.WARN, logging.INFO, logging.DEBUG, logging.DEBUG-1)
+    log_level = log_levels[min(args.verbose, len(log_levels) - 1)]
+    logging.getLogger('nfc').setLevel(log_level)
+
+    benchmarks = nfc.bench.select(args.names, args.group)
+    if args.list:
+        for bench in benchmarks:
+            print("{0:<36s} {1}".format(bench, bench.doc))
+        return 0
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print("This is the %s version of nfcpy run in Python %s\non %s" %
+          (nfc.__version__, platform.python_version(), platform.platform()))
+
+    regressed = False
+    results = {}
+    for bench in benchmarks:
+        result = bench.measure(args.min_time, args.repeat)
+        results[bench.name] = result
+        line = "{0:<28s}".format(bench.name)
+        if 'skipped' in result:
+            print(line + " skipped, " + result['skipped'])
+            continue
+        line += " {0}{1}/s".format(si_format(result['rate']), bench.unit)
+        verdict = nfc.bench.compare(
+            {bench.name: result}, baseline, args.threshold)
+        if bench.name in verdict:
+            ratio, verdict = verdict[bench.name]
+            line = "{0:<48s} {1:+6.1%} {2}".format(line, ratio - 1, verdict)
+            regressed = regressed or verdict == "regressed"
+        print(line)
+
+    if args.output:
+        report = {
+            'nfcpy': nfc.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'min_time': args.min_time,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    return 1 if regressed else 0
+
+
+parser = argparse.ArgumentParser(
+    prog="python -m nfc.bench", description=description)
+
+parser.add_argument(
+    "names", nargs="*", metavar="name",
+    help="run only benchmarks with matching names, '*' is a wildcard")
+
+parser.add_argument(
+    "--list", "-l", action="store_true",
+    help="list the benchmarks and exit")
+
+parser.add_argument(
+    "--group", "-g", choices=("micro", "macro"),
+    help="run only micro- or macro-benchmarks")
+
+parser.add_argument(
+    "--min-time", "-t", type=float, default=0.2, metavar="SECONDS",
+    help="minimum time of a measurement round (default: %(default)s)")
+
+parser.add_argument(
+    "--repeat", "-r", type=int, default=3, metavar="N",
+    help="number of measurement rounds (default: %(default)s)")
+
+parser.add_argument(
+    "--output", "-o", metavar="FILE",
+    help="write the results as JSON to FILE")
+
+parser.add_argument(
+    "--baseline", "-b", metavar="FILE",
+    help="compare with the JSON results written by an earlier run")
+
+parser.add_argument(
+    "--threshold", type=float, default=0.1,
+    help="rate change that counts as regression (default: %(default)s)")
+
+parser.add_argument(
+    "--verbose", "-v", action="count", default=0,
+    help="be verbose. Multiple -v options increase the verbosity.")
+
+sys.exit(main(parser.parse_args()))
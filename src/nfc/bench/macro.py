@@ -0,0 +1,270 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Macro-benchmarks for complete tag and peer-to-peer sessions. Tags
+are simulated with the :mod:`nfc.clf.sim` driver without realtime
+delays, peer-to-peer links run between two contactless frontends
+connected through the :mod:`nfc.clf.loop` driver. The inventory
+benchmarks count cards per second of simulated time on air, not of
+host time.
+
+"""
+import nfc
+import nfc.clf
+import nfc.clf.sim
+import nfc.dep
+import nfc.ndef
+import nfc.snep
+
+import itertools
+import threading
+
+from . import benchmark
+
+import logging
+log = logging.getLogger(__name__)
+
+TAG_MODELS = ("topaz512", "ntag215", "felica-lite-s", "type4")
+
+
+def ndef_octets(size):
+    # A single text record that makes an NDEF message of *size* bytes,
+    # the record header is 4 bytes short or 7 bytes long format.
+    text = "\x02en" + "x" * ((size - 4 if size < 260 else size - 7) - 3)
+    record = nfc.ndef.Record("urn:nfc:wkt:T", "", text)
+    return bytearray(str(nfc.ndef.Message(record)))
+
+
+def tag_session(model):
+    clf = nfc.ContactlessFrontend()
+    clf.device = nfc.clf.sim.init(nfc.clf.sim.MODELS[model]())
+    rdwr_options = {'targets': ['106A', '212F'],
+                    'on-connect': lambda tag: False}
+    return clf, lambda: clf.connect(rdwr=rdwr_options)
+
+
+def tag_read(model):
+    def setup():
+        clf, connect = tag_session(model)
+        connect().ndef.octets = ndef_octets(96)
+
+        def run():
+            tag = connect()
+            assert len(tag.ndef.octets) == 96
+            return 1
+        try:
+            yield run
+        finally:
+            clf.close()
+    setup.__doc__ = "Connect a simulated {0} and read 96 byte NDEF."
+    setup.__doc__ = setup.__doc__.format(model)
+    return setup
+
+
+def tag_write(model):
+    def setup():
+        clf, connect = tag_session(model)
+        messages = itertools.cycle([ndef_octets(96), ndef_octets(95)])
+
+        def run():
+            connect().ndef.octets = next(messages)
+            return 1
+        try:
+            yield run
+        finally:
+            clf.close()
+    setup.__doc__ = "Connect a simulated {0} and write 96 byte NDEF."
+    setup.__doc__ = setup.__doc__.format(model)
+    return setup
+
+
+for model in TAG_MODELS:
+    benchmark("tag.read." + model, unit="session", group="macro")(
+        tag_read(model))
+    benchmark("tag.write." + model, unit="session", group="macro")(
+        tag_write(model))
+
+
+@benchmark("clf.inventory", unit="card", group="macro")
+def clf_inventory():
+    """Find eight simulated NTAG213 with Type A anticollision, per
+    second of simulated RF time."""
+    uids = [bytearray(b"\x04\x01\x02\x03\x04\x05") + chr(i) for i in range(8)]
+    clf = nfc.ContactlessFrontend()
+    clf.device = nfc.clf.sim.init(
+        *[nfc.clf.sim.Type2TagModel.ntag213(str(uid)) for uid in uids])
+
+    def run():
+        found = clf.inventory(nfc.clf.RemoteTarget("106A"))
+        assert len(found) == len(uids)
+        return len(found)
+    run.timer = lambda: clf.device.rf_time
+    try:
+        yield run
+    finally:
+        clf.close()
+
+
+@benchmark("clf.inventory.212F", unit="card", group="macro")
+def clf_inventory_212f():
+    """Find eight simulated FeliCa Lite-S in 16 Type F time slots, per
+    second of simulated RF time."""
+    idms = [bytearray(b"\x01\x2E\x01\x02\x03\x04\x05") + chr(i)
+            for i in range(8)]
+    clf = nfc.ContactlessFrontend()
+    clf.device = nfc.clf.sim.init(
+        *[nfc.clf.sim.Type3TagModel(str(idm)) for idm in idms], seed=1)
+    target = nfc.clf.RemoteTarget("212F", sensf_req=bytearray.fromhex(
+        "00FFFF010F"))
+
+    def run():
+        # Cards that collide in a time slot are not found this round,
+        # the rate is the number of distinct cards found per second.
+        found = clf.inventory(target)
+        assert len(set(bytes(t.sensf_res[1:9]) for t in found)) == len(found)
+        return len(found)
+    run.timer = lambda: clf.device.rf_time
+    try:
+        yield run
+    finally:
+        clf.close()
+
+
+loop_names = ("loop:bench-{0}".format(n) for n in itertools.count(1))
+
+
+@benchmark("dep.exchange", unit="B", group="macro")
+def dep_exchange():
+    """Send 1 KiB through an NFC-DEP link and receive it back."""
+    path = next(loop_names)
+    initiator_clf = nfc.ContactlessFrontend(path)
+    target_clf = nfc.ContactlessFrontend(path)
+
+    def echo():
+        dep = nfc.dep.Target(target_clf)
+        if dep.activate(timeout=5.0) is not None:
+            data = dep.exchange(None, 5.0)
+            while data:
+                data = dep.exchange(data, 5.0)
+
+    thread = threading.Thread(target=echo)
+    thread.start()
+    dep = nfc.dep.Initiator(initiator_clf)
+    while dep.activate(None, brs=2, acm=True) is None:
+        pass
+    data = bytearray(1024)
+
+    def run():
+        assert len(dep.exchange(data, 1.0)) == len(data)
+        return len(data)
+    try:
+        yield run
+    finally:
+        dep.deactivate()
+        thread.join()
+        initiator_clf.close()
+        target_clf.close()
+
+
+class SnepStore(nfc.snep.SnepServer):
+    def __init__(self, llc):
+        super(SnepStore, self).__init__(llc)
+        self.ndef_message = nfc.ndef.Message(nfc.ndef.Record())
+
+    def get(self, acceptable_length, ndef_message):
+        return self.ndef_message
+
+    def put(self, ndef_message):
+        self.ndef_message = ndef_message
+        return nfc.snep.Success
+
+
+def snep_session(size):
+    # Start a LLCP link with a SNEP server on the target side and
+    # return a connected client, the message and a cleanup function.
+    path = next(loop_names)
+    initiator_clf = nfc.ContactlessFrontend(path)
+    target_clf = nfc.ContactlessFrontend(path)
+    done = threading.Event()
+
+    def on_startup(llc):
+        llc.snep_server = SnepStore(llc)
+        return llc
+
+    def on_connect(llc):
+        llc.snep_server.start()
+        return True
+
+    target_options = {'role': 'target', 'on-startup': on_startup,
+                      'on-connect': on_connect}
+    target_thread = threading.Thread(
+        target=target_clf.connect, kwargs={'llcp': target_options})
+    target_thread.start()
+
+    initiator_options = {'role': 'initiator', 'brs': 2,
+                         'on-connect': lambda llc: False}
+    llc = initiator_clf.connect(llcp=initiator_options)
+    llc_thread = threading.Thread(
+        target=llc.run, kwargs={'terminate': done.is_set})
+    llc_thread.start()
+
+    client = nfc.snep.SnepClient(llc, max_ndef_msg_recv_size=size + 16)
+    client.connect("urn:nfc:sn:snep")
+    message = nfc.ndef.Message(ndef_octets(size))
+
+    def close():
+        client.close()
+        done.set()
+        llc_thread.join()
+        target_thread.join()
+        initiator_clf.close()
+        target_clf.close()
+
+    return client, message, close
+
+
+@benchmark("snep.put", unit="B", group="macro")
+def snep_put():
+    """Send a 4 KiB NDEF message with SNEP PUT over LLCP."""
+    client, message, close = snep_session(4096)
+
+    def run():
+        client.put(message)
+        return 4096
+    try:
+        yield run
+    finally:
+        close()
+
+
+@benchmark("snep.get", unit="B", group="macro")
+def snep_get():
+    """Receive a 4 KiB NDEF message with SNEP GET over LLCP."""
+    client, message, close = snep_session(4096)
+    client.put(message)
+
+    def run():
+        assert len(str(client.get(timeout=1.0))) == 4096
+        return 4096
+    try:
+        yield run
+    finally:
+        close()
@@ -0,0 +1,232 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Micro-benchmarks for single functions of the protocol stack."""
+import nfc.clf
+import nfc.clf.sim
+import nfc.clf.device
+import nfc.dep
+import nfc.llcp.pdu
+import nfc.llcp.sec
+import nfc.ndef
+import nfc.tag
+import nfc.tag.tt2
+import nfc.tag.tt3_sony
+import nfc.tag.crypto
+
+from . import benchmark, Skip
+
+import logging
+log = logging.getLogger(__name__)
+
+
+def llcp_pdus():
+    pdu = nfc.llcp.pdu
+    return [
+        pdu.Symmetry(),
+        pdu.ParameterExchange(version=0x13, miux=1920, wks=0x0013,
+                              lto=50, opt=3),
+        pdu.Connect(1, 32, miu=2175, rw=15, sn="urn:nfc:sn:snep"),
+        pdu.ConnectionComplete(32, 4, miu=2175, rw=15),
+        pdu.Information(4, 32, ns=1, nr=2, data=bytes(bytearray(248))),
+        pdu.ReceiveReady(32, 4, nr=2),
+        pdu.UnnumberedInformation(16, 16, data=bytes(bytearray(128))),
+        pdu.Disconnect(4, 32),
+        pdu.DisconnectedMode(32, 4, reason=0),
+    ]
+
+
+@benchmark("llcp.pdu.encode", unit="pdu")
+def llcp_pdu_encode():
+    """Encode a mix of LLCP PDUs as seen on a SNEP connection."""
+    pdus = llcp_pdus()
+
+    def run():
+        for pdu in pdus:
+            nfc.llcp.pdu.encode(pdu)
+        return len(pdus)
+    yield run
+
+
+@benchmark("llcp.pdu.decode", unit="pdu")
+def llcp_pdu_decode():
+    """Decode a mix of LLCP PDUs as seen on a SNEP connection."""
+    frames = [nfc.llcp.pdu.encode(pdu) for pdu in llcp_pdus()]
+
+    def run():
+        for frame in frames:
+            nfc.llcp.pdu.decode(frame)
+        return len(frames)
+    yield run
+
+
+@benchmark("clf.crc_a", unit="B")
+def clf_crc_a():
+    """Add and check the ISO/IEC 14443-3 Type A CRC of a 64 byte frame."""
+    data = bytearray(range(64))
+
+    def run():
+        nfc.clf.device.Device.check_crc_a(
+            nfc.clf.device.Device.add_crc_a(data[:]))
+        return len(data)
+    yield run
+
+
+@benchmark("clf.crc_b", unit="B")
+def clf_crc_b():
+    """Add and check the ISO/IEC 14443-3 Type B CRC of a 64 byte frame."""
+    data = bytearray(range(64))
+
+    def run():
+        nfc.clf.device.Device.check_crc_b(
+            nfc.clf.device.Device.add_crc_b(data[:]))
+        return len(data)
+    yield run
+
+
+@benchmark("dep.frame", unit="B")
+def dep_frame():
+    """Encode and decode NFC-DEP frames with maximum payload at 106A."""
+    initiator = nfc.dep.Initiator(clf=None)
+    target = nfc.dep.Target(clf=None)
+    initiator.target = target.target = nfc.clf.RemoteTarget("106A")
+    pfb = nfc.dep.DEP_REQ.PFB(0, False, False, 1)
+    data = bytearray(250)
+    req = nfc.dep.DEP_REQ(pfb, None, None, data)
+
+    def run():
+        frame = target.decode_frame(bytearray(initiator.encode_frame(req)))
+        res = nfc.dep.DEP_RES(frame.pfb, None, None, frame.data)
+        initiator.decode_frame(bytearray(target.encode_frame(res)))
+        return 2 * len(data)
+    yield run
+
+
+@benchmark("tag.tt2.memory_reader", unit="B")
+def tag_tt2_memory_reader():
+    """Read all memory of a simulated NTAG216 with the memory reader."""
+    model = nfc.clf.sim.Type2TagModel.ntag216()
+    clf = nfc.ContactlessFrontend()
+    clf.device = nfc.clf.sim.init(model)
+    rdwr_options = {'targets': ['106A'], 'on-connect': lambda tag: False}
+    tag = clf.connect(rdwr=rdwr_options)
+    size = len(model.emulation.memory)
+
+    def run():
+        tag_memory = nfc.tag.tt2.Type2TagMemoryReader(tag)
+        tag_memory[0:size]
+        return size
+    try:
+        yield run
+    finally:
+        clf.close()
+
+
+@benchmark("ndef.message.parse", unit="B")
+def ndef_message_parse():
+    """Parse an NDEF message with text, URI and smart poster records."""
+    data = str(nfc.ndef.Message(
+        nfc.ndef.TextRecord("Hello World", language="en"),
+        nfc.ndef.UriRecord("https://nfcpy.readthedocs.io/"),
+        nfc.ndef.SmartPosterRecord("https://nfcpy.readthedocs.io/",
+                                   title={"en": "nfcpy"}),
+        nfc.ndef.Record("application/octet-stream", "", bytearray(256)),
+    ))
+
+    def run():
+        for record in nfc.ndef.Message(data):
+            record.type
+        return len(data)
+    yield run
+
+
+@benchmark("ndef.message.build", unit="B")
+def ndef_message_build():
+    """Build the octets of an NDEF message with several records."""
+    message = nfc.ndef.Message(
+        nfc.ndef.TextRecord("Hello World", language="en"),
+        nfc.ndef.UriRecord("https://nfcpy.readthedocs.io/"),
+        nfc.ndef.Record("application/octet-stream", "", bytearray(256)),
+    )
+
+    def run():
+        return len(str(message))
+    yield run
+
+
+def cipher_suite_pair():
+    if nfc.llcp.sec.OpenSSL is None:
+        raise Skip("requires OpenSSL 1.0 libcrypto")
+    name = "ECDH_anon_WITH_AEAD_AES_128_CCM_4"
+    cs_i = nfc.llcp.sec.cipher_suite(name)
+    cs_t = nfc.llcp.sec.cipher_suite(name)
+    cs_i.calculate_session_key(cs_t.public_key_x + cs_t.public_key_y,
+                               rn_t=cs_t.random_nonce)
+    cs_t.calculate_session_key(cs_i.public_key_x + cs_i.public_key_y,
+                               rn_i=cs_i.random_nonce)
+    return cs_i, cs_t
+
+
+@benchmark("llcp.sec.key_agreement", unit="op")
+def llcp_sec_key_agreement():
+    """Generate ECDH keys and derive the session key for both sides."""
+    cipher_suite_pair()
+
+    def run():
+        cipher_suite_pair()
+        return 1
+    yield run
+
+
+@benchmark("llcp.sec.encrypt", unit="B")
+def llcp_sec_encrypt():
+    """Encrypt and decrypt a 248 byte LLCP information field."""
+    cs_i, cs_t = cipher_suite_pair()
+    header, data = b"\x13\x20", bytes(bytearray(248))
+
+    def run():
+        cs_t.decrypt(header, cs_i.encrypt(header, data))
+        return len(data)
+    yield run
+
+
+@benchmark("tag.crypto.triple_des", unit="B")
+def tag_crypto_triple_des():
+    """Encrypt and decrypt 256 bytes with two-key Triple DES CBC."""
+    key, iv, data = bytearray(range(16)), bytearray(8), bytearray(256)
+    log.debug("triple des backend %s", type(nfc.tag.crypto.backend))
+
+    def run():
+        nfc.tag.crypto.triple_des_cbc_decrypt(
+            key, iv, nfc.tag.crypto.triple_des_cbc_encrypt(key, iv, data))
+        return len(data)
+    yield run
+
+
+@benchmark("tag.felica_lite.mac", unit="MAC")
+def tag_felica_lite_mac():
+    """Generate the FeliCa Lite MAC over four blocks and the IDs."""
+    key, iv, data = bytearray(16 * b"\x0F"), bytearray(8), bytearray(80)
+
+    def run():
+        nfc.tag.tt3_sony.FelicaLite.generate_mac(data, key, iv)
+        return 1
+    yield run
@@ -66,11 +66,20 @@ class ContactlessFrontend(object):
     The methods of the :class:`ContactlessFrontend` class are
     thread-safe.
 
+    Tag command timeouts are static worst case values unless the
+    :attr:`adaptive_timeouts` attribute is set :const:`True`. Tag
+    commands will then use timeouts and retry budgets learned from
+    the response times observed with this reader (see
+    :meth:`response_time_estimator`), so that a tag that has left
+    the field is noticed much earlier.
+
     """
     def __init__(self, path=None):
         self.device = None
         self.target = None
         self.lock = threading.Lock()
+        self.adaptive_timeouts = False
+        self._response_time_estimators = dict()
         if path and not self.open(path):
             raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
 
@@ -131,6 +140,20 @@ class ContactlessFrontend(object):
            UDP/IP. The defaults for *host* and *port* are
            ``localhost:54321``.
 
+        ``loop[:name]``
+
+           with an optional channel *name*. This connects all
+           devices opened with the same *name* in the same process
+           for NFC-DEP communication in active mode, one as
+           Initiator and the other as Target.
+
+        ``sim[:model[,model...]]``
+
+           with optional comma separated tag *model* names. This
+           opens an in-process simulated RF medium with the tag
+           models from :data:`nfc.clf.sim.MODELS` in the field. The
+           default is a single ``ntag215``.
+
         """
         if not isinstance(path, str):
             raise TypeError("expecting a string type argument *path*")
@@ -161,6 +184,7 @@ class ContactlessFrontend(object):
                 except IOError:
                     pass
                 self.device = None
+            self._response_time_estimators.clear()
 
     def connect(self, **options):
         """Connect with a Target or Initiator
@@ -870,6 +894,127 @@ class ContactlessFrontend(object):
                     elapsed = time.time() - started
                     time.sleep(max(0, options.get('interval', 0.1)-elapsed))
 
+    def reactivate(self, target):
+        """Re-select a Type A *target* that was found with :meth:`sense`.
+
+        A Type 2 Tag, for example, returns to the IDLE state when it
+        answers a command with NAK and must then be selected again
+        before further commands. Other than calling :meth:`sense` with
+        the NFCID1 in ``sel_req``, this leaves the RF field switched
+        on if the driver supports it, which is considerably faster.
+        The return value is either a :class:`RemoteTarget` with the
+        responses from the same target or :const:`None` if the
+        target did not respond. The time to recover is logged at
+        debug level.
+
+        **Exceptions**
+
+        * :exc:`~exceptions.IOError` (ENODEV) when a local contacless
+          communication device has not been opened or communication
+          with the local device is no longer possible.
+
+        * :exc:`nfc.clf.UnsupportedTargetError` if *target* is not
+          a Type A Target with an ``sdd_res`` attribute.
+
+        """
+        with self.lock:
+            if self.device is None:
+                raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
+
+            self.target = None  # forget captured target
+            started = time.time()
+            try:
+                self.target = self.device.reactivate(target)
+            except CommunicationError as error:
+                log.debug(error)
+            log.debug("reactivated {0} in {1:f}s".format(
+                self.target, time.time() - started))
+            return self.target
+
+    def inventory(self, target):
+        """Discover all cards that are in the RF field.
+
+        Other than :meth:`sense`, which returns the first target that
+        responds, this returns a list of all targets found with the
+        anticollision method of the technology, as far as supported
+        by the driver. Each of the targets can then be activated with
+        :func:`nfc.tag.activate` and read in turn.
+
+        A **Type F Target** is specified with the technology letter
+        ``F`` following the bitrate for the SENSF_REQ command. The
+        time slot number in the last byte of the ``sensf_req``
+        attribute sets how many time slots the cards may choose from
+        to send their SENSF_RES. Without ``sensf_req`` all cards are
+        invited with the system code request and 16 time slots. The
+        first target found becomes the current target for
+        :meth:`exchange`.
+
+        >>> target = nfc.clf.RemoteTarget("212F")
+        >>> for target in clf.inventory(target):
+        ...     print(nfc.tag.activate(clf, target))
+        Type3Tag 'FeliCa Standard (RC-S960)' ID=0101010601B00ADE PMM=...
+        Type3Tag 'FeliCa Lite-S (RC-S966)' ID=01270033DA0A8D17 PMM=...
+
+        A **Type A Target** is specified with the technology letter
+        ``A`` following the bitrate for the SENS_REQ command. The
+        driver selects one target after the other and sends each to
+        the HALT state, so the returned targets must be selected again
+        with :meth:`reactivate` before activation, which does not
+        switch off the RF field. There is no current target for
+        :meth:`exchange` until then.
+
+        >>> for target in clf.inventory(nfc.clf.RemoteTarget("106A")):
+        ...     print(nfc.tag.activate(clf, clf.reactivate(target)))
+        Type2Tag 'NXP NTAG213' ID=04497622D93881
+        Type2Tag 'NXP NTAG215' ID=04A93782B24C80
+
+        The number of targets found and the time it took is logged at
+        debug level.
+
+        **Exceptions**
+
+        * :exc:`~exceptions.IOError` (ENODEV) when a local contacless
+          communication device has not been opened or communication
+          with the local device is no longer possible.
+
+        * :exc:`nfc.clf.UnsupportedTargetError` if the *target*
+          technology is not supported for inventory by the driver.
+
+        """
+        if not isinstance(target, RemoteTarget):
+            raise ValueError("invalid target argument type: %r" % target)
+
+        with self.lock:
+            if self.device is None:
+                raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
+
+            self.target = None  # forget captured target
+            self.device.mute()  # deactivate the rf field
+
+            started = time.time()
+            if target.brty.endswith('A'):
+                inventory = self.device.inventory_tta
+            elif target.brty.endswith('F'):
+                if target.sensf_req is None:
+                    target = RemoteTarget(target.brty, sensf_req=bytearray(
+                        b"\x00\xFF\xFF\x01\x0F"))
+                inventory = self.device.inventory_ttf
+            else:
+                info = "no inventory for technology type in %r"
+                raise UnsupportedTargetError(info % target.brty)
+
+            try:
+                targets = inventory(target)
+            except CommunicationError as error:
+                log.debug(error)
+                targets = []
+
+            log.debug("inventory found {0} target(s) in {1:f}s".format(
+                len(targets), time.time() - started))
+            if targets and target.brty.endswith('F'):
+                self.target = targets[0]
+            return targets
+
     def listen(self, target, timeout):
         """Listen *timeout* seconds to become activated as *target*.
 
@@ -1078,6 +1223,34 @@ class ContactlessFrontend(object):
             else:
                 return self.device.get_max_recv_data_size(self.target)
 
+    def response_time_estimator(self, *key):
+        """Return the :class:`nfc.tag.ResponseTimeEstimator` for the
+        kind of tag command identified by *key*, or :const:`None` if
+        :attr:`adaptive_timeouts` is not enabled. Tag implementations
+        use the tag type, command code and static timeout as *key*.
+        Learned response times are discarded when the reader is
+        closed.
+
+        """
+        if self.adaptive_timeouts:
+            estimators = self._response_time_estimators
+            if key not in estimators:
+                estimators[key] = nfc.tag.ResponseTimeEstimator()
+            return estimators[key]
+
+    @property
+    def supported_bitrates(self):
+        """The list of bitrate and technology type strings that may be
+        used with the :meth:`exchange` method after a protocol
+        parameter selection for the current target.
+
+        """
+        with self.lock:
+            if self.device is None:
+                raise IOError(errno.ENODEV, os.strerror(errno.ENODEV))
+            else:
+                return self.device.get_supported_bitrates(self.target)
+
     def __enter__(self):
         return self
 
@@ -29,6 +29,7 @@ arguments when they are supposed to be valid. The interface may change
 without notice at any time.
 
 """
+import nfc.clf
 from . import transport
 
 import os
@@ -126,6 +127,25 @@ def connect(path):
         device._path = "udp:{0}:{1}".format(host, port)
         return device
 
+    if path.startswith("loop"):
+        name = path.split(':', 1)[1] if ':' in path else ''
+        driver = importlib.import_module("nfc.clf.loop")
+        device = driver.init(name)
+        device._path = "loop:{0}".format(name) if name else "loop"
+        return device
+
+    if path.startswith("sim"):
+        names = path.split(':', 1)[1].split(',') if ':' in path else []
+        driver = importlib.import_module("nfc.clf.sim")
+        try:
+            tags = [driver.MODELS[model]() for model in names or ["ntag215"]]
+        except KeyError as error:
+            log.error("unknown tag model in 'sim' path: %s", error)
+            return None
+        device = driver.init(*tags)
+        device._path = "sim:{0}".format(','.join(names or ["ntag215"]))
+        return device
+
 
 class Device(object):
     """All device drivers inherit from the :class:`Device` class and must
@@ -321,6 +341,115 @@ class Device(object):
         cname = self.__class__.__module__ + '.' + self.__class__.__name__
         raise NotImplementedError("%s.%s() is required" % (cname, fname))
 
+    def reactivate(self, target):
+        """Re-select a Type A Target that was discovered before.
+
+        This is used to recover a target that has returned to the
+        IDLE state, for example a Type 2 Tag after a NAK response,
+        and only the target with the NFCID1 from **target.sdd_res**
+        may be selected. The default implementation deactivates the
+        13.56 MHz carrier and then uses :meth:`sense_tta`. Drivers
+        override this method to re-select the target without
+        switching the carrier off, which is considerably faster.
+
+        Arguments:
+
+          target (nfc.clf.RemoteTarget): The target as returned
+            from a previous :meth:`sense_tta`.
+
+        Returns:
+
+          nfc.clf.RemoteTarget: Response data received from the
+            re-selected target or None if it did not respond.
+
+        Raises:
+
+          nfc.clf.UnsupportedTargetError: The *target* is not a Type
+            A Target with an **sdd_res** attribute.
+
+        """
+        if not (target.brty.endswith('A') and target.sdd_res):
+            message = "can not reactivate {0}".format(target)
+            raise nfc.clf.UnsupportedTargetError(message)
+        self.mute()
+        return self.sense_tta(nfc.clf.RemoteTarget(
+            "106A", sel_req=target.sdd_res))
+
+    def inventory_tta(self, target):
+        """Discover all Type A Targets that are in the RF field.
+
+        Drivers that can resolve more than one target per field
+        activation override this method, usually by selecting one
+        target after the other and sending it to the HALT state. The
+        default implementation returns the single target found with
+        :meth:`sense_tta`. The returned targets may be selected in
+        turn with :meth:`reactivate`.
+
+        Arguments:
+
+          target (nfc.clf.RemoteTarget): Supplies the bitrate for
+            target discovery.
+
+        Returns:
+
+          list: The :class:`nfc.clf.RemoteTarget` objects with the
+            **sens_res**, **sel_res** and **sdd_res** attributes from
+            all targets found, in order of discovery. The list is
+            empty if no target was found.
+
+        Raises:
+
+          nfc.clf.UnsupportedTargetError: The method is not supported
+            or the *target* argument requested an unsupported bitrate
+            (or has a wrong technology type identifier).
+
+        """
+        found = self.sense_tta(nfc.clf.RemoteTarget(target.brty))
+        return [found] if found is not None else []
+
+    def inventory_ttf(self, target):
+        """Discover all Type F Targets that respond to SENSF_REQ.
+
+        The time slot number in **target.sensf_req** (the last byte)
+        lets up to 16 targets answer a single SENSF_REQ command in
+        different time slots. Drivers that can receive more than one
+        SENSF_RES per command override this method. The default
+        implementation repeats :meth:`sense_ttf` once for each time
+        slot, until no more target responds, and collects the
+        responses with different NFCID2. Each target randomly selects
+        a time slot for every SENSF_REQ, so that a target hidden by
+        another one will usually answer first in a later round.
+
+        Arguments:
+
+          target (nfc.clf.RemoteTarget): Supplies bitrate and the
+            optional **sensf_req** for target discovery, as for
+            :meth:`sense_ttf`.
+
+        Returns:
+
+          list: The :class:`nfc.clf.RemoteTarget` objects with the
+            **sensf_res** attribute from all targets that responded,
+            in order of discovery. The list is empty if no target was
+            found.
+
+        Raises:
+
+          nfc.clf.UnsupportedTargetError: The method is not supported
+            or the *target* argument requested an unsupported bitrate
+            (or has a wrong technology type identifier).
+
+        """
+        time_slots = target.sensf_req[4] + 1 if target.sensf_req else 1
+        targets = []
+        for _ in range(time_slots):
+            found = self.sense_ttf(target)
+            if found is None:
+                break
+            if found.sensf_res[1:9] not in [t.sensf_res[1:9] for t in targets]:
+                targets.append(found)
+        return targets
+
     def listen_tta(self, target, timeout):
         """Listen as Type A Target.
 
@@ -603,6 +732,29 @@ class Device(object):
         cname = self.__class__.__module__ + '.' + self.__class__.__name__
         raise NotImplementedError("%s.%s() is required" % (cname, fname))
 
+    def get_supported_bitrates(self, target):
+        """Returns the bitrates supported for an activated *target*.
+
+        The list of bitrate and technology type strings, for example
+        ``['106A', '212A', '424A']``, that the local device is able to
+        use for data exchange with a remote *target* once a protocol
+        parameter selection (like PPS for ISO-DEP Type A or the
+        ATTRIB parameters for Type B) has been performed. The default
+        implementation returns only the bitrate used for activation,
+        drivers override this method to announce higher bitrates.
+
+        Arguments:
+
+          target (nfc.clf.Target): The current local or remote
+            communication target.
+
+        Returns:
+
+          list: Bitrate and technology type strings.
+
+        """
+        return [target.brty] if target is not None else []
+
     def turn_on_led_and_buzzer(self):
         """If a device has an LED and/or a buzzer, this method can be
         implemented to turn those indicators to the ON state.
@@ -0,0 +1,377 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2012, 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Driver module for NFC-DEP between two contactless frontends in the
+same process. It can be activated with the device path
+``loop[:<name>]``, all devices opened with the same *name* are
+connected to the same loopback channel. The channel and its pipes
+are released when all devices opened with that name are closed. One
+device is then used as
+NFC-DEP Initiator in active communication mode and the other as
+NFC-DEP Target, for example with an LLCP connect in separate
+threads. ::
+
+    initiator = nfc.ContactlessFrontend('loop:llcp')
+    target = nfc.ContactlessFrontend('loop:llcp')
+
+Frames are handed over as the bytearray objects given to the
+exchange methods, without encoding or copying, through a double
+ended queue for each direction. The receiving thread is woken up
+through a pipe, no locks are taken on the data path.
+
+==========  =======  ============
+function    support  remarks
+==========  =======  ============
+sense_tta   no       never finds a target
+sense_ttb   no       never finds a target
+sense_ttf   no       never finds a target
+sense_dep   yes
+listen_tta  no
+listen_ttb  no
+listen_ttf  no
+listen_dep  yes      only active communication mode
+==========  =======  ============
+
+"""
+import nfc.clf
+
+import os
+import time
+import errno
+import select
+import threading
+import itertools
+import collections
+from binascii import hexlify
+
+import logging
+log = logging.getLogger(__name__)
+
+if os.name == "posix":
+    import fcntl
+
+
+class Pipe(object):
+    """The frames sent in one direction of a :class:`Channel`. Frames
+    are queued in a deque, the receiver is woken up by a byte written
+    to a non-blocking operating system pipe that it waits for with
+    select() and drains when the deque is empty. This is much faster
+    than :class:`threading.Event` with a timeout, which polls under
+    Python 2, and is only used where select() does not support pipes.
+
+    """
+    def __init__(self):
+        self._frames = collections.deque()
+        if os.name == "posix":
+            self._rfd, self._wfd = os.pipe()
+            for fd in (self._rfd, self._wfd):
+                flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+                fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        else:  # pragma: no cover
+            self._ready = threading.Event()
+
+    def close(self):
+        if os.name == "posix":
+            os.close(self._rfd)
+            os.close(self._wfd)
+
+    def put(self, item):
+        self._frames.append(item)
+        if os.name == "posix":
+            try:
+                os.write(self._wfd, b"\0")
+            except OSError as error:
+                # A full pipe already wakes up the receiver.
+                if error.errno != errno.EAGAIN:
+                    raise
+        else:  # pragma: no cover
+            self._ready.set()
+
+    def clear(self):
+        """Drop all queued frames."""
+        self._frames.clear()
+
+    def get(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                return self._frames.popleft()
+            except IndexError:
+                pass
+            wait = None if deadline is None else deadline - time.time()
+            if wait is not None and wait <= 0:
+                raise nfc.clf.TimeoutError("no data received")
+            if os.name == "posix":
+                if select.select([self._rfd], [], [], wait)[0]:
+                    try:
+                        os.read(self._rfd, 4096)
+                    except OSError as error:
+                        if error.errno != errno.EAGAIN:
+                            raise
+            else:  # pragma: no cover
+                self._ready.clear()
+                if not self._frames:
+                    self._ready.wait(wait)
+
+
+class Channel(object):
+    """A loopback channel with a :class:`Pipe` for each direction. A
+    new session number is drawn for every ATR_REQ, frames of other
+    sessions are discarded by the Initiator and end the link for the
+    Target. The number of open devices is counted in *devices*.
+
+    """
+    def __init__(self, name):
+        self.name = name
+        self.devices = 0
+        self.to_target = Pipe()
+        self.to_initiator = Pipe()
+        self._session = itertools.count(1)
+
+    def new_session(self):
+        return next(self._session)
+
+    def close(self):
+        self.to_target.close()
+        self.to_initiator.close()
+
+
+channels = {}
+channels_lock = threading.Lock()
+
+
+def attach(name):
+    with channels_lock:
+        channel = channels.get(name)
+        if channel is None:
+            channel = channels[name] = Channel(name)
+        channel.devices += 1
+        return channel
+
+
+def detach(channel):
+    # The last device closed removes the channel and its pipes.
+    with channels_lock:
+        channel.devices -= 1
+        if channel.devices == 0:
+            if channels.get(channel.name) is channel:
+                del channels[channel.name]
+            channel.close()
+
+
+def frame(brty, data):
+    data = bytearray([len(data) + 1]) + data
+    if brty == "106A":
+        data.insert(0, 0xF0)
+    return data
+
+
+def unframe(brty, data):
+    if brty == "106A":
+        if not (data and data[0] == 0xF0):
+            return None
+        data = data[1:]
+    if data and data[0] == len(data):
+        return data[1:]
+
+
+class Device(nfc.clf.device.Device):
+    def __init__(self, channel):
+        self.channel = channel
+        self._session = None
+        self._initiator = False
+
+    def close(self):
+        if self.channel is not None:
+            self.mute()
+            detach(self.channel)
+            self.channel = None
+
+    def mute(self):
+        if self._session is not None and self._initiator:
+            # Frames not taken by the Target are gone with the RF
+            # field, tell the Target that the field is off.
+            self.channel.to_target.clear()
+            self.channel.to_target.put((self._session, None, None))
+        self._session = None
+
+    def sense_tta(self, target):
+        return None
+
+    def sense_ttb(self, target):
+        return None
+
+    def sense_ttf(self, target):
+        return None
+
+    def sense_dep(self, target):
+        if target.brty not in ("106A", "212F", "424F"):
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+
+        self.mute()
+        self._initiator = True
+        self._session = session = self.channel.new_session()
+        atr_req = bytearray(target.atr_req)
+        log.debug("send ATR_REQ %s", hexlify(atr_req))
+        self.channel.to_target.put(
+            (session, target.brty, frame(target.brty, atr_req)))
+        try:
+            data = self._recv_response(0.1)
+        except nfc.clf.TimeoutError:
+            # Nobody took the ATR_REQ, a polling Initiator must not
+            # fill the queue for a Target that attaches later.
+            self.channel.to_target.clear()
+            self._session = None
+            return None
+        atr_res = unframe(target.brty, data)
+        if atr_res and atr_res.startswith(b"\xD5\x01"):
+            log.debug("rcvd ATR_RES %s", hexlify(atr_res))
+            return nfc.clf.RemoteTarget(target.brty, atr_req=atr_req,
+                                        atr_res=atr_res)
+        self._session = None
+
+    def listen_tta(self, target, timeout):
+        info = "{device} does not support listen as Type A Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_ttb(self, target, timeout):
+        info = "{device} does not support listen as Type B Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_ttf(self, target, timeout):
+        info = "{device} does not support listen as Type F Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_dep(self, target, timeout):
+        assert target.atr_res is not None
+        self.mute()
+        self._initiator = False
+        atr_res = bytearray(target.atr_res)
+        time_to_return = time.time() + timeout
+        message = None
+
+        while True:
+            if message is None:
+                wait = time_to_return - time.time()
+                try:
+                    message = self.channel.to_target.get(max(0, wait))
+                except nfc.clf.TimeoutError:
+                    return None
+
+            (session, brty, data), message = message, None
+            data = unframe(brty, data) if data is not None else None
+            if not (data and data.startswith(b"\xD4\x00")):
+                continue
+
+            target = nfc.clf.LocalTarget(brty, atr_req=data, atr_res=atr_res)
+            log.debug("rcvd ATR_REQ %s", hexlify(target.atr_req))
+            log.debug("send ATR_RES %s", hexlify(target.atr_res))
+            self.channel.to_initiator.put(
+                (session, brty, frame(brty, atr_res)))
+
+            # Wait for the first DEP_REQ, an optional PSL_REQ may
+            # change the bitrate and another ATR_REQ starts over.
+            while message is None:
+                try:
+                    message = self.channel.to_target.get(1.0)
+                except nfc.clf.TimeoutError:
+                    return None
+                if message[0] != session or message[2] is None:
+                    break
+                (_, brty, data), message = message, None
+                data = unframe(brty, data)
+                if data is None:
+                    return None
+                if data.startswith(b"\xD4\x04"):
+                    target.psl_req = data
+                    target.psl_res = bytearray(b"\xD5\x05") + data[2:3]
+                    log.debug("rcvd PSL_REQ %s", hexlify(target.psl_req))
+                    log.debug("send PSL_RES %s", hexlify(target.psl_res))
+                    self.channel.to_initiator.put(
+                        (session, brty, frame(brty, target.psl_res)))
+                    target.brty = ("106A", "212F", "424F")[data[3] >> 3 & 7]
+                elif data.startswith(b"\xD4\x08") or \
+                        data.startswith(b"\xD4\x0A"):
+                    res = bytearray([0xD5, data[1] + 1]) + data[2:3]
+                    log.debug("send %s", hexlify(res))
+                    self.channel.to_initiator.put(
+                        (session, brty, frame(brty, res)))
+                    return None
+                elif data.startswith(b"\xD4\x06"):
+                    target.dep_req = data
+                    self._session = session
+                    return target
+                else:
+                    return None
+
+    def send_cmd_recv_rsp(self, target, data, timeout):
+        if self._session is None:
+            raise nfc.clf.BrokenLinkError("no target activated")
+        if data is not None:
+            if not isinstance(data, bytearray):
+                data = bytearray(data)
+            self.channel.to_target.put((self._session, target.brty, data))
+        if timeout > 0:
+            return self._recv_response(timeout)
+
+    def _recv_response(self, timeout):
+        # Responses from an earlier session are late and dropped.
+        time_to_return = time.time() + timeout
+        while True:
+            wait = max(0, time_to_return - time.time())
+            session, brty, data = self.channel.to_initiator.get(wait)
+            if session == self._session:
+                return data
+
+    def send_rsp_recv_cmd(self, target, data, timeout):
+        if self._session is None:
+            raise nfc.clf.BrokenLinkError("no initiator activated")
+        if data is not None:
+            if not isinstance(data, bytearray):
+                data = bytearray(data)
+            self.channel.to_initiator.put((self._session, target.brty, data))
+        if timeout is None or timeout > 0:
+            time_to_return = None if timeout is None else time.time()+timeout
+            while True:
+                wait = (None if time_to_return is None else
+                        max(0, time_to_return - time.time()))
+                session, brty, data = self.channel.to_target.get(wait)
+                if session > self._session or data is None:
+                    if session >= self._session:
+                        self._session = None
+                        raise nfc.clf.BrokenLinkError("RFOFF")
+                elif session == self._session:
+                    return data
+
+    def get_max_send_data_size(self, target):
+        return 290
+
+    def get_max_recv_data_size(self, target):
+        return 290
+
+
+def init(name):
+    device = Device(attach(name))
+    device._vendor_name = "nfcpy"
+    device._device_name = "Loopback"
+    device._chipset_name = "LOOP"
+    return device
@@ -32,6 +32,7 @@ import six
 import os
 import time
 import errno
+import operator
 from binascii import hexlify
 from struct import pack, unpack
 
@@ -385,7 +386,7 @@ class Chipset(object):
     def in_list_passive_target(self, max_tg, brty, initiator_data):
         assert max_tg <= self.in_list_passive_target_max_target
         assert brty in self.in_list_passive_target_brty_range
-        data = chr(1) + chr(brty) + initiator_data
+        data = chr(max_tg) + chr(brty) + initiator_data
         data = self.command(0x4A, data, timeout=1.0)
         return data[2:] if data and data[0] > 0 else None
 
@@ -539,6 +540,97 @@ class Device(device.Device):
             except Chipset.Error:
                 pass
 
+    def reactivate(self, target):
+        # The targets that inventory_tta() sent to HALT only answer
+        # ALL_REQ (WUPA) but InListPassiveTarget always sends SENS_REQ.
+        # WUPA and SEL_REQ with the known NFCID1 are thus sent with
+        # InCommunicateThru while the RF field stays on.
+        if target.brty.endswith('A') and target.sdd_res:
+            return self._tta_wakeup(target)
+        return super(Device, self).reactivate(target)
+
+    def _tta_wakeup(self, target):
+        uid = target.sdd_res
+        if len(uid) > 4:
+            uid = b'\x88' + uid
+        if len(uid) > 8:
+            uid = uid[0:4] + b'\x88' + uid[4:]
+
+        txm, rxm = self.chipset.read_register("CIU_TxMode", "CIU_RxMode")
+        try:
+            # ALL_REQ is a short frame of 7 bits without CRC_A.
+            self.chipset.write_register(
+                ("CIU_TxMode", txm & 0x7F), ("CIU_RxMode", rxm & 0x7F),
+                ("CIU_BitFraming", 0x07))
+            try:
+                sens_res = self.chipset.in_communicate_thru(b'\x52', 0.1)
+            except Chipset.Error as error:
+                if error.errno == 1:
+                    return None
+                # HALTed targets with different SENS_RES collide, the
+                # SEL_REQ selects the one with the known NFCID1.
+                self.log.debug(error)
+                sens_res = target.sens_res
+            self.chipset.write_register(
+                ("CIU_TxMode", txm | 0x80), ("CIU_RxMode", rxm | 0x80),
+                ("CIU_BitFraming", 0x00))
+            for i, sel_cmd in zip(range(0, len(uid), 4), b"\x93\x95\x97"):
+                sel_req = sel_cmd + b"\x70" + uid[i:i+4]
+                sel_req.append(reduce(operator.xor, sel_req[2:6]))  # BCC
+                sel_res = self.chipset.in_communicate_thru(sel_req, 0.1)
+        except Chipset.Error as error:
+            self.log.debug(error)
+            return None
+        finally:
+            # Standard frames with CRC_A as after InListPassiveTarget.
+            self.chipset.write_register(
+                ("CIU_TxMode", txm | 0x80), ("CIU_RxMode", rxm | 0x80),
+                ("CIU_BitFraming", 0x00))
+
+        if sel_res[0] & 0x60 == 0x00:
+            self.log.debug("disable crc check for type 2 tag")
+            self.chipset.write_register("CIU_RxMode", rxm & 0x7F)
+        return nfc.clf.RemoteTarget(
+            "106A", sens_res=sens_res, sel_res=sel_res,
+            sdd_res=target.sdd_res)
+
+    def inventory_tta(self, target):
+        brty = {"106A": 0}.get(target.brty)
+        if brty not in self.chipset.in_list_passive_target_brty_range:
+            message = "unsupported bitrate {0}".format(target.brty)
+            self.log.warning(message)
+            raise ValueError(message)
+
+        # InListPassiveTarget selects up to MaxTg targets and sends all
+        # but the last one to HALT. Each target data starts with
+        # SENS_RES, SEL_RES and the NFCID1 length and all but the
+        # first are preceded by the logical target number Tg. The last
+        # target is sent to HALT with an HLTA command before the next
+        # round, until no more new target is found.
+        max_tg = self.chipset.in_list_passive_target_max_target
+        targets = []
+        while True:
+            found = []
+            rsp = self.chipset.in_list_passive_target(max_tg, brty, b'')
+            while rsp and len(rsp) >= 4:
+                sens_res, sel_res = rsp[1::-1], rsp[2:3]
+                sdd_res, rsp = rsp[4:4+rsp[3]], rsp[5+rsp[3]:]
+                if sdd_res not in [t.sdd_res for t in targets + found]:
+                    found.append(nfc.clf.RemoteTarget(
+                        "106A", sens_res=sens_res, sel_res=sel_res,
+                        sdd_res=sdd_res))
+            if not found:
+                break
+            targets.extend(found)
+            try:
+                self.chipset.in_communicate_thru(b'\x50\x00', 0.1)
+            except Chipset.Error:
+                pass  # HLTA is not answered
+
+        # The RF field stays on, reactivate() wakes the targets in
+        # HALT state with ALL_REQ (WUPA).
+        return targets
+
     def sense_ttb(self, target, did=None):
         brty = {"106B": 3, "212B": 6, "424B": 7, "848B": 8}.get(target.brty)
         if brty not in self.chipset.in_list_passive_target_brty_range:
@@ -565,6 +657,30 @@ class Device(device.Device):
                 self.log.debug(error)
 
     def sense_ttf(self, target):
+        brty, sensf_req = self._prepare_sense_ttf(target)
+        rsp = self.chipset.in_list_passive_target(1, brty, sensf_req)
+        if rsp is not None:
+            return nfc.clf.RemoteTarget(target.brty, sensf_res=rsp[1:])
+
+    def inventory_ttf(self, target):
+        max_tg = self.chipset.in_list_passive_target_max_target
+        if max_tg < 2:
+            return super(Device, self).inventory_ttf(target)
+
+        # With MaxTg > 1 the chip collects POL_RES responses from all
+        # time slots. Each starts with its length byte and all but the
+        # first are preceded by the logical target number Tg.
+        brty, sensf_req = self._prepare_sense_ttf(target)
+        rsp = self.chipset.in_list_passive_target(max_tg, brty, sensf_req)
+        targets = []
+        while rsp:
+            sensf_res, rsp = rsp[1:rsp[0]], rsp[rsp[0]+1:]
+            if len(sensf_res) >= 17:
+                targets.append(nfc.clf.RemoteTarget(target.brty,
+                                                    sensf_res=sensf_res))
+        return targets
+
+    def _prepare_sense_ttf(self, target):
         brty = {"212F": 1, "424F": 2}.get(target.brty)
         if brty not in self.chipset.in_list_passive_target_brty_range:
             message = "unsupported bitrate {0}".format(target.brty)
@@ -580,9 +696,7 @@ class Device(device.Device):
 
         default_sensf_req = bytearray.fromhex("00FFFF0100")
         sensf_req = target.sensf_req if target.sensf_req else default_sensf_req
-        rsp = self.chipset.in_list_passive_target(1, brty, sensf_req)
-        if rsp is not None:
-            return nfc.clf.RemoteTarget(target.brty, sensf_res=rsp[1:])
+        return brty, sensf_req
 
     def sense_dep(self, target):
         # Attempt active communication mode target activation.
@@ -618,6 +732,13 @@ class Device(device.Device):
     def get_max_recv_data_size(self, target):
         return self.chipset.host_command_frame_max_size - 3
 
+    def get_supported_bitrates(self, target):
+        # The CIU can be programmed for 106, 212 and 424 kbps with
+        # Type A and B framing after the target was activated.
+        if target is not None and target.brty[-1:] in ('A', 'B'):
+            return ["%d%s" % (br, target.brty[-1]) for br in (106, 212, 424)]
+        return super(Device, self).get_supported_bitrates(target)
+
     def send_cmd_recv_rsp(self, target, data, timeout):
         def bitrate(brty):
             return [106 << i for i in range(6)].index(int(brty[:-1]))
@@ -386,14 +386,17 @@ class Device(device.Device):
             sens_res = self.chipset.in_comm_rf(sens_req, 30)
             if len(sens_res) != 2:
                 return None
+            log.debug("rcvd SENS_RES " + hexlify(sens_res))
         except CommunicationError as error:
             if error != "RECEIVE_TIMEOUT_ERROR":
                 log.debug(error)
-            return None
-
-        log.debug("rcvd SENS_RES " + hexlify(sens_res))
+            if error == "RECEIVE_TIMEOUT_ERROR" or not target.sel_req:
+                return None
+            # Targets with different SENS_RES collide, the known
+            # NFCID1 in SEL_REQ selects one of them.
+            sens_res = target.sens_res or bytearray(2)
 
-        if sens_res[0] & 0x1F == 0:
+        if sens_res[0] & 0x1F == 0 and not target.sel_req:
             log.debug("type 1 tag target found")
             self.chipset.in_set_protocol(last_byte_bit_count=8, add_crc=2,
                                          check_crc=2, type_1_tag_rrdd=2)
@@ -449,6 +452,134 @@ class Device(device.Device):
         except CommunicationError as error:
             log.debug(error)
 
+    def reactivate(self, target):
+        """Reactivation of a Type A Target sends ALL_REQ (WUPA) and
+        SEL_REQ with the known NFCID1 while the RF field stays on.
+
+        """
+        if target.brty.endswith('A') and target.sdd_res:
+            return self.sense_tta(nfc.clf.RemoteTarget(
+                "106A", sens_req=bytearray.fromhex("52"),
+                sens_res=target.sens_res, sel_req=target.sdd_res))
+        return super(Device, self).reactivate(target)
+
+    def inventory_tta(self, target):
+        """Inventory of Type A Targets is supported for 106, 212 and
+        424 kbps. The driver runs the anticollision loop in software,
+        selects one target per SENS_REQ and then sends it to the HALT
+        state with HLTA. Colliding SDD_RES are resolved bit by bit
+        with the NVB bit count of SDD_REQ. Targets with different
+        SENS_RES are also resolved by the anticollision loop but are
+        then reported with an all zero SENS_RES. The targets in HALT
+        state still answer the ALL_REQ (WUPA) sent by
+        :meth:`reactivate`.
+
+        """
+        log.debug("inventory of NFC-A technology")
+
+        if target.brty not in ("106A", "212A", "424A"):
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+
+        self.chipset.in_set_rf(target.brty)
+        self.chipset.in_set_protocol(self.chipset.in_set_protocol_defaults)
+
+        targets = []
+        while True:
+            found = self._select_tta(target.brty)
+            if found is None or found.sdd_res in [t.sdd_res for t in targets]:
+                return targets
+            targets.append(found)
+            try:
+                log.debug("send HLTA 5000")
+                self.chipset.in_comm_rf(b"\x50\x00", 1)
+            except CommunicationError as error:
+                if error != "RECEIVE_TIMEOUT_ERROR":
+                    log.debug(error)
+
+    def _select_tta(self, brty):
+        # Send SENS_REQ and select one target with the anticollision
+        # loop. Type 1 Tags are not supported because they do not
+        # have an anticollision procedure.
+        self.chipset.in_set_protocol(initial_guard_time=6, add_crc=0,
+                                     check_crc=0, check_parity=1,
+                                     last_byte_bit_count=7)
+        try:
+            sens_res = self.chipset.in_comm_rf(b"\x26", 30)
+            log.debug("rcvd SENS_RES " + hexlify(sens_res))
+            if len(sens_res) == 2 and sens_res[0] & 0x1F == 0:
+                return None
+        except CommunicationError as error:
+            if error == "RECEIVE_TIMEOUT_ERROR":
+                return None
+            log.debug(error)
+            sens_res = None
+        if sens_res is None or len(sens_res) != 2:
+            # Targets with different SENS_RES collide but still take
+            # part in the anticollision loop.
+            sens_res = bytearray(2)
+        try:
+            self.chipset.in_set_protocol(last_byte_bit_count=8, add_parity=1)
+            uid = bytearray()
+            for sel_cmd in b"\x93\x95\x97":
+                sdd_res = self._sdd_req(sel_cmd)
+                if sdd_res is None:
+                    return None
+                self.chipset.in_set_protocol(add_crc=1, check_crc=1,
+                                             bitwise_anticoll=0,
+                                             last_byte_bit_count=8)
+                sel_req = sel_cmd + b"\x70" + sdd_res
+                log.debug("send SEL_REQ " + hexlify(sel_req))
+                sel_res = self.chipset.in_comm_rf(sel_req, 30)
+                log.debug("rcvd SEL_RES " + hexlify(sel_res))
+                if sel_res[0] & 0b00000100:
+                    uid = uid + sdd_res[1:4]
+                else:
+                    uid = uid + sdd_res[0:4]
+                    return nfc.clf.RemoteTarget(brty, sens_res=sens_res,
+                                                sel_res=sel_res, sdd_res=uid)
+        except CommunicationError as error:
+            if error != "RECEIVE_TIMEOUT_ERROR":
+                log.debug(error)
+
+    def _sdd_req(self, sel_cmd):
+        # Bit oriented anticollision. SDD_REQ carries the number of
+        # valid bits (NVB) and the known leading bits of UID CLn, only
+        # targets with matching bits answer with the remaining bits
+        # and the BCC. After a collision the next bit is tried as 0.
+        # If no target answers, all colliding targets have that bit
+        # set to 1 and the bit after it is tried next. This costs at
+        # most one SDD_REQ per bit or 8 per byte of UID CLn.
+        uid = bytearray(4)
+        nbits = 0
+        while nbits <= 32:
+            nbyte, nbit = divmod(nbits, 8)
+            self.chipset.in_set_protocol(add_crc=0, check_crc=0,
+                                         bitwise_anticoll=int(nbit > 0),
+                                         last_byte_bit_count=nbit or 8)
+            sdd_req = sel_cmd + chr(0x20 + nbyte * 0x10 + nbit)
+            sdd_req += uid[0:(nbits + 7) // 8]
+            log.debug("send SDD_REQ " + hexlify(sdd_req))
+            try:
+                data = self.chipset.in_comm_rf(sdd_req, 30)
+                log.debug("rcvd SDD_RES " + hexlify(data))
+            except CommunicationError as error:
+                if error != "RECEIVE_TIMEOUT_ERROR":
+                    log.debug(error)
+                elif nbits == 0:
+                    return None
+                else:
+                    nbyte, nbit = divmod(nbits - 1, 8)
+                    uid[nbyte] |= 1 << nbit
+            else:
+                sdd_res = uid[0:nbyte] + data
+                if nbit and len(data) > 0:
+                    mask = (1 << nbit) - 1
+                    sdd_res[nbyte] = (uid[nbyte] & mask) | (data[0] & ~mask)
+                if len(sdd_res) == 5 and reduce(operator.xor, sdd_res) == 0:
+                    return sdd_res
+            nbits += 1
+
     def sense_ttb(self, target):
         """Sense for a Type B Target is supported for 106, 212 and 424
         kbps. However, there may not be any target that understands the
@@ -895,6 +1026,12 @@ class Device(device.Device):
     def get_max_recv_data_size(self, target):
         return 290
 
+    def get_supported_bitrates(self, target):
+        # InSetRF supports 106, 212 and 424 kbps for Type A and B.
+        if target is not None and target.brty[-1:] in ('A', 'B'):
+            return ["%d%s" % (br, target.brty[-1]) for br in (106, 212, 424)]
+        return super(Device, self).get_supported_bitrates(target)
+
     def send_cmd_recv_rsp(self, target, data, timeout):
         if timeout:
             timeout_msec = max(min(int(timeout * 1000), 0xFFFF), 1)
@@ -0,0 +1,591 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2012, 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Driver module for a simulated RF medium with tag models in the
+same process. It can be activated with the device path
+``sim[:<model>[,<model>...]]`` where each *model* is one of the
+names in :data:`MODELS`, the default is ``sim:ntag215``. All tag
+models are placed in the RF field at the same time, a sense for
+Type A or Type F Targets finds the first model of that technology
+type (or the one with the NFCID1 in ``sel_req``). A Type A inventory
+is timed as the bit oriented anticollision loop that selects and
+halts one tag model after the other. For a Type F inventory each tag
+model answers in a random one of the time slots requested by
+SENSF_REQ, responses in the same time slot collide and are lost.
+
+The tag models keep their content in memory images that survive
+the RF field being switched off, so that tags may be read and
+written as with real hardware. Communication is timed by a
+:class:`Timing` model for each bitrate. The simulated time on air
+accumulates in :attr:`Device.rf_time` and is only spent in real
+time if the device was created with ``realtime=True``. A response
+delay longer than the timeout given by the reader raises a
+timeout error, and transmission errors are injected at random with
+the configured error rate. ::
+
+    import nfc.clf.sim
+    device = nfc.clf.sim.init(nfc.clf.sim.Type2TagModel.ntag213(),
+                              nfc.clf.sim.Type3TagModel(), seed=1)
+    clf = nfc.ContactlessFrontend()
+    clf.device = device
+
+==========  =======  ============
+function    support  remarks
+==========  =======  ============
+sense_tta   yes      Type 1, 2 and 4A tag models
+sense_ttb   yes      no tag models
+sense_ttf   yes      Type 3 tag models
+sense_dep   no
+listen_tta  no
+listen_ttb  no
+listen_ttf  no
+listen_dep  no
+==========  =======  ============
+
+"""
+import nfc.clf
+import nfc.tag.tt2
+import nfc.tag.tt3
+import nfc.tag.tt4
+
+import time
+import random
+import operator
+from binascii import hexlify
+from struct import pack
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class Timing(object):
+    """Timing of the simulated RF link for one bitrate.
+
+    The time to transmit a frame is calculated from the bitrate and
+    the frame format of the technology type, including start and end
+    of frame and the CRC. The *frame_delay* is the time the tag
+    needs to start a response, a per command code delay can be set
+    in the *command_delay* dictionary (for example longer EEPROM
+    write times). A command is answered with a transmission error
+    with probability *error_rate*.
+
+    """
+    # bits per byte and start/end of frame bits for each technology
+    FRAME_FORMAT = {'A': (9, 2), 'B': (10, 22), 'F': (8, 64)}
+
+    def __init__(self, frame_delay=86E-6, command_delay=None, error_rate=0.0):
+        self.frame_delay = frame_delay
+        self.command_delay = command_delay if command_delay else {}
+        self.error_rate = error_rate
+
+    def __repr__(self):
+        return "Timing(frame_delay={0}, command_delay={1}, error_rate={2})"\
+            .format(self.frame_delay, self.command_delay, self.error_rate)
+
+    def frame_time(self, brty, size):
+        """Returns the seconds to transmit *size* data bytes at *brty*."""
+        bits_per_byte, framing_bits = self.FRAME_FORMAT[brty[-1]]
+        bit_time = 128 / 13.56E6 * 106 / int(brty[:-1])
+        return ((size + 2) * bits_per_byte + framing_bits) * bit_time
+
+    def response_delay(self, command):
+        """Returns the seconds until the tag answers *command*."""
+        return self.command_delay.get(command[0], self.frame_delay)
+
+
+class TagModel(object):
+    """Base class for the simulated tags. A tag model answers sense
+    requests for the bitrates in :attr:`brty_list` and processes
+    the command frames received after activation. The :attr:`timing`
+    dictionary maps bitrate strings to a :class:`Timing`, the entry
+    for None is used for all other bitrates.
+
+    """
+    brty_list = ()
+
+    def __init__(self):
+        self.timing = {None: Timing()}
+        self.active = False
+
+    def __str__(self):
+        return self.__class__.__name__
+
+    def get_timing(self, brty):
+        """Returns the :class:`Timing` for *brty*."""
+        return self.timing.get(brty, self.timing[None])
+
+    def reset(self):
+        """Return to the power-off state when the RF field is off."""
+        self.active = False
+
+    def sense(self, target):
+        """Returns a :class:`nfc.clf.RemoteTarget` if the tag answers
+        the activation requested by *target*, otherwise None.
+
+        """
+        raise NotImplementedError
+
+    def exchange(self, data):
+        """Returns the response to command *data* or None if the tag
+        does not respond.
+
+        """
+        raise NotImplementedError
+
+
+class TypeATagModel(TagModel):
+    brty_list = ("106A",)
+
+    def __init__(self, uid, sens_res, sel_res):
+        super(TypeATagModel, self).__init__()
+        self.uid = bytearray(uid)
+        self.sens_res = bytearray(sens_res)
+        self.sel_res = bytearray(sel_res)
+
+    def __str__(self):
+        return "{0} UID={1}".format(self.__class__.__name__,
+                                    hexlify(self.uid))
+
+    def sense(self, target):
+        if target.sel_req and target.sel_req != self.uid:
+            return None
+        self.active = True
+        return nfc.clf.RemoteTarget(target.brty, sens_res=self.sens_res,
+                                    sel_res=self.sel_res, sdd_res=self.uid)
+
+
+class Type1TagModel(TagModel):
+    """A Type 1 Tag with *memory* addressed in blocks of 8 byte. The
+    first block holds the UID and is read-only. Static memory tags
+    (Topaz) have 120 byte and dynamic memory tags (Topaz-512) have
+    512 byte.
+
+    """
+    brty_list = ("106A",)
+
+    def __init__(self, memory, header_rom):
+        super(Type1TagModel, self).__init__()
+        assert len(memory) in (120, 512)
+        self.memory = memory
+        self.header_rom = bytearray(header_rom)
+
+    @classmethod
+    def topaz(cls, uid="\x01\x02\x03\x04"):
+        memory = bytearray(uid + "\x00\x00\x00\x00") + bytearray(112)
+        memory[8:15] = bytearray.fromhex("E1100E000300FE")
+        return cls(memory, "\x11\x48")
+
+    @classmethod
+    def topaz512(cls, uid="\x01\x02\x03\x04"):
+        memory = bytearray(uid + "\x00\x00\x00\x00") + bytearray(504)
+        memory[8:25] = bytearray.fromhex("E1103F000103F230330203F002030300FE")
+        return cls(memory, "\x12\x4C")
+
+    def __str__(self):
+        return "Type1TagModel UID={0}".format(hexlify(self.memory[0:4]))
+
+    def sense(self, target):
+        if target.sel_req and target.sel_req != self.memory[0:4]:
+            return None
+        self.active = True
+        return nfc.clf.RemoteTarget(
+            target.brty, sens_res=bytearray(b"\x00\x0C"),
+            rid_res=self.header_rom + self.memory[0:4])
+
+    def exchange(self, data):
+        if not self.active:
+            return None
+        if data[0] == 0x78:
+            return self.header_rom + self.memory[0:4]
+        if len(data) < 7 or data[-4:] != self.memory[0:4]:
+            return None
+        cmd, addr, memory = data[0], data[1], self.memory
+        if cmd == 0x00:
+            return self.header_rom + memory[0:120]
+        if cmd == 0x10 and addr >> 4 < len(memory) // 128:
+            return data[1:2] + memory[(addr >> 4)*128:((addr >> 4)+1)*128]
+        if cmd in (0x01, 0x53, 0x1A) and addr < min(len(memory), 120):
+            if cmd == 0x53 and addr >= 8:
+                memory[addr] = data[2]
+            if cmd == 0x1A and addr >= 8:
+                memory[addr] |= data[2]
+            return data[1:2] + memory[addr:addr+1]
+        if cmd in (0x02, 0x54, 0x1B) and addr < len(memory) // 8:
+            offset = addr * 8
+            if cmd == 0x54 and addr > 0:
+                memory[offset:offset+8] = data[2:10]
+            if cmd == 0x1B and addr > 0:
+                for i in range(8):
+                    memory[offset+i] |= data[2+i]
+            return data[1:2] + memory[offset:offset+8]
+        self.active = False
+
+
+class Type2TagModel(TypeATagModel):
+    """A Type 2 Tag that serves READ, FAST_READ and WRITE from the
+    *memory* image with a :class:`nfc.tag.tt2.Type2TagEmulation`. A
+    tag with a *version* answers GET_VERSION and READ_SIG like an
+    NXP NTAG21x. After a NAK response or an unknown command the tag
+    stays mute until it is selected again.
+
+    """
+    def __init__(self, memory, version=None):
+        uid = memory[0:3] + memory[4:8]
+        super(Type2TagModel, self).__init__(uid, b"\x44\x00", b"\x00")
+        target = nfc.clf.LocalTarget("106A", sdd_res=self.uid)
+        self.emulation = nfc.tag.tt2.Type2TagEmulation(None, target)
+        self.emulation.memory = memory
+        self.version = version
+        self.timing[None].command_delay[0xA2] = 4.1E-3
+
+    @classmethod
+    def ntag21x(cls, pages, size, version, uid):
+        # The NDEF data area size in the CC is *size* times 8 byte.
+        uid = bytearray(uid)
+        memory = bytearray(pages * 4)
+        memory[0:3] = uid[0:3]
+        memory[3] = reduce(operator.xor, uid[0:3], 0x88)
+        memory[4:8] = uid[3:7]
+        memory[8] = reduce(operator.xor, uid[3:7])
+        memory[9] = 0x48
+        memory[12:16] = bytearray([0xE1, 0x10, size, 0x00])
+        memory[16:19] = bytearray(b"\x03\x00\xFE")
+        # dynamic lock bytes, CFG0, CFG1 and PWD in the last pages
+        memory[-20:-4] = bytearray.fromhex("000000BD040000FF0005000000000000")
+        return cls(memory, bytearray(version))
+
+    @classmethod
+    def ntag213(cls, uid="\x04\x01\x02\x03\x04\x05\x06"):
+        return cls.ntag21x(45, 0x12, b"\x00\x04\x04\x02\x01\x00\x0F\x03", uid)
+
+    @classmethod
+    def ntag215(cls, uid="\x04\x01\x02\x03\x04\x05\x06"):
+        return cls.ntag21x(135, 0x3E, b"\x00\x04\x04\x02\x01\x00\x11\x03", uid)
+
+    @classmethod
+    def ntag216(cls, uid="\x04\x01\x02\x03\x04\x05\x06"):
+        return cls.ntag21x(231, 0x6D, b"\x00\x04\x04\x02\x01\x00\x13\x03", uid)
+
+    @property
+    def memory(self):
+        return self.emulation.memory
+
+    def exchange(self, data):
+        if not self.active:
+            return None
+        if data[0] == 0x60 and self.version:
+            return self.version
+        if data[0] == 0x3C and self.version:
+            return bytearray(32)
+        rsp = self.emulation.process_command(data)
+        if rsp is None or rsp == self.emulation.NAK:
+            self.active = False
+        return rsp
+
+
+class Type3TagModel(TagModel):
+    """A FeliCa Lite-S with the NDEF system code 12FCh and the NDEF
+    attribute and data blocks 0 to 13 served through services 0009h
+    and 000Bh from a :class:`nfc.tag.tt3.NdefMemoryService`.
+
+    """
+    brty_list = ("212F", "424F")
+
+    def __init__(self, idm="\x01\x2E\x01\x02\x03\x04\x05\x06",
+                 pmm="\x00\xF1\x00\x00\x00\x01\x43\x00", memory=None):
+        super(Type3TagModel, self).__init__()
+        if memory is None:
+            memory = bytearray(14 * 16)
+            memory[0:14] = pack(">BBBHxxxxBB", 0x10, 4, 1, 13, 0, 1)
+            memory[14:16] = pack(">H", sum(memory[0:14]))
+        sensf_res = bytearray(b"\x01" + idm + pmm + b"\x12\xFC")
+        tt3_cmd = bytearray(b"\x00\x12\xFC\x00\x00")
+        target = nfc.clf.LocalTarget("212F", sensf_res=sensf_res,
+                                     tt3_cmd=tt3_cmd)
+        self.emulation = nfc.tag.tt3.Type3TagEmulation(None, target)
+        self.service = self.emulation.add_memory_service(
+            0x0009, nfc.tag.tt3.NdefMemoryService(memory))
+        self.emulation.add_memory_service(0x000B, self.service)
+
+    def __str__(self):
+        return "Type3TagModel IDm={0}".format(hexlify(self.emulation.idm))
+
+    @property
+    def memory(self):
+        return self.service.memory
+
+    def sense(self, target):
+        sensf_req = (target.sensf_req if target.sensf_req else
+                     bytearray.fromhex("00FFFF0100"))
+        rsp = self.emulation.process_command(
+            bytearray([len(sensf_req) + 1]) + sensf_req)
+        if rsp is not None:
+            self.active = True
+            return nfc.clf.RemoteTarget(target.brty, sensf_res=rsp[1:])
+
+    def exchange(self, data):
+        if self.active and len(data) > 1 and data[0] == len(data):
+            return self.emulation.process_command(data)
+
+
+class Type4TagModel(TypeATagModel):
+    """A Type 4A Tag with the NDEF application served by a
+    :class:`nfc.tag.tt4.Type4TagEmulation` from the *ndef_file*
+    bytearray. The ISO-DEP state is reset when the RF field is
+    switched off, the NDEF file content is retained.
+
+    """
+    def __init__(self, ndef_file=None, uid="\x08\x01\x02\x03",
+                 rats_res=b"\x05\x78\x80\x70\x02"):
+        super(Type4TagModel, self).__init__(uid, b"\x44\x03", b"\x20")
+        self.rats_res = bytearray(rats_res)
+        if ndef_file is None:
+            ndef_file = bytearray(1024)
+        self.ndef_file = ndef_file
+        self.writeable = True
+        self.reset()
+
+    def reset(self):
+        super(Type4TagModel, self).reset()
+        target = nfc.clf.LocalTarget("106A", sdd_res=self.uid,
+                                     rats_res=self.rats_res)
+        self.emulation = nfc.tag.tt4.Type4TagEmulation(None, target)
+        self.emulation.ndef_file = self.ndef_file
+        self.emulation.writeable = self.writeable
+
+    def exchange(self, data):
+        if not self.active:
+            return None
+        if data[0] & 0xF7 == 0xC2:
+            self.active = False
+        rsp = self.emulation.process_command(data)
+        if rsp is None:
+            self.active = False
+        return rsp
+
+
+MODELS = {
+    "topaz": Type1TagModel.topaz,
+    "topaz512": Type1TagModel.topaz512,
+    "ntag213": Type2TagModel.ntag213,
+    "ntag215": Type2TagModel.ntag215,
+    "ntag216": Type2TagModel.ntag216,
+    "felica-lite-s": Type3TagModel,
+    "type4": Type4TagModel,
+    "tt1": Type1TagModel.topaz512,
+    "tt2": Type2TagModel.ntag215,
+    "tt3": Type3TagModel,
+    "tt4": Type4TagModel,
+}
+"""Tag model names for the ``sim:<model>`` device path."""
+
+
+class Device(nfc.clf.device.Device):
+    def __init__(self, tags, seed=None, realtime=False):
+        self.tags = list(tags)
+        self.realtime = realtime
+        self.random = random.Random(seed)
+        self.rf_time = 0.0
+        self._tag = None
+        self._path = "sim"
+
+    def close(self):
+        self.mute()
+
+    def mute(self):
+        for tag in self.tags:
+            tag.reset()
+        self._tag = None
+
+    def sense_tta(self, target):
+        if target.brty != "106A":
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+        return self._sense(target)
+
+    def sense_ttb(self, target):
+        if target.brty not in ("106B", "212B", "424B"):
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+        return self._sense(target)
+
+    def sense_ttf(self, target):
+        if target.brty not in ("212F", "424F"):
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+        return self._sense(target)
+
+    def sense_dep(self, target):
+        info = "{device} does not support sense for active DEP Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def _sense(self, target):
+        self._tag = None
+        for tag in self.tags:
+            if target.brty in tag.brty_list and not tag.active:
+                found = tag.sense(target)
+                if found is not None:
+                    log.debug("sensed %s", tag)
+                    self._tag = tag
+                    return found
+
+    def inventory_tta(self, target):
+        if target.brty != "106A":
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+        found = self._inventory(target)
+        self._spend(self._anticollision_time(
+            [remote.sdd_res for remote in found if remote.sdd_res]))
+        return found
+
+    def _anticollision_time(self, uids):
+        # Time on air to select and halt one target per SENS_REQ. Each
+        # SDD_REQ adds one known bit of UID CLn, tried as 0 first,
+        # until all answering targets agree on the remaining bits.
+        timing = Timing()
+
+        def exchange(cmd_size, rsp_size):
+            return (timing.frame_time("106A", cmd_size) + timing.frame_delay +
+                    timing.frame_time("106A", rsp_size))
+
+        remaining = []
+        for uid in uids:
+            if len(uid) > 4:
+                uid = b"\x88" + uid
+            if len(uid) > 8:
+                uid = uid[0:4] + b"\x88" + uid[4:]
+            remaining.append([sum(octet << 8 * i for i, octet in
+                                  enumerate(uid[n:n+4]))
+                              for n in range(0, len(uid), 4)])
+
+        seconds = exchange(1, 2)  # SENS_REQ and SENS_RES
+        while remaining:
+            answering, level = remaining, 0
+            while True:
+                prefix, nbits = 0, 0
+                while True:
+                    seconds += exchange(2 + (nbits + 7) // 8, 5 - nbits // 8)
+                    mask = (1 << nbits) - 1
+                    values = set(levels[level] for levels in answering
+                                 if levels[level] & mask == prefix)
+                    if len(values) == 1:
+                        break
+                    if not values:
+                        prefix |= 1 << (nbits - 1)
+                    nbits += 1
+                seconds += exchange(7, 1)  # SEL_REQ and SEL_RES
+                cln = values.pop()
+                answering = [levels for levels in answering
+                             if levels[level] == cln]
+                if len(answering[0]) == level + 1:
+                    break
+                level += 1
+            remaining = [levels for levels in remaining
+                         if levels is not answering[0]]
+            seconds += timing.frame_time("106A", 2) + timing.frame_delay
+            seconds += exchange(1, 2)  # HLTA and the next SENS_REQ
+        return seconds
+
+    def inventory_ttf(self, target):
+        if target.brty not in ("212F", "424F"):
+            message = "unsupported bitrate {0}".format(target.brty)
+            raise nfc.clf.UnsupportedTargetError(message)
+        # Responses are received in the time slots of SENSF_REQ, a
+        # time slot with more than one response is a collision. The
+        # reader waits 2.4 ms for the first and 1.2 ms for each
+        # further time slot at 212 kbps, half of that at 424 kbps.
+        time_slots = target.sensf_req[4] + 1 if target.sensf_req else 1
+        slots = [[] for _ in range(time_slots)]
+        for remote in self._inventory(target):
+            slots[self.random.randrange(time_slots)].append(remote)
+        self._spend((2.4E-3 + 1.2E-3 * (time_slots - 1)) *
+                    (1 if target.brty == "212F" else 0.5))
+        return [slot[0] for slot in slots if len(slot) == 1]
+
+    def _inventory(self, target):
+        # All tags answer, those found are halted until the field is
+        # switched off and must be selected again with reactivate().
+        found = [tag.sense(target) for tag in self.tags
+                 if target.brty in tag.brty_list]
+        for tag in self.tags:
+            tag.active = False
+        self._tag = None
+        return [remote for remote in found if remote is not None]
+
+    def listen_tta(self, target, timeout):
+        info = "{device} does not support listen as Type A Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_ttb(self, target, timeout):
+        info = "{device} does not support listen as Type B Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_ttf(self, target, timeout):
+        info = "{device} does not support listen as Type F Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def listen_dep(self, target, timeout):
+        info = "{device} does not support listen as DEP Target"
+        raise nfc.clf.UnsupportedTargetError(info.format(device=self))
+
+    def send_cmd_recv_rsp(self, target, data, timeout):
+        data = bytearray(data)
+        tag, brty = self._tag, target.brty
+        if tag is None or not data:
+            self._spend(timeout)
+            raise nfc.clf.TimeoutError("no target to send data to")
+
+        timing = tag.get_timing(brty)
+        self._spend(timing.frame_time(brty, len(data)))
+        delay = timing.response_delay(data)
+        if timeout is not None and delay > timeout:
+            tag.exchange(data)
+            self._spend(timeout)
+            raise nfc.clf.TimeoutError("simulated response delay exceeded")
+
+        rsp = tag.exchange(data)
+        if rsp is None:
+            self._spend(timeout)
+            raise nfc.clf.TimeoutError("simulated tag did not respond")
+        self._spend(delay + timing.frame_time(brty, len(rsp)))
+        if timing.error_rate and self.random.random() < timing.error_rate:
+            raise nfc.clf.TransmissionError("simulated transmission error")
+        return rsp
+
+    def _spend(self, seconds):
+        if seconds:
+            self.rf_time += seconds
+            if self.realtime:
+                time.sleep(seconds)
+
+    def get_max_send_data_size(self, target):
+        return 290
+
+    def get_max_recv_data_size(self, target):
+        return 290
+
+
+def init(*tags, **options):
+    device = Device(tags, **options)
+    device._vendor_name = "nfcpy"
+    device._device_name = "Simulator"
+    device._chipset_name = "SIM"
+    return device
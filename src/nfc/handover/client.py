@@ -59,21 +59,12 @@ class HandoverClient(object):
     def send(self, message):
         """Send a handover request message to the remote server."""
         log.debug("sending '{0}' message".format(message.type))
-        send_miu = self.socket.getsockopt(nfc.llcp.SO_SNDMIU)
         try:
             data = str(message)
         except nfc.llcp.EncodeError as e:
             log.error("message encoding failed: {0}".format(e))
         else:
-            return self._send(data, send_miu)
-
-    def _send(self, data, miu):
-        while len(data) > 0:
-            if self.socket.send(data[0:miu]):
-                data = data[miu:]
-            else:
-                break
-        return bool(len(data) == 0)
+            return self.socket.sendall(data)
 
     def recv(self, timeout=None):
         """Receive a handover select message from the remote server."""
@@ -86,24 +77,24 @@ class HandoverClient(object):
             return None
 
     def _recv(self, timeout=None):
-        data = ''
+        framer = nfc.ndef.MessageFramer()
+        data = bytearray()
         started = time.time()
         while self.socket.poll("recv", timeout):
-            try:
-                data += self.socket.recv()
+            fragment = self.socket.recv()
+            if fragment is None:
+                log.debug("data link connection closed")
+                break
+            data += fragment[0:framer.feed(fragment)]
+            if framer.complete:
                 message = nfc.ndef.Message(data)
                 log.debug("received message\n" + message.pretty())
                 return message
-            except nfc.ndef.LengthError:
-                elapsed = time.time() - started
-                log.debug("message is incomplete (%d byte)", len(data))
-                if timeout:
-                    timeout = timeout - elapsed
-                    log.debug("%.3f seconds left to timeout", timeout)
-                continue  # incomplete message
-            except TypeError:
-                log.debug("data link connection closed")
-                break  # recv() returned None
+            elapsed = time.time() - started
+            log.debug("message is incomplete (%d byte)", len(data))
+            if timeout:
+                timeout = timeout - elapsed
+                log.debug("%.3f seconds left to timeout", timeout)
 
     def __enter__(self):
         self.connect()
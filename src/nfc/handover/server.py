@@ -23,6 +23,7 @@
 # Negotiated Connection Handover - Server Base Class
 #
 import nfc.llcp
+import nfc.llcp.executor
 
 from threading import Thread
 
@@ -32,9 +33,16 @@ log = logging.getLogger(__name__)
 
 class HandoverServer(Thread):
     """ NFC Forum Connection Handover server
+
+    Client connections are served by the worker threads of the
+    :class:`~nfc.llcp.executor.ServiceExecutor` given as *executor*,
+    or the shared :data:`nfc.llcp.executor.default`. At most
+    *max_concurrency* clients are served at the same time if not
+    :const:`None`.
     """
     def __init__(self, llc, request_size_limit=0x10000,
-                 recv_miu=1984, recv_buf=15):
+                 recv_miu=1984, recv_buf=15,
+                 executor=None, max_concurrency=None):
         socket = nfc.llcp.Socket(llc, nfc.llcp.DATA_LINK_CONNECTION)
         recv_miu = socket.setsockopt(nfc.llcp.SO_RCVMIU, recv_miu)
         recv_buf = socket.setsockopt(nfc.llcp.SO_RCVBUF, recv_buf)
@@ -42,40 +50,32 @@ class HandoverServer(Thread):
         log.info("handover server bound to port {0} (MIU={1}, RW={2})"
                  .format(socket.getsockname(), recv_miu, recv_buf))
         socket.listen(backlog=2)
+        self.executor = executor or nfc.llcp.executor.default
+        self.max_concurrency = max_concurrency
         Thread.__init__(self, name='urn:nfc:sn:handover',
                         target=self.listen, args=(llc, socket))
 
     def listen(self, llc, socket):
         log.debug("handover listen thread started")
-        try:
-            while True:
-                client_socket = socket.accept()
-                client_thread = Thread(target=HandoverServer.serve,
-                                       args=(client_socket, self))
-                client_thread.start()
-        except nfc.llcp.Error as e:
-            (log.debug if e.errno == nfc.llcp.errno.EPIPE else log.error)(e)
-        finally:
-            socket.close()
-            log.debug("handover listen thread terminated")
+        self.executor.listen(socket, lambda client: self.serve(client, self),
+                             self.name, self.max_concurrency)
+        log.debug("handover listen thread terminated")
 
     @staticmethod
     def serve(socket, handover_server):
         peer_sap = socket.getpeername()
         log.info("serving handover client on remote sap {0}".format(peer_sap))
-        send_miu = socket.getsockopt(nfc.llcp.SO_SNDMIU)
         try:
             while True:
-                request_data = ''
+                framer = nfc.ndef.MessageFramer()
+                request_data = bytearray()
                 while socket.poll("recv"):
                     data = socket.recv()
                     if data is not None:
-                        request_data += data
-                        try:
+                        request_data += data[0:framer.feed(data)]
+                        if framer.complete:
                             request = nfc.ndef.Message(request_data)
                             break  # message complete
-                        except nfc.ndef.LengthError:
-                            continue  # need more data
                     else:
                         return  # connection closed
                 else:
@@ -86,11 +86,8 @@ class HandoverServer(Thread):
                 response_data = str(response)
                 log.debug(">>> {0!r}".format(response_data))
 
-                while len(response_data) > 0:
-                    if socket.send(response_data[0:send_miu]):
-                        response_data = response_data[send_miu:]
-                    else:
-                        return  # connection closed
+                if not socket.sendall(response_data):
+                    return  # connection closed
         except nfc.llcp.Error as e:
             (log.debug if e.errno == nfc.llcp.errno.EPIPE else log.error)(e)
         finally:
@@ -27,6 +27,10 @@ the connection-less and connection-mode transport facilities of LLCP.
 from .socket import Socket                                         # noqa: F401
 from .llc import LOGICAL_DATA_LINK, DATA_LINK_CONNECTION           # noqa: F401
 from .err import Error, ConnectRefused                             # noqa: F401
+from .executor import ServiceExecutor                              # noqa: F401
+from .selector import Selector                                     # noqa: F401
+from .dispatcher import Dispatcher                                 # noqa: F401
+import errno                                                       # noqa: F401
 
 SO_SNDMIU = 1
 SO_RCVMIU = 2
@@ -34,5 +38,6 @@ SO_SNDBUF = 3
 SO_RCVBUF = 4
 SO_SNDBSY = 5
 SO_RCVBSY = 6
+SO_SNDWGT = 7
 
 MSG_DONTWAIT = 0b00000001
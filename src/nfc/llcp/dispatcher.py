@@ -0,0 +1,214 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Complete LLCP socket operations without a blocked thread per call.
+A :class:`Dispatcher` takes receive, accept and send requests for
+many sockets and returns a :class:`Future` for each. One dispatcher
+thread waits on a :class:`~nfc.llcp.Selector` for all sockets with
+pending requests and performs each operation when the socket is
+ready, so that it does not block. ::
+
+    dispatcher = nfc.llcp.Dispatcher()
+
+    def echo(future, socket):
+        data = future.result()
+        if data:
+            dispatcher.send(socket, data)
+            dispatcher.recv(socket).add_done_callback(
+                lambda future: echo(future, socket))
+
+    dispatcher.recv(socket).add_done_callback(
+        lambda future: echo(future, socket))
+
+Done callbacks run in the dispatcher thread and should return
+quickly. An application with its own event loop can hand results
+over to that loop, for example with ``call_soon_threadsafe``. The
+SNEP client exchanges messages through a dispatcher with
+:meth:`nfc.snep.SnepClient.dispatch_put` and
+:meth:`~nfc.snep.SnepClient.dispatch_get`.
+
+"""
+from . import err
+from .selector import Selector
+import nfc.llcp
+
+import errno
+import threading
+import collections
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class Future(object):
+    """The pending result of a socket operation. The methods are a
+    subset of the :class:`concurrent.futures.Future` interface."""
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        """True if the operation has completed."""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait up to *timeout* seconds for the operation to complete and
+        return its result, or raise the exception that it raised.
+        Raises :exc:`nfc.llcp.Error` with ETIMEDOUT if the operation
+        has not completed in time."""
+        if not self._done.wait(timeout):
+            raise err.Error(errno.ETIMEDOUT)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        """Like :meth:`result` but return the exception raised by the
+        operation, or None."""
+        if not self._done.wait(timeout):
+            raise err.Error(errno.ETIMEDOUT)
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """Call *callback* with the future as argument when the
+        operation has completed, or right away if it has."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._set(result, None)
+
+    def set_exception(self, exception):
+        self._set(None, exception)
+
+    def _set(self, result, exception):
+        with self._lock:
+            self._result, self._exception = result, exception
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                log.exception("exception in future done callback")
+
+
+class Dispatcher(object):
+    """Perform socket operations in a single dispatcher thread. The
+    thread is started with the first request and runs until
+    :meth:`close` is called. Requests on the same socket complete in
+    the order they were made.
+
+    """
+    def __init__(self):
+        self.selector = Selector()
+        self._requests = dict()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+
+    def recv(self, socket):
+        """Request :meth:`nfc.llcp.Socket.recv` on *socket*."""
+        return self._submit(socket, "recv", socket.recv)
+
+    def recvfrom(self, socket):
+        """Request :meth:`nfc.llcp.Socket.recvfrom` on *socket*."""
+        return self._submit(socket, "recv", socket.recvfrom)
+
+    def accept(self, socket):
+        """Request :meth:`nfc.llcp.Socket.accept` on the listening
+        *socket*, the result is the connected socket."""
+        return self._submit(socket, "recv", socket.accept)
+
+    def send(self, socket, data):
+        """Request :meth:`nfc.llcp.Socket.send` of *data* on *socket*."""
+        def send():
+            return socket.send(data, nfc.llcp.MSG_DONTWAIT)
+        return self._submit(socket, "send", send)
+
+    def sendto(self, socket, data, addr):
+        """Request :meth:`nfc.llcp.Socket.sendto` of *data* to *addr*."""
+        def sendto():
+            return socket.sendto(data, addr, nfc.llcp.MSG_DONTWAIT)
+        return self._submit(socket, "send", sendto)
+
+    def close(self):
+        """Stop the dispatcher thread. Requests that have not completed
+        fail with :exc:`nfc.llcp.Error` ESHUTDOWN."""
+        with self._lock:
+            self._closed = True
+            requests, self._requests = self._requests, dict()
+        self.selector.interrupt()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.selector.close()
+        for queues in requests.values():
+            for queue in queues.values():
+                for operation, future in queue:
+                    future.set_exception(err.Error(errno.ESHUTDOWN))
+
+    def _submit(self, socket, event, operation):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise err.Error(errno.ESHUTDOWN)
+            queues = self._requests.setdefault(socket, dict())
+            queues.setdefault(event, collections.deque()).append(
+                (operation, future))
+            self.selector.register(socket, queues.keys())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nfc.llcp.dispatcher")
+                self._thread.daemon = True
+                self._thread.start()
+        return future
+
+    def _run(self):
+        log.debug("dispatcher thread started")
+        while not self._closed:
+            for socket, events in self.selector.select():
+                for event in events:
+                    self._complete(socket, event)
+        log.debug("dispatcher thread terminated")
+
+    def _complete(self, socket, event):
+        with self._lock:
+            queues = self._requests.get(socket, {})
+            if not queues.get(event):
+                return
+            operation, future = queues[event].popleft()
+            if not queues[event]:
+                del queues[event]
+                if queues:
+                    self.selector.register(socket, queues.keys())
+                else:
+                    del self._requests[socket]
+                    self.selector.unregister(socket)
+        try:
+            future.set_result(operation())
+        except Exception as error:
+            future.set_exception(error)
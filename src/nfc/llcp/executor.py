@@ -0,0 +1,247 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Run the connections accepted by LLCP services in a bounded pool of
+worker threads. A :class:`ServiceExecutor` accepts data link
+connections on a listening socket and hands each connected socket to
+a service handler function that runs in one of the worker threads.
+The :class:`~nfc.snep.SnepServer` and
+:class:`~nfc.handover.HandoverServer` share the :data:`default`
+executor unless given another one, custom services can use it with
+:meth:`ServiceExecutor.listen` or :meth:`ServiceExecutor.register`. ::
+
+    def echo(socket):
+        try:
+            data = socket.recv()
+            while data and socket.send(data):
+                data = socket.recv()
+        finally:
+            socket.close()
+
+    def on_startup(llc):
+        socket = nfc.llcp.Socket(llc, nfc.llcp.DATA_LINK_CONNECTION)
+        socket.bind("urn:nfc:sn:echo")
+        socket.listen(backlog=2)
+        nfc.llcp.executor.default.register(socket, echo, max_concurrency=2)
+        return llc
+
+"""
+from . import err
+
+import time
+import errno
+import threading
+import collections
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ServiceMetrics(object):
+    """Connection counters and timing of one service. The
+    *wait_time* is the total time that accepted connections waited
+    for a worker thread, the *service_time* is the total time spent in
+    the service handler. Both are in seconds.
+
+    """
+    def __init__(self, name):
+        self.name = name
+        self.accepted = 0
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_time = 0.0
+        self.service_time = 0.0
+        self.max_service_time = 0.0
+
+    @property
+    def mean_service_time(self):
+        if self.completed:
+            return self.service_time / self.completed
+        return 0.0
+
+    def __str__(self):
+        return ("{0.name} accepted {0.accepted} queued {0.queued} "
+                "active {0.active} completed {0.completed} failed "
+                "{0.failed} mean service time {0.mean_service_time:.3f} s"
+                .format(self))
+
+
+class ServiceExecutor(object):
+    """Run service handlers for accepted LLCP connections with at most
+    *max_workers* threads. Worker threads are started when needed and
+    then wait for the next connection. Connections that are accepted
+    while all workers are busy wait in a queue, the current and the
+    maximum queue length are available as :attr:`queue_depth` and
+    :attr:`max_queue_depth`, the counters of each service are in the
+    :attr:`metrics` dictionary by service name.
+
+    """
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.max_queue_depth = 0
+        self.metrics = {}
+        self._lock = threading.Condition()
+        self._queue = collections.deque()
+        self._workers = []
+        self._idle = 0
+        self._shutdown = False
+
+    @property
+    def queue_depth(self):
+        """The number of accepted connections waiting for a worker."""
+        return len(self._queue)
+
+    @property
+    def workers(self):
+        """The number of worker threads started."""
+        return len(self._workers)
+
+    def listen(self, socket, handler, name=None, max_concurrency=None):
+        """Accept connections on the listening *socket* and run
+        *handler* with each connected socket in a worker thread. At
+        most *max_concurrency* connections of this service are
+        handled at the same time, further connection requests remain
+        in the socket's backlog until a handler returns. Counters are
+        kept in :attr:`metrics` under *name*, which defaults to the
+        socket address.
+
+        This method runs in the calling thread until the listening
+        socket fails, normally because the link was deactivated, and
+        then closes the socket. The handler is responsible to close
+        the connected socket.
+
+        """
+        name = socket.getsockname() if name is None else name
+        metrics = self._get_metrics(name)
+        slots = (threading.Semaphore(max_concurrency)
+                 if max_concurrency else None)
+        try:
+            while True:
+                if slots:
+                    slots.acquire()
+                try:
+                    client = socket.accept()
+                except err.Error:
+                    if slots:
+                        slots.release()
+                    raise
+                self._dispatch(metrics, handler, client, slots)
+        except err.Error as error:
+            (log.debug if error.errno == errno.EPIPE else log.error)(error)
+        finally:
+            socket.close()
+
+    def register(self, socket, handler, name=None, max_concurrency=None):
+        """Same as :meth:`listen` but runs the accept loop in a new
+        daemon thread, which is returned.
+
+        """
+        name = socket.getsockname() if name is None else name
+        self._get_metrics(name)
+        thread = threading.Thread(
+            name=str(name), target=self.listen,
+            args=(socket, handler, name, max_concurrency))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads after the queued connections are
+        handled, waiting for them to finish if *wait* is True. Further
+        connections are closed when accepted.
+
+        """
+        with self._lock:
+            self._shutdown = True
+            self._lock.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _get_metrics(self, name):
+        with self._lock:
+            return self.metrics.setdefault(name, ServiceMetrics(name))
+
+    def _dispatch(self, metrics, handler, client, slots):
+        with self._lock:
+            if self._shutdown:
+                log.debug("executor is shut down, closing connection")
+                client.close()
+                if slots:
+                    slots.release()
+                return
+            self._queue.append((metrics, handler, client, slots, time.time()))
+            metrics.accepted += 1
+            metrics.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            # A notified worker counts as idle until it runs, so start
+            # another one whenever the queue outgrows the idle workers.
+            if (len(self._queue) > self._idle and
+                    len(self._workers) < self.max_workers):
+                worker = threading.Thread(target=self._work)
+                worker.name = "llcp-service-worker-%d" % len(self._workers)
+                worker.daemon = True
+                self._workers.append(worker)
+                worker.start()
+            else:
+                self._lock.notify()
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not (self._queue or self._shutdown):
+                    self._idle += 1
+                    self._lock.wait()
+                    self._idle -= 1
+                if not self._queue:
+                    self._workers.remove(threading.current_thread())
+                    return
+                metrics, handler, client, slots, queued = \
+                    self._queue.popleft()
+                started = time.time()
+                metrics.queued -= 1
+                metrics.active += 1
+                metrics.wait_time += started - queued
+
+            failed = False
+            try:
+                handler(client)
+            except Exception:
+                log.exception("service %s handler failed", metrics.name)
+                failed = True
+            finally:
+                if slots:
+                    slots.release()
+                service_time = time.time() - started
+                with self._lock:
+                    metrics.active -= 1
+                    metrics.completed += 1
+                    metrics.failed += int(failed)
+                    metrics.service_time += service_time
+                    metrics.max_service_time = max(
+                        metrics.max_service_time, service_time)
+
+
+default = ServiceExecutor()
+"""The executor shared by the SNEP and Connection Handover servers."""
@@ -152,8 +152,15 @@ class ServiceAccessPoint(object):
                 if send_pdu:
                     return send_pdu
 
+    @property
+    def weight(self):
+        # The largest SO_SNDWGT value of the sockets bound to this SAP.
+        return max([socket.send_weight for socket in self.sock_list] or [1])
+
 
 class ServiceDiscovery(object):
+    addr, weight = 1, 1
+
     def __init__(self, llc):
         self.llc = llc
         self.snl = dict()
@@ -245,6 +252,80 @@ class ServiceDiscovery(object):
             self.resp.notify_all()
 
 
+class Scheduler(object):
+    """Deficit round robin selection of the service access point that
+    may send the next PDU. Each SAP in turn is given a quantum of
+    information field octets times its weight and sends PDUs for as
+    long as they fit into its deficit, up to one quantum of remaining
+    deficit is kept for the next turn. A SAP with nothing to send
+    loses its deficit.
+
+    """
+    class Statistics(object):
+        def __init__(self):
+            self.sent_count = 0
+            self.sent_octets = 0
+            self.delay = 0.0
+            self.max_delay = 0.0
+
+        @property
+        def mean_delay(self):
+            return self.delay / self.sent_count if self.sent_count else 0.0
+
+        def __str__(self):
+            return ("sent {0} PDU {1} byte queueing delay mean {2:.3f} "
+                    "max {3:.3f} sec".format(
+                        self.sent_count, self.sent_octets,
+                        self.mean_delay, self.max_delay))
+
+    def __init__(self):
+        self.current = None
+        self.deficit = collections.defaultdict(int)
+        self.stats = collections.defaultdict(Scheduler.Statistics)
+
+    def dequeue(self, saps, miu_size, icv_size, quantum):
+        # Return the next PDU from the list of SAPs, which is ordered
+        # by address, with an information field of at most miu_size
+        # octets. The SAP served last continues its turn, then every
+        # SAP starts a new turn until one of them returns a PDU.
+        if not saps:
+            return None
+        start = 0
+        if self.current is not None:
+            for index, sap in enumerate(saps):
+                if sap.addr >= self.current:
+                    start = index
+                    break
+        for index in range(len(saps) + 1):
+            sap = saps[(start + index) % len(saps)]
+            if index > 0 or sap.addr != self.current:
+                self.current = sap.addr
+                self.deficit[sap.addr] = (min(self.deficit[sap.addr], quantum)
+                                          + quantum * sap.weight)
+            deficit = self.deficit[sap.addr]
+            if deficit > 0 and miu_size > 0:
+                send_pdu = sap.dequeue(min(miu_size, deficit), icv_size)
+                if send_pdu:
+                    octets = self.account(sap.addr, send_pdu)
+                    self.deficit[sap.addr] -= octets
+                    return send_pdu
+                if miu_size >= quantum and deficit >= miu_size:
+                    self.deficit[sap.addr] = 0
+
+    def account(self, addr, send_pdu):
+        # Record a PDU sent from addr and return the number of octets
+        # in its information field.
+        octets = len(send_pdu) - send_pdu.header_size
+        stats = self.stats[addr]
+        stats.sent_count += 1
+        stats.sent_octets += octets
+        if hasattr(send_pdu, "queued"):
+            delay = time.time() - send_pdu.queued
+            stats.delay += delay
+            stats.max_delay = max(stats.max_delay, delay)
+        return octets
+
+
 class LogicalLinkController(object):
     class LinkState(object):
         def __init__(self):
@@ -287,6 +368,7 @@ class LogicalLinkController(object):
     def __init__(self, **options):
         self.pcnt = LogicalLinkController.Counter()
         self.link = LogicalLinkController.LinkState()
+        self.scheduler = Scheduler()
         self.lock = threading.RLock()
         self.cfg = dict()
         self.cfg['recv-miu'] = options.get('miu', 248)
@@ -296,6 +378,9 @@ class LogicalLinkController(object):
         self.cfg['llcp-sec'] = options.get('sec', True)
         if not sec.OpenSSL:
             self.cfg['llcp-sec'] = False
+        if self.cfg['llcp-sec']:
+            # Generate ephemeral keys before the link gets activated.
+            sec.key_pool.start()
         log.debug("llc cfg {0}".format(self.cfg))
         self.sec = None
         self.snl = dict({"urn:nfc:sn:sdp": 1})
@@ -578,24 +663,29 @@ class LogicalLinkController(object):
         send_pdu = None
 
         with self.lock:
-            # Dequeue from the list of active SAP until a first PDU is
-            # returned. The list is sorted to first iterate the raw
-            # SAPs (raw SAPs do not respect the miu_size value and we
-            # must avoid them to return PDUs in aggregation). The PDU
-            # is returned straight if it fills or exceeds the Link
-            # MIU. Otherwise the loop terminates at this point. The
-            # sap.dequeue method is called with icv_size=0 because for
-            # encrypted but not aggregated UI and I PDUs the receiver
-            # must accept them with complete MIU plus ICV size.
-            for sap in sorted(filter(None, self.sap), reverse=True,
-                              key=lambda sap: sap.mode == RAW_ACCESS_POINT):
-                send_pdu = sap.dequeue(miu_size, icv_size=0)
-                if send_pdu:
-                    if self.sec and send_pdu.name in ("UI", "I"):
-                        send_pdu = encrypt(send_pdu)
-                    if len(send_pdu) - send_pdu.header_size >= miu_size:
-                        return send_pdu
-                    break
+            # Raw SAPs are served first because they do not respect
+            # the miu_size value and we must avoid them to return PDUs
+            # in aggregation. All other SAPs are then served by the
+            # deficit round robin scheduler. The PDU is returned
+            # straight if it fills or exceeds the Link MIU. The first
+            # dequeue is done with icv_size=0 because for encrypted but
+            # not aggregated UI and I PDUs the receiver must accept
+            # them with complete MIU plus ICV size.
+            saps = filter(None, self.sap)
+            for sap in saps:
+                if sap.mode == RAW_ACCESS_POINT:
+                    send_pdu = sap.dequeue(miu_size, icv_size=0)
+                    if send_pdu:
+                        self.scheduler.account(sap.addr, send_pdu)
+                        break
+            saps = [sap for sap in saps if sap.mode != RAW_ACCESS_POINT]
+            if send_pdu is None:
+                send_pdu = self.scheduler.dequeue(saps, miu_size, 0, miu_size)
+            if send_pdu:
+                if self.sec and send_pdu.name in ("UI", "I"):
+                    send_pdu = encrypt(send_pdu)
+                if len(send_pdu) - send_pdu.header_size >= miu_size:
+                    return send_pdu
 
             # Data Link Connection endpoints do not dequeue RR/RNR PDUs until
             # the receive window is exhausted. If there is not yet a PDU to
@@ -613,25 +703,22 @@ class LogicalLinkController(object):
                 return send_pdu
 
             # We have one PDU to send and aggregation is enabled. We'll see if
-            # there are more outbound PDUs and collect them into an AGF PDU.
-            agf_pdu = pdu.AggregatedFrame(0, 0, [send_pdu])
+            # there are more outbound PDUs and collect them into an AGF PDU,
+            # in the order given by the scheduler until the remaining
+            # miu_size is exhausted or no SAP returns a PDU. Aggregated
+            # PDUs are encoded into a buffer once a second PDU is added.
+            agf_pdu = pdu.AggregatedFrame(
+                0, 0, [send_pdu], size=2 + self.cfg["send-miu"])
             miu_size = self.cfg["send-miu"] - len(agf_pdu) - 3
-            while True:
-                # The first loop will dequeue PDUs until the reamining miu_size
-                # is exhausted or all active SAP did not return a PDU.
-                deq_none = True
-                for sap in filter(None, self.sap):
-                    send_pdu = sap.dequeue(miu_size, icv_size)
-                    if send_pdu:
-                        deq_none = False
-                        if self.sec and send_pdu.name in ("UI", "I"):
-                            send_pdu = encrypt(send_pdu)
-                        agf_pdu.append(send_pdu)
-                        miu_size = self.cfg["send-miu"] - len(agf_pdu) - 3
-                        if miu_size < 0:
-                            break
-                if miu_size < 0 or deq_none:
+            while miu_size >= 0:
+                send_pdu = self.scheduler.dequeue(
+                    saps, miu_size, icv_size, self.cfg["send-miu"])
+                if send_pdu is None:
                     break
+                if self.sec and send_pdu.name in ("UI", "I"):
+                    send_pdu = encrypt(send_pdu)
+                agf_pdu.append(send_pdu)
+                miu_size = self.cfg["send-miu"] - len(agf_pdu) - 3
             # If the miu_size is not yet exhausted we query all data link
             # connection endpoints once for voluntary acknowledgements.
             if miu_size >= 0:
@@ -838,10 +925,26 @@ class LogicalLinkController(object):
         if isinstance(socket, tco.DataLinkConnection):
             return socket.send(message, flags)
 
+    def sendmsg(self, socket, buffers, flags):
+        if not isinstance(socket, tco.TransmissionControlObject):
+            raise err.Error(errno.ENOTSOCK)
+        if not isinstance(socket, tco.DataLinkConnection):
+            raise err.Error(errno.EOPNOTSUPP)
+        return socket.sendmsg(buffers, flags)
+
     def recv(self, socket):
         message, sender = self.recvfrom(socket)
         return message
 
+    def recv_into(self, socket, buffer, nbytes):
+        if not isinstance(socket, tco.TransmissionControlObject):
+            raise err.Error(errno.ENOTSOCK)
+        if not (socket.addr and self.sap[socket.addr]):
+            raise err.Error(errno.EBADF)
+        if isinstance(socket, tco.RawAccessPoint):
+            raise err.Error(errno.EOPNOTSUPP)
+        return socket.recv_into(buffer, nbytes)
+
     def recvfrom(self, socket):
         if not isinstance(socket, tco.TransmissionControlObject):
             raise err.Error(errno.ENOTSOCK)
@@ -389,11 +389,27 @@ class ParameterExchange(ProtocolDataUnit):
 #                                                          Aggregated Frame PDU
 # -----------------------------------------------------------------------------
 class AggregatedFrame(ProtocolDataUnit):
+    """The encoded length of an AGF PDU is maintained as PDUs are
+    appended, so that :func:`len` does not visit the aggregate. If
+    *size* is given, appended PDUs are also encoded into a buffer of
+    *size* octets, and :meth:`encode` then returns a single copy of
+    that buffer. The buffer is allocated when the second PDU is
+    appended, a single PDU is usually sent without the AGF. The
+    aggregated PDUs must not be modified after they were encoded. If
+    the buffer is too small for a PDU it is dropped and :meth:`encode`
+    falls back to encoding the aggregate.
+
+    """
     name = "AGF"
 
-    def __init__(self, dsap=0, ssap=0, aggregate=[]):
+    def __init__(self, dsap=0, ssap=0, aggregate=[], size=None):
         super(AggregatedFrame, self).__init__(0b0010, dsap, ssap)
-        self._aggregate = aggregate[:]
+        self._aggregate = []
+        self._length = 2
+        self._size = size
+        self._buffer = None
+        for pdu in aggregate:
+            self.append(pdu)
 
     @classmethod
     def decode(cls, data, offset, size):
@@ -415,12 +431,31 @@ class AggregatedFrame(ProtocolDataUnit):
         if self.dsap != 0 or self.ssap != 0:
             raise EncodeError("SSAP and DSAP must be 0 in AGF PDU")
         data = self.encode_header()
+        if self._buffer is not None:
+            self._buffer[0:2] = data
+            return memoryview(self._buffer)[0:self._length].tobytes()
         for encoded_pdu in [pdu.encode() for pdu in self._aggregate]:
             data += struct.pack('!H', len(encoded_pdu)) + encoded_pdu
         return data
 
     def append(self, pdu):
         self._aggregate.append(pdu)
+        if self._size is None or len(self._aggregate) < 2:
+            self._length += 2 + len(pdu)
+            return
+        if self._buffer is None:
+            self._buffer = bytearray(self._size)
+            self._length, pending = 2, self._aggregate
+        else:
+            pending = [pdu]
+        for encoded_pdu in [p.encode() for p in pending]:
+            offset, size = self._length, 2 + len(encoded_pdu)
+            if self._buffer is not None and offset+size <= self._size:
+                struct.pack_into('!H', self._buffer, offset, size - 2)
+                self._buffer[offset+2:offset+size] = encoded_pdu
+            else:
+                self._size = self._buffer = None
+            self._length += size
 
     @property
     def count(self):
@@ -431,7 +466,7 @@ class AggregatedFrame(ProtocolDataUnit):
         return self._aggregate[0]
 
     def __len__(self):
-        return 2 + sum([2+len(pdu) for pdu in self._aggregate])
+        return self._length
 
     def __str__(self):
         def s(p):
@@ -22,6 +22,8 @@
 import sys
 import struct
 import ctypes
+import threading
+import collections
 import ctypes.util
 from ctypes import c_void_p, c_int
 from binascii import hexlify
@@ -31,6 +33,11 @@ log = logging.getLogger(__name__)
 
 OpenSSL = None
 
+# OpenSSL 1.0 is not thread safe without locking callbacks, which can
+# not be installed from Python. Key generation runs in the KeyPool
+# thread, so all libcrypto operations are serialized with this lock.
+libcrypto_lock = threading.RLock()
+
 
 class Error(Exception):
     pass
@@ -50,7 +57,108 @@ class KeyAgreementError(Error):
 
 def cipher_suite(name):
     if name == "ECDH_anon_WITH_AEAD_AES_128_CCM_4":
-        return CipherSuite1()
+        return CipherSuite1(key_pool.get())
+
+
+def generate_key():
+    """Generate an ephemeral P-256 key pair and an 8 byte random
+    nonce. Returns a tuple (ec_key, public_key_x, public_key_y,
+    random_nonce) or None if the key could not be generated.
+
+    """
+    with libcrypto_lock:
+        ec_key = OpenSSL.EC_KEY.new_by_curve_name(
+            OpenSSL.NID_X9_62_prime256v1)
+        if ec_key and ec_key.generate_key() and ec_key.check_key():
+            pubkey = ec_key.get_public_key()
+            x, y = pubkey.get_affine_coordinates_GFp(ec_key.get_group())
+            return (ec_key, x, y, OpenSSL.rand_bytes(8))
+
+
+class KeyPool(object):
+    """A pool of ephemeral key pairs and random nonces that are
+    generated by :func:`generate_key` in a background thread, so
+    that link activation does not wait for key generation. Each key
+    is given out only once. The thread is started with :meth:`start`
+    and generates keys until the pool holds *size* keys, it then
+    sleeps until no more than *refill* keys are left. A *size* of
+    zero disables the pool and :meth:`get` always returns None.
+
+    """
+    def __init__(self, size=2, refill=1):
+        self.size = size
+        self.refill = refill
+        self._keys = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def start(self):
+        """Start the background thread if it is not running, or wake it
+        up to apply changes of *size* and *refill*."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nfc.llcp.sec.KeyPool")
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+
+    def stop(self):
+        """Stop the background thread and discard all pooled keys."""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._keys.clear()
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def get(self):
+        """Return the next pooled key or None if the pool is empty."""
+        with self._cond:
+            try:
+                return self._keys.popleft()
+            except IndexError:
+                return None
+            finally:
+                self._cond.notify()
+
+    def _run(self):
+        this = threading.current_thread()
+        filling = True
+        while True:
+            with self._cond:
+                while self._thread is this:
+                    if len(self._keys) >= self.size:
+                        filling = False
+                    elif len(self._keys) <= self.refill:
+                        filling = True
+                    if filling:
+                        break
+                    self._cond.wait()
+                if self._thread is not this:
+                    return
+            try:
+                key = generate_key()
+            except Exception:
+                log.exception("failed to generate a key for the pool")
+                key = None
+            else:
+                if key is None:
+                    log.error("failed to generate a key for the pool")
+            if key is None:
+                with self._cond:
+                    if self._thread is this:
+                        self._thread = None
+                return
+            with self._cond:
+                if self._thread is this and len(self._keys) < self.size:
+                    self._keys.append(key)
+
+
+key_pool = KeyPool()
 
 
 class CipherSuite1:
@@ -58,17 +166,17 @@ class CipherSuite1:
     _ccm_q = 2
     _ccm_n = 13
 
-    def __init__(self):
+    def __init__(self, key=None):
         self.random_nonce = None
         self.public_key_x = None
         self.public_key_y = None
-        ec_key = OpenSSL.EC_KEY.new_by_curve_name(OpenSSL.NID_X9_62_prime256v1)
-        if ec_key and ec_key.generate_key() and ec_key.check_key():
-            pubkey = ec_key.get_public_key()
-            x, y = pubkey.get_affine_coordinates_GFp(ec_key.get_group())
+        if key is None:
+            key = generate_key()
+        if key is not None:
+            ec_key, x, y, nonce = key
             self.public_key_x = x
             self.public_key_y = y
-            self.random_nonce = OpenSSL.rand_bytes(8)
+            self.random_nonce = nonce
             self._ec_key = ec_key
 
     def calculate_session_key(self, ecpk, rn_i=None, rn_t=None):
@@ -88,18 +196,20 @@ class CipherSuite1:
         if rn_t is None:
             rn_t = self.random_nonce
 
-        ec_key = OpenSSL.EC_KEY.new_by_curve_name(OpenSSL.NID_X9_62_prime256v1)
-        try:
-            ec_key.set_public_key_affine_coordinates(ecpk[:32], ecpk[32:])
-        except AssertionError:
-            raise KeyAgreementError("remote public key is not on curve")
-
-        cipher = OpenSSL.EVP_aes_128_cbc()
-        secret = OpenSSL.ECDH(self._ec_key) \
-                        .compute_key(ec_key.get_public_key())
-        k_encr = OpenSSL.CMAC(cipher) \
-                        .init(rn_i+rn_t) \
-                        .update(secret).final()
+        with libcrypto_lock:
+            ec_key = OpenSSL.EC_KEY.new_by_curve_name(
+                OpenSSL.NID_X9_62_prime256v1)
+            try:
+                ec_key.set_public_key_affine_coordinates(ecpk[:32], ecpk[32:])
+            except AssertionError:
+                raise KeyAgreementError("remote public key is not on curve")
+
+            cipher = OpenSSL.EVP_aes_128_cbc()
+            secret = OpenSSL.ECDH(self._ec_key) \
+                            .compute_key(ec_key.get_public_key())
+            k_encr = OpenSSL.CMAC(cipher) \
+                            .init(rn_i+rn_t) \
+                            .update(secret).final()
 
         log.debug("remote ecpk-x %r", hexlify(ecpk[:32]))
         log.debug("remote ecpk-y %r", hexlify(ecpk[32:]))
@@ -130,7 +240,9 @@ class CipherSuite1:
         # OpenSSLWrapper methods raise AssertionError when any of the
         # operations failed.
         try:
-            return self._encrypt(bytes(a), bytes(p), key, nonce, self._ccm_t)
+            with libcrypto_lock:
+                return self._encrypt(
+                    bytes(a), bytes(p), key, nonce, self._ccm_t)
         except AssertionError:
             error = "encrypt failed for message %d" % self._pcs
             log.error(error)
@@ -166,7 +278,9 @@ class CipherSuite1:
         # OpenSSLWrapper methods raise AssertionError when any of the
         # operations failed.
         try:
-            return self._decrypt(bytes(a), bytes(c), key, nonce, self._ccm_t)
+            with libcrypto_lock:
+                return self._decrypt(
+                    bytes(a), bytes(c), key, nonce, self._ccm_t)
         except AssertionError:
             error = "decrypt failed for message %d" % self._pcr
             log.error(error)
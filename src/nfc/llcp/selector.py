@@ -0,0 +1,151 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Wait for many LLCP sockets in one thread. A :class:`Selector` holds
+sockets that are registered with the events they shall be watched
+for, :meth:`Selector.select` then blocks until one or more of them
+are ready. The events are the same as for :meth:`nfc.llcp.Socket.poll`:
+"recv" is ready when a :meth:`~nfc.llcp.Socket.recv` (or
+:meth:`~nfc.llcp.Socket.accept` on a listening socket) would not
+block, "send" when a :meth:`~nfc.llcp.Socket.send` would not need to
+wait for the send queue or window, and "acks" when acknowledgements
+were received on a data link connection. A closed socket is always
+ready, the next call on it fails. ::
+
+    selector = nfc.llcp.Selector()
+    selector.register(server_socket, ["recv"])
+    while True:
+        for socket, events in selector.select():
+            if socket is server_socket:
+                selector.register(socket.accept(), ["recv"])
+            else:
+                data = socket.recv()
+                if data is None:
+                    selector.unregister(socket)
+                    socket.close()
+
+The sockets signal readiness changes to all selectors that they are
+registered with through each selector's single condition variable,
+a thread does not spend more than a list walk over the registered
+sockets for each wakeup.
+
+"""
+from . import err
+
+import time
+import errno
+import threading
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class Selector(object):
+    """Readiness selection over many :class:`nfc.llcp.Socket` objects.
+    """
+    EVENTS = ("recv", "send", "acks")
+
+    def __init__(self):
+        self._sockets = dict()
+        self._changed = False
+        self._interrupted = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._sockets)
+
+    def register(self, socket, events):
+        """Watch *socket* for the *events* given as a sequence of the
+        strings "recv", "send" and "acks". The "acks" event is only
+        supported by data link connection sockets. A socket that is
+        already registered is watched for the new *events*.
+
+        """
+        if not events or any(event not in self.EVENTS for event in events):
+            raise err.Error(errno.EINVAL)
+        events = tuple(event for event in self.EVENTS if event in events)
+        tco = socket._tco
+        with tco.lock:
+            for event in events:
+                tco.ready(event)  # raises EINVAL if not supported
+            tco.selectors.add(self)
+        with self._condition:
+            self._sockets[socket] = events
+        self.wakeup()
+
+    def unregister(self, socket):
+        """Stop watching *socket*. Unregistering a socket that is not
+        registered raises :exc:`KeyError`."""
+        with self._condition:
+            del self._sockets[socket]
+        with socket._tco.lock:
+            socket._tco.selectors.discard(self)
+
+    def select(self, timeout=None):
+        """Wait until at least one registered socket is ready. Returns
+        a list of (socket, events) tuples where events are the ready
+        events of socket. The list is empty if *timeout* seconds have
+        passed without any socket becoming ready or if the wait was
+        ended with :meth:`interrupt`.
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._condition:
+                self._changed = False
+                sockets = list(self._sockets.items())
+            ready = []
+            for socket, events in sockets:
+                with socket._tco.lock:
+                    events = tuple(e for e in events if socket._tco.ready(e))
+                if events:
+                    ready.append((socket, events))
+            with self._condition:
+                if not (ready or self._changed or self._interrupted):
+                    if deadline is None:
+                        self._condition.wait()
+                    elif deadline > time.time():
+                        self._condition.wait(deadline - time.time())
+                if ready or self._interrupted:
+                    self._interrupted = False
+                    return ready
+                if deadline is not None and time.time() >= deadline:
+                    return ready
+
+    def wakeup(self):
+        """Have a waiting :meth:`select` look at the sockets again. This
+        is called by the registered sockets when they may have become
+        ready."""
+        with self._condition:
+            self._changed = True
+            self._condition.notify_all()
+
+    def interrupt(self):
+        """End a waiting :meth:`select` from another thread, it returns
+        the sockets that are ready or an empty list."""
+        with self._condition:
+            self._interrupted = True
+            self._condition.notify_all()
+
+    def close(self):
+        """Unregister all sockets."""
+        for socket in list(self._sockets):
+            self.unregister(socket)
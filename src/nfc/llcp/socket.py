@@ -125,6 +125,30 @@ class Socket(object):
         the socket was closed."""
         return self.llc.sendto(self._tco, data, addr, flags)
 
+    def sendall(self, data, flags=0):
+        """Send all *data* to the socket. The socket must be a
+        connected data link connection socket. Unlike :meth:`send`
+        the data may be larger than the remote maximum information
+        unit size, it is sent as a sequence of information units of
+        up to that size. Returns a boolean value that indicates
+        success or failure like :meth:`send`.
+
+        """
+        return self.llc.sendmsg(self._tco, [data], flags)
+
+    def sendmsg(self, buffers, flags=0):
+        """Send the concatenated data of all *buffers*, a sequence of
+        byte strings, bytearrays or memoryviews, to the socket. The
+        data is sent like with :meth:`sendall` but without joining
+        the buffers first, only information units that span buffers
+        are joined from their parts. With :data:`MSG_DONTWAIT` either
+        all data is queued or none, :exc:`~nfc.llcp.Error` is raised
+        with EWOULDBLOCK if the send window is too busy and with
+        EMSGSIZE if the data would never fit into the send window.
+
+        """
+        return self.llc.sendmsg(self._tco, buffers, flags)
+
     def recv(self):
         """Receive data from the socket. The return value is a string
         representing the data received. The maximum amount of data
@@ -132,6 +156,19 @@ class Socket(object):
         maximum information unit size."""
         return self.llc.recv(self._tco)
 
+    def recv_into(self, buffer, nbytes=0):
+        """Receive data from the socket into *buffer*, a writable
+        bytearray or memoryview. The information unit dequeued from a
+        logical data link or data link connection is copied into the
+        buffer without creating an intermediate string. At most
+        *nbytes* are stored, or the size of *buffer* if *nbytes* is
+        zero. The remaining octets of a larger information unit are
+        discarded and logged as a warning, message boundaries are
+        preserved. The return value is the number of bytes stored or
+        None if nothing could be received because the socket or
+        connection was closed."""
+        return self.llc.recv_into(self._tco, buffer, nbytes)
+
     def recvfrom(self):
         """Receive data from the socket. The return value is a pair
         (string, address) where string is a string representing the
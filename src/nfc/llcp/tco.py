@@ -23,6 +23,7 @@ from . import pdu
 from . import err
 import nfc.llcp
 
+import time
 import errno
 import threading
 import collections
@@ -31,6 +32,33 @@ import logging
 log = logging.getLogger(__name__)
 
 
+def fragments(buffers, size):
+    # Yield the octets of all buffers as fragments of size octets, the
+    # last fragment may be shorter. Buffers are walked as memoryviews
+    # so that only the fragment octets are copied, a fragment that
+    # spans buffers is joined from its pieces.
+    pieces, count = [], 0
+    for buffer in buffers:
+        view = memoryview(buffer)
+        offset = 0
+        if pieces:
+            offset = min(size - count, len(view))
+            pieces.append(view[0:offset].tobytes())
+            count += offset
+            if count < size:
+                continue
+            yield b"".join(pieces)
+            pieces, count = [], 0
+        while len(view) - offset >= size:
+            yield view[offset:offset+size].tobytes()
+            offset += size
+        if offset < len(view):
+            pieces.append(view[offset:].tobytes())
+            count = len(view) - offset
+    if pieces:
+        yield b"".join(pieces)
+
+
 class TransmissionControlObject(object):
     class State(object):
         def __init__(self):
@@ -68,10 +96,12 @@ class TransmissionControlObject(object):
         self.recv_queue = collections.deque()
         self.send_ready = threading.Condition(self.lock)
         self.recv_ready = threading.Condition(self.lock)
+        self.selectors = set()
         self.recv_miu = recv_miu
         self.send_miu = send_miu
         self.recv_buf = 1
         self.send_buf = 1
+        self.send_weight = 1
         self.addr = None
         self.peer = None
 
@@ -87,6 +117,9 @@ class TransmissionControlObject(object):
         elif option == nfc.llcp.SO_RCVBUF:
             with self.lock:
                 self.recv_buf = int(value)
+        elif option == nfc.llcp.SO_SNDWGT:
+            with self.lock:
+                self.send_weight = min(max(int(value), 1), 255)
         else:
             raise ValueError("invalid option value")
 
@@ -99,6 +132,8 @@ class TransmissionControlObject(object):
             return self.send_buf
         if option == nfc.llcp.SO_RCVBUF:
             return self.recv_buf
+        if option == nfc.llcp.SO_SNDWGT:
+            return self.send_weight
 
     def bind(self, addr):
         if self.addr and addr and self.addr != addr:
@@ -120,8 +155,27 @@ class TransmissionControlObject(object):
                     self.send_ready.wait(timeout)
                 return len(self.send_queue) < self.send_buf
 
+    def ready(self, event):
+        # Return whether a recv() or send() would not block, without
+        # waiting. Called by a selector with the lock held.
+        if self.state.SHUTDOWN:
+            return True
+        if event == "recv":
+            return len(self.recv_queue) > 0
+        if event == "send":
+            return len(self.send_queue) < self.send_buf
+        raise err.Error(errno.EINVAL)
+
+    def wakeup(self):
+        # Called with the lock held when the socket may have become
+        # ready, wakes up all selectors that the socket is registered
+        # with.
+        for selector in self.selectors:
+            selector.wakeup()
+
     def send(self, send_pdu, flags):
         with self.send_ready:
+            send_pdu.queued = time.time()
             self.send_queue.append(send_pdu)
             if not (flags & nfc.llcp.MSG_DONTWAIT):
                 self.send_ready.wait()
@@ -134,6 +188,20 @@ class TransmissionControlObject(object):
                 self.recv_ready.wait()
             return self.recv_queue.popleft()
 
+    def store(self, data, buffer, nbytes):
+        # Copy a received information unit into *buffer*, at most
+        # *nbytes* or len(buffer) octets. Octets that do not fit are
+        # discarded and logged, an LLCP socket preserves the message
+        # boundaries and has no place to keep them.
+        count = min(len(data), nbytes or len(buffer), len(buffer))
+        if count == len(data):
+            buffer[0:count] = data
+        else:
+            buffer[0:count] = memoryview(data)[0:count]
+            log.warn("{0} discarded {1} of {2} received octets"
+                     .format(self, len(data) - count, len(data)))
+        return count
+
     def close(self):
         with self.lock:
             self.send_queue.clear()
@@ -141,6 +209,7 @@ class TransmissionControlObject(object):
             self.send_ready.notify_all()
             self.recv_ready.notify_all()
             self.state.SHUTDOWN = True
+            self.wakeup()
 
     #
     # enqueue() and dequeue() are called from llc run thread
@@ -151,6 +220,7 @@ class TransmissionControlObject(object):
                 log.debug("enqueue {0}".format(rcvd_pdu))
                 self.recv_queue.append(rcvd_pdu)
                 self.recv_ready.notify()
+                self.wakeup()
                 return True
             else:
                 log.warn("discard {0}".format(rcvd_pdu))
@@ -184,6 +254,7 @@ class TransmissionControlObject(object):
 
             if notify is True:
                 self.send_ready.notify()
+                self.wakeup()
 
             return send_pdu
 
@@ -309,6 +380,10 @@ class LogicalDataLink(TransmissionControlObject):
             raise err.Error(errno.EPIPE)
         return (rcvd_pdu.data, rcvd_pdu.ssap) if rcvd_pdu else (None, None)
 
+    def recv_into(self, buffer, nbytes):
+        data, addr = self.recvfrom()
+        return self.store(data, buffer, nbytes) if data is not None else None
+
     def close(self):
         super(LogicalDataLink, self).close()
 
@@ -512,6 +587,47 @@ class DataLinkConnection(TransmissionControlObject):
                 super(DataLinkConnection, self).send(send_pdu, flags)
             return self.state.ESTABLISHED is True
 
+    def sendmsg(self, buffers, flags):
+        # Send the octets of all buffers as I PDUs of up to send_miu
+        # octets. The PDUs are queued under one lock acquisition as far
+        # as the send window permits, the lock is only released while
+        # waiting for the window to open or the queue to be sent. With
+        # MSG_DONTWAIT nothing is queued unless all PDUs fit into the
+        # send window, a partly sent message could not be resumed.
+        with self.send_token:
+            if not self.state.ESTABLISHED:
+                self.err("sendmsg() in socket state {0}".format(self.state))
+                if self.state.CLOSE_WAIT:
+                    raise err.Error(errno.EPIPE)
+                raise err.Error(errno.ENOTCONN)
+            if flags & nfc.llcp.MSG_DONTWAIT:
+                buffers = list(buffers)
+                size = sum(len(memoryview(buffer)) for buffer in buffers)
+                count = (size + self.send_miu - 1) // self.send_miu
+                if count > self.send_win:
+                    raise err.Error(errno.EMSGSIZE)
+                if count > self.send_window_slots:
+                    raise err.Error(errno.EWOULDBLOCK)
+            sent = 0
+            for data in fragments(buffers, self.send_miu):
+                while self.send_window_slots == 0 and self.state.ESTABLISHED:
+                    self.log("waiting on busy send window")
+                    self.send_token.wait()
+                if not self.state.ESTABLISHED:
+                    break
+                send_pdu = pdu.Information(self.peer, self.addr, data=data)
+                send_pdu.ns = self.send_cnt
+                send_pdu.queued = time.time()
+                self.send_cnt = (self.send_cnt + 1) % 16
+                self.send_queue.append(send_pdu)
+                sent += len(data)
+            self.log("sendmsg {0} byte on {1}".format(sent, str(self)))
+            if not (flags & nfc.llcp.MSG_DONTWAIT):
+                while self.state.ESTABLISHED and any(
+                        send_pdu.name == "I" for send_pdu in self.send_queue):
+                    self.send_ready.wait()
+            return self.state.ESTABLISHED is True
+
     def recv(self):
         with self.lock:
             if not (self.state.ESTABLISHED or self.state.CLOSE_WAIT):
@@ -537,6 +653,10 @@ class DataLinkConnection(TransmissionControlObject):
 
             raise RuntimeError("only I or DISC expected, not " + rcvd_pdu.name)
 
+    def recv_into(self, buffer, nbytes):
+        data = self.recv()
+        return self.store(data, buffer, nbytes) if data is not None else None
+
     def poll(self, event, timeout):
         if self.state.SHUTDOWN:
             raise err.Error(errno.ESHUTDOWN)
@@ -562,6 +682,26 @@ class DataLinkConnection(TransmissionControlObject):
         else:
             raise err.Error(errno.EINVAL)
 
+    def ready(self, event):
+        # A listening socket is ready to accept with a CONNECT in the
+        # receive queue. The "acks" event does not consume a received
+        # acknowledgement, this is left to poll().
+        if event not in ("recv", "send", "acks"):
+            raise err.Error(errno.EINVAL)
+        if self.state.CONNECT or self.state.DISCONNECT:
+            return False
+        if not (self.state.ESTABLISHED or self.state.CLOSE_WAIT or
+                self.state.LISTEN):
+            return True
+        if event == "recv":
+            return len(self.recv_queue) > 0
+        if not self.state.ESTABLISHED:
+            return True
+        if event == "send":
+            return (self.send_window_slots > 0 and
+                    len(self.send_queue) < self.send_buf)
+        return self.acks_recvd > 0
+
     def close(self):
         with self.lock:
             self.log("close()")
@@ -641,6 +781,8 @@ class DataLinkConnection(TransmissionControlObject):
                 self.send_queue.clear()
                 self.send_queue.append(pdu.DisconnectedMode(
                     self.peer, self.addr, reason=0))
+                self.send_ready.notify_all()
+                self.wakeup()
             return
 
         if rcvd_pdu.name in ("I", "RR", "RNR"):
@@ -652,6 +794,7 @@ class DataLinkConnection(TransmissionControlObject):
                     self.acks_ready.notify_all()
                     self.send_token.notify()
                     self.send_ack = rcvd_pdu.nr  # V(SA) := N(R)
+                    self.wakeup()
                 if rcvd_pdu.name == "RNR":
                     self.mode.SEND_BUSY = True
                 if rcvd_pdu.name == "RR":
@@ -688,12 +831,14 @@ class DataLinkConnection(TransmissionControlObject):
                         self.recv_confs = 0
                     send_pdu.nr = self.recv_ack
                     self.send_ready.notify()
+                    self.wakeup()
 
                 if send_pdu.name == "DM" and self.state.CLOSE_WAIT:
                     self.recv_queue.append(pdu.Disconnect(
                         dsap=self.peer, ssap=self.addr))
                     self.recv_ready.notify()
                     self.send_token.notify_all()
+                    self.wakeup()
 
             else:
                 if ((self.state.ESTABLISHED and self.recv_confs
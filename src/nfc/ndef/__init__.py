@@ -29,6 +29,7 @@ records and messages.
 
 from nfc.ndef.error import *
 from nfc.ndef.message import Message
+from nfc.ndef.message import MessageFramer
 from nfc.ndef.record import Record
 from nfc.ndef.text_record import TextRecord
 from nfc.ndef.uri_record import UriRecord
@@ -27,6 +27,7 @@ log = logging.getLogger(__name__)
 
 import io
 import copy
+import struct
 import nfc.ndef
 
 class Message(object):
@@ -172,3 +173,80 @@ class Message(object):
         lines = [" = ".join(line) for line in lines]
         return ("\n").join([line for line in lines])
         
+
+
+class MessageFramer(object):
+    """Finds the end of an NDEF message in data that is received in
+    fragments, for example from an LLCP data link connection. Each
+    fragment is given to :meth:`feed` only once. The framer tracks the
+    record headers and skips over type, id and payload octets by
+    their length, so that the work per fragment does not depend on
+    the octets received before. The data is not stored, it remains
+    with the caller to be parsed once the message is :attr:`complete`.
+
+    >>> framer = nfc.ndef.MessageFramer()
+    >>> data = bytearray()
+    >>> while not framer.complete:
+    ...     fragment = socket.recv()
+    ...     data += fragment[0:framer.feed(fragment)]
+    >>> message = nfc.ndef.Message(data)
+
+    A :exc:`nfc.ndef.FormatError` is raised if the message begin flag
+    is not set in the first record header.
+    """
+    def __init__(self):
+        self.offset = 0
+        self.length = None
+        self.records = 0
+        self._header = bytearray()
+        self._skip = 0
+
+    @property
+    def complete(self):
+        """True when all octets of the message were fed."""
+        return self.length is not None and self.offset == self.length
+
+    def feed(self, data):
+        """Consume the octets of *data*, a str, bytearray or memoryview.
+        Returns the number of octets that belong to the message, which
+        is less than ``len(data)`` only if the message ends within
+        *data*."""
+        data = memoryview(data)
+        size, index = len(data), 0
+        while index < size and not self.complete:
+            if self._skip:
+                count = min(self._skip, size - index)
+                self._skip -= count
+                self.offset += count
+            else:
+                count = min(self._header_size() - len(self._header),
+                            size - index)
+                self._header += data[index:index+count].tobytes()
+                self.offset += count
+                if len(self._header) == self._header_size():
+                    self._parse_header()
+            index += count
+        return index
+
+    def _header_size(self):
+        # The header size is known after flags and type length octet.
+        if len(self._header) < 2:
+            return 2
+        flags = self._header[0]
+        return 2 + (1 if flags & 0x10 else 4) + (1 if flags & 0x08 else 0)
+
+    def _parse_header(self):
+        header, self._header = self._header, bytearray()
+        flags = header[0]
+        if self.records == 0 and not flags & 0x80:
+            log.error("message begin flag not set at begin of ndef")
+            raise nfc.ndef.FormatError("message begin flag not set")
+        if flags & 0x10:
+            payload_length = header[2]
+        else:
+            payload_length = struct.unpack_from(">L", bytes(header), 2)[0]
+        id_length = header[-1] if flags & 0x08 else 0
+        self._skip = header[1] + id_length + payload_length
+        self.records += 1
+        if flags & 0x40:
+            self.length = self.offset + self._skip
@@ -40,11 +40,50 @@ def send_request(socket, snep_request, send_miu):
     if socket.recv() != b"\x10\x80\x00\x00\x00\x00":
         return False
 
-    for offset in xrange(send_miu, len(snep_request), send_miu):
-        fragment = snep_request[offset:offset+send_miu]
-        if not socket.send(fragment):
-            return False
+    return socket.sendall(memoryview(snep_request)[send_miu:])
+
+
+def iter_fragments(stream, first_size, size, length):
+    # Yield *length* bytes read from a file-like object or an iterable
+    # of byte strings as fragments of *first_size* and then *size*
+    # bytes, the last fragment may be shorter. The last fragment is
+    # held back until the stream is exhausted, so that ValueError is
+    # raised before it is sent if the stream is longer or shorter.
+    if hasattr(stream, "read"):
+        chunks = iter(lambda: stream.read(size), b"")
+    else:
+        chunks = iter(stream)
+    pending, fragment_size, remaining = bytearray(), first_size, length
+    for data in chunks:
+        pending += data
+        if len(pending) > remaining:
+            raise ValueError("stream data exceeds the message length")
+        while fragment_size < remaining and len(pending) >= fragment_size:
+            yield bytes(pending[0:fragment_size])
+            del pending[0:fragment_size]
+            remaining -= fragment_size
+            fragment_size = size
+    if len(pending) < remaining:
+        raise ValueError("stream data is shorter than the message length")
+    if pending:
+        yield bytes(pending)
+
+
+def send_request_stream(socket, snep_header, stream, length, send_miu):
+    fragments = iter_fragments(
+        stream, send_miu - len(snep_header), send_miu, length)
+    fragment = next(fragments, b"")
+    if not socket.send(snep_header + fragment):
+        return False
 
+    if len(fragment) < length:
+        if socket.recv() != b"\x10\x80\x00\x00\x00\x00":
+            return False
+        # The socket send blocks while the send window is full, so
+        # fragments are read from the stream only when they can go.
+        for fragment in fragments:
+            if not socket.send(fragment):
+                return False
     return True
 
 
@@ -63,17 +102,129 @@ def recv_response(socket, acceptable_length, timeout):
             return None
 
         if len(snep_response) - 6 < length:
+            # Reassemble in a buffer preallocated from the length
+            # field, the remaining fragments are received in place.
+            response = bytearray(6 + length)
+            offset = len(snep_response)
+            response[0:offset] = snep_response
+            response_view = memoryview(response)
             # request remaining fragments
             socket.send(b"\x10\x00\x00\x00\x00\x00")
-            while len(snep_response) - 6 < length:
-                if socket.poll("recv", timeout):
-                    snep_response += socket.recv()
-                else:
+            while offset < len(response):
+                if not socket.poll("recv", timeout):
                     return None
+                count = socket.recv_into(response_view[offset:])
+                if count is None:
+                    return None
+                offset += count
+            return response
 
         return bytearray(snep_response)
 
 
+def recv_response_stream(socket, stream, acceptable_length, timeout):
+    # Receive a response and write the information field to *stream*
+    # as the fragments arrive. Returns the response code and length.
+    if socket.poll("recv", timeout):
+        snep_response = socket.recv()
+
+        if snep_response is None or len(snep_response) < 6:
+            log.debug("snep response initial fragment too short")
+            return None
+
+        version, status, length = struct.unpack(">BBL", snep_response[:6])
+
+        if length > acceptable_length:
+            log.debug("snep response exceeds acceptable length")
+            return None
+
+        received = len(snep_response) - 6
+        stream.write(snep_response[6:6+length])
+        if received < length:
+            # request remaining fragments
+            socket.send(b"\x10\x00\x00\x00\x00\x00")
+            while received < length:
+                if not socket.poll("recv", timeout):
+                    return None
+                data = socket.recv()
+                if data is None:
+                    return None
+                stream.write(data[0:length-received])
+                received += len(data)
+
+        return status, length
+
+
+def dispatch_request(dispatcher, socket, snep_request, send_miu,
+                     acceptable_length):
+    # Exchange a request and response like send_request() and
+    # recv_response() but through an nfc.llcp.Dispatcher. Returns a
+    # Future for the response, the result is None if the request
+    # could not be sent or the response was not acceptable.
+    result = nfc.llcp.dispatcher.Future()
+
+    def then(future, callback, *args):
+        def done(future):
+            try:
+                callback(future.result(), *args)
+            except Exception as error:
+                result.set_exception(error)
+        future.add_done_callback(done)
+
+    def sent_first(success):
+        if not success:
+            result.set_result(None)
+        elif len(snep_request) <= send_miu:
+            then(dispatcher.recv(socket), recv_first)
+        else:
+            then(dispatcher.recv(socket), recv_continue)
+
+    def recv_continue(data):
+        if data != b"\x10\x80\x00\x00\x00\x00":
+            result.set_result(None)
+        else:
+            send_next(True, send_miu)
+
+    def send_next(success, offset):
+        if not success:
+            result.set_result(None)
+        elif offset < len(snep_request):
+            fragment = snep_request[offset:offset+send_miu]
+            then(dispatcher.send(socket, fragment), send_next,
+                 offset + send_miu)
+        else:
+            then(dispatcher.recv(socket), recv_first)
+
+    def recv_first(data):
+        if data is None or len(data) < 6:
+            log.debug("snep response initial fragment too short")
+            return result.set_result(None)
+        version, status, length = struct.unpack(">BBL", data[:6])
+        if length > acceptable_length:
+            log.debug("snep response exceeds acceptable length")
+            return result.set_result(None)
+        if len(data) - 6 >= length:
+            return result.set_result(bytearray(data))
+        response = bytearray(6 + length)
+        response[0:len(data)] = data
+        # request remaining fragments
+        dispatcher.send(socket, b"\x10\x00\x00\x00\x00\x00")
+        then(dispatcher.recv(socket), recv_next, response, len(data))
+
+    def recv_next(data, response, offset):
+        if data is None:
+            return result.set_result(None)
+        count = min(len(data), len(response) - offset)
+        response[offset:offset+count] = data[0:count]
+        if offset + count < len(response):
+            then(dispatcher.recv(socket), recv_next, response, offset + count)
+        else:
+            result.set_result(response)
+
+    then(dispatcher.send(socket, snep_request[0:send_miu]), sent_first)
+    return result
+
+
 class SnepClient(object):
     """ Simple NDEF exchange protocol - client implementation
     """
@@ -304,6 +455,168 @@ class SnepClient(object):
             if self.release_connection:
                 self.close()
 
+    def dispatch_put(self, dispatcher, octets):
+        """Send NDEF message octets to a SNEP Server through the
+        :class:`nfc.llcp.Dispatcher` *dispatcher* and return a
+        :class:`~nfc.llcp.dispatcher.Future` for the result, which is
+        the same as the return value of :meth:`put_octets`. The
+        future raises :exc:`SnepError` if the server responded with
+        an error code.
+
+        The request is sent and the response received by the
+        dispatcher thread, no thread waits for the exchange. If the
+        client is not yet connected it connects to the default SNEP
+        Server, and the connection stays open until :meth:`close`.
+
+        """
+        request = struct.pack('>BBL', 0x10, 0x02, len(octets)) + octets
+
+        def done(response):
+            if response is not None and response[1] != 0x81:
+                raise SnepError(response[1])
+            return response is not None
+        return self._dispatch(dispatcher, request, 0, done, False)
+
+    def dispatch_get(self, dispatcher, octets=None):
+        """Get NDEF message octets from a SNEP Server through the
+        :class:`nfc.llcp.Dispatcher` *dispatcher* and return a
+        :class:`~nfc.llcp.dispatcher.Future` for the result, which is
+        the same as the return value of :meth:`get_octets`. Otherwise
+        the same as :meth:`dispatch_put`.
+
+        """
+        if octets is None:
+            # Send NDEF Message with one empty Record.
+            octets = b'\xd0\x00\x00'
+
+        request = struct.pack('>BBLL', 0x10, 0x01, 4 + len(octets),
+                              self.acceptable_length) + octets
+
+        def done(response):
+            if response is not None and response[1] != 0x81:
+                raise SnepError(response[1])
+            return response[6:] if response is not None else None
+        return self._dispatch(dispatcher, request, self.acceptable_length,
+                              done, None)
+
+    def _dispatch(self, dispatcher, request, acceptable_length, done,
+                  failed):
+        future = nfc.llcp.dispatcher.Future()
+        if not self.socket:
+            try:
+                self.connect('urn:nfc:sn:snep')
+            except nfc.llcp.ConnectRefused:
+                future.set_result(failed)
+                return future
+
+        def complete(response_future):
+            try:
+                future.set_result(done(response_future.result()))
+            except Exception as error:
+                future.set_exception(error)
+
+        dispatch_request(dispatcher, self.socket, request, self.send_miu,
+                         acceptable_length).add_done_callback(complete)
+        return future
+
+    def put_stream(self, stream, length=None, timeout=1.0):
+        """Send an NDEF message read from *stream* to a SNEP Server.
+
+        The *stream* is a file-like object with a read method or an
+        iterable of byte strings that provides *length* octets of
+        NDEF message data. The *length* may be omitted for a seekable
+        file-like object and is then the size of the data from the
+        current position to the end. Message fragments are read from
+        the stream only when the data link connection can send them,
+        so that no more than about the send MIU times the remote
+        receive window is buffered. Otherwise the same as
+        :meth:`put_octets`.
+
+        """
+        if length is None:
+            position = stream.tell()
+            length = stream.seek(0, 2) or stream.tell()
+            stream.seek(position)
+            length = length - position
+
+        if not self.socket:
+            try:
+                self.connect('urn:nfc:sn:snep')
+            except nfc.llcp.ConnectRefused:
+                return False
+            else:
+                self.release_connection = True
+        else:
+            self.release_connection = False
+
+        try:
+            header = struct.pack('>BBL', 0x10, 0x02, length)
+            try:
+                if not send_request_stream(self.socket, header, stream,
+                                           length, self.send_miu):
+                    return False
+            except ValueError:
+                # The server may have an incomplete request, only closing
+                # the data link connection brings it back in sync.
+                self.close()
+                raise
+
+            response = recv_response(self.socket, 0, timeout)
+            if response is not None:
+                if response[1] != 0x81:
+                    raise SnepError(response[1])
+
+            return True
+
+        finally:
+            if self.release_connection:
+                self.close()
+
+    def get_stream(self, stream, octets=None, timeout=1.0,
+                   acceptable_length=0xFFFFFFFF):
+        """Get NDEF message octets from a SNEP Server and write them to
+        *stream*, a file-like object with a write method, as they are
+        received. Up to *acceptable_length* octets are accepted and
+        the number of octets written is returned, or None if the
+        response was not received. Otherwise the same as
+        :meth:`get_octets`.
+
+        """
+        if octets is None:
+            # Send NDEF Message with one empty Record.
+            octets = b'\xd0\x00\x00'
+
+        if not self.socket:
+            try:
+                self.connect('urn:nfc:sn:snep')
+            except nfc.llcp.ConnectRefused:
+                return None
+            else:
+                self.release_connection = True
+        else:
+            self.release_connection = False
+
+        try:
+            request = struct.pack('>BBLL', 0x10, 0x01, 4 + len(octets),
+                                  acceptable_length) + octets
+
+            if not send_request(self.socket, request, self.send_miu):
+                return None
+
+            response = recv_response_stream(
+                self.socket, stream, acceptable_length, timeout)
+
+            if response is not None:
+                status, length = response
+                if status != 0x81:
+                    raise SnepError(status)
+
+                return length
+
+        finally:
+            if self.release_connection:
+                self.close()
+
     def __enter__(self):
         self.connect()
         return self
@@ -23,10 +23,14 @@
 # Simple NDEF Exchange Protocol (SNEP) - Server Base Class
 #
 import nfc.llcp
+import nfc.llcp.executor
 import nfc.ndef
 
+import io
+import errno
 from threading import Thread
 from struct import pack, unpack
+from binascii import hexlify
 
 import logging
 log = logging.getLogger(__name__)
@@ -34,10 +38,17 @@ log = logging.getLogger(__name__)
 
 class SnepServer(Thread):
     """ NFC Forum Simple NDEF Exchange Protocol server
+
+    Client connections are served by the worker threads of the
+    :class:`~nfc.llcp.executor.ServiceExecutor` given as *executor*,
+    or the shared :data:`nfc.llcp.executor.default`. At most
+    *max_concurrency* clients are served at the same time if not
+    :const:`None`.
     """
     def __init__(self, llc, service_name="urn:nfc:sn:snep",
                  max_acceptable_length=0x100000,
-                 recv_miu=1984, recv_buf=15):
+                 recv_miu=1984, recv_buf=15,
+                 executor=None, max_concurrency=None):
 
         self.max_acceptable_length = min(max_acceptable_length, 0xFFFFFFFF)
         socket = nfc.llcp.Socket(llc, nfc.llcp.DATA_LINK_CONNECTION)
@@ -49,21 +60,14 @@ class SnepServer(Thread):
                  .format(socket.getsockname(), recv_miu, recv_buf,
                          self.max_acceptable_length))
         socket.listen(backlog=2)
+        self.executor = executor or nfc.llcp.executor.default
+        self.max_concurrency = max_concurrency
         Thread.__init__(self, name=service_name,
                         target=self.listen, args=(socket,))
 
     def listen(self, socket):
-        try:
-            while True:
-                client_socket = socket.accept()
-                client_thread = Thread(target=SnepServer.serve,
-                                       args=(client_socket, self))
-                client_thread.start()
-        except nfc.llcp.Error as e:
-            (log.debug if e.errno == nfc.llcp.errno.EPIPE else log.error)(e)
-        finally:
-            socket.close()
-        pass
+        self.executor.listen(socket, lambda client: self.serve(client, self),
+                             self.name, self.max_concurrency)
 
     @staticmethod
     def serve(socket, snep_server):
@@ -91,22 +95,37 @@ class SnepServer(Thread):
                     socket.send(b"\x10\xFF\x00\x00\x00\x00")
                     continue
 
+                if opcode == 2:
+                    # A PUT request is handed to put_stream() that
+                    # receives the remaining fragments when reading.
+                    if len(data) - 6 < length:
+                        # request remaining fragments
+                        socket.send(b"\x10\x80\x00\x00\x00\x00")
+                    stream = RequestStream(socket, data[6:], length)
+                    response = snep_server.put_stream(stream, length)
+                    stream.skip()
+                    socket.send(b"\x10" + chr(response) + b"\0\0\0\0")
+                    continue
+
                 snep_request = data
                 if len(snep_request) - 6 < length:
+                    # Reassemble in a buffer preallocated from the
+                    # length field, fragments are received in place.
+                    snep_request = bytearray(6 + length)
+                    offset = len(data)
+                    snep_request[0:offset] = data
+                    request_view = memoryview(snep_request)
                     # request remaining fragments
                     socket.send(b"\x10\x80\x00\x00\x00\x00")
-                    while len(snep_request) - 6 < length:
-                        data = socket.recv()
-                        if data:
-                            snep_request += data
-                        else:
-                            break  # connection closed
+                    while offset < len(snep_request):
+                        count = socket.recv_into(request_view[offset:])
+                        if count is None:
+                            return  # connection closed
+                        offset += count
 
                 # message complete, now handle the request
                 if opcode == 1 and len(snep_request) >= 10:
                     snep_response = snep_server.__get(snep_request)
-                elif opcode == 2:
-                    snep_response = snep_server.__put(snep_request)
                 else:
                     log.debug("bad request {0}".format(version & 0x0f))
                     snep_response = b"\x10\xC2\x00\x00\x00\x00"
@@ -117,10 +136,7 @@ class SnepServer(Thread):
                 else:
                     socket.send(snep_response[0:send_miu])
                     if socket.recv() == b"\x10\x00\x00\x00\x00\x00":
-                        parts = range(send_miu, len(snep_response), send_miu)
-                        for offset in parts:
-                            fragment = snep_response[offset:offset+send_miu]
-                            socket.send(fragment)
+                        socket.sendall(memoryview(snep_response)[send_miu:])
 
         except nfc.llcp.Error as e:
             (log.debug if e.errno == nfc.llcp.errno.EPIPE else log.error)(e)
@@ -129,7 +145,8 @@ class SnepServer(Thread):
 
     def __get(self, snep_request):
         acceptable_length = unpack(">L", snep_request[6:10])[0]
-        response = self._get(acceptable_length, snep_request[10:])
+        response = self._get(acceptable_length,
+                             memoryview(snep_request)[10:])
         if type(response) == int:
             response_code = chr(response)
             ndef_message = ""
@@ -140,9 +157,10 @@ class SnepServer(Thread):
         return b"\x10" + response_code + ndef_length + ndef_message
 
     def _get(self, acceptable_length, ndef_message_data):
-        log.debug("SNEP GET ({0})".format(ndef_message_data.encode("hex")))
+        # The ndef_message_data is a memoryview of the request buffer.
+        log.debug("SNEP GET ({0})".format(hexlify(ndef_message_data)))
         try:
-            ndef_message = nfc.ndef.Message(ndef_message_data)
+            ndef_message = nfc.ndef.Message(io.BytesIO(ndef_message_data))
         except (nfc.ndef.LengthError, nfc.ndef.FormatError) as err:
             log.error(repr(err))
             return 0xC2
@@ -157,15 +175,38 @@ class SnepServer(Thread):
         """
         return 0xE0
 
-    def __put(self, snep_request):
-        response = self._put(snep_request[6:])
-        ndef_length = b"\x00\x00\x00\x00"
-        return b"\x10" + chr(response) + ndef_length
+    def put_stream(self, stream, length):
+        """Handle Put requests with an NDEF message of *length* bytes
+        that is read from *stream*, a :class:`RequestStream`. The
+        return value is the SNEP response code. A subclass may
+        overwrite this method to process large messages while they
+        are received, fragments are only received when read. The
+        default implementation reads the message into a buffer and
+        calls :meth:`put` with the parsed message. The NDEF record
+        framing is followed while the fragments arrive, a request that
+        does not hold a complete NDEF message is answered with Bad
+        Request without being parsed.
+        """
+        framer = nfc.ndef.MessageFramer()
+        ndef_message_data = bytearray(length)
+        view, offset = memoryview(ndef_message_data), 0
+        try:
+            while offset < length:
+                count = stream.readinto(view[offset:])
+                framer.feed(view[offset:offset+count])
+                offset += count
+            if not framer.complete:
+                raise nfc.ndef.LengthError("insufficient data to parse")
+        except (nfc.ndef.LengthError, nfc.ndef.FormatError) as err:
+            log.error(repr(err))
+            return 0xC2
+        return self._put(view)
 
     def _put(self, ndef_message_data):
-        log.debug("SNEP PUT ({0})".format(ndef_message_data.encode("hex")))
+        # The ndef_message_data is a memoryview of the request buffer.
+        log.debug("SNEP PUT ({0})".format(hexlify(ndef_message_data)))
         try:
-            ndef_message = nfc.ndef.Message(ndef_message_data)
+            ndef_message = nfc.ndef.Message(io.BytesIO(ndef_message_data))
         except (nfc.ndef.LengthError, nfc.ndef.FormatError) as err:
             log.error(repr(err))
             return 0xC2
@@ -178,3 +219,46 @@ class SnepServer(Thread):
         implementation simply returns Not Implemented.
         """
         return 0xE0
+
+
+class RequestStream(io.RawIOBase):
+    """A readable file-like object with the NDEF message of a SNEP
+    request. The *data* of the initial fragment, after the SNEP
+    header, is read first, further fragments are received from the
+    data link connection *socket* when needed, up to *length* bytes
+    in total. Reading raises :exc:`nfc.llcp.Error` if the connection
+    is closed before the complete message was received.
+
+    """
+    def __init__(self, socket, data, length):
+        self._socket = socket
+        self._data = memoryview(data)[0:length]
+        self._remaining = length
+        self.length = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining == 0:
+            return 0
+        if len(self._data) == 0:
+            data = self._socket.recv()
+            if data is None:
+                raise nfc.llcp.Error(errno.EPIPE)
+            self._data = memoryview(data)[0:self._remaining]
+        count = min(len(buffer), len(self._data))
+        buffer[0:count] = self._data[0:count]
+        self._data = self._data[count:]
+        self._remaining -= count
+        return count
+
+    def skip(self):
+        """Receive and discard the remaining part of the message."""
+        self._remaining -= len(self._data)
+        self._data = memoryview(b"")
+        while self._remaining > 0:
+            data = self._socket.recv()
+            if data is None:
+                raise nfc.llcp.Error(errno.EPIPE)
+            self._remaining -= min(len(data), self._remaining)
@@ -19,8 +19,10 @@
 # See the Licence for the specific language governing
 # permissions and limitations under the Licence.
 # -----------------------------------------------------------------------------
+import math
 import logging
 import warnings
+import collections
 from ndef import message_decoder, message_encoder
 
 logging.captureWarnings(True)
@@ -456,6 +458,68 @@ class TagCommandError(Exception):
         return self._errno
 
 
+class ResponseTimeEstimator(object):
+    """Learns the response times observed for one kind of tag command
+    and derives a command timeout and retry budget from them.
+
+    The estimator keeps a smoothed average and mean deviation of the
+    response time (as done for TCP retransmission timers) plus a
+    window of the most recent samples. Once *min_samples* responses
+    have been seen, :meth:`timeout` returns the larger of the 95th
+    percentile and the average plus four times the deviation, scaled
+    by *margin* and never more than the static default timeout. Each
+    expired timeout doubles the next one until a response is received
+    again. Before enough samples are available the static defaults
+    are returned unchanged.
+
+    """
+    def __init__(self, window=32, min_samples=8, margin=1.5,
+                 minimum=0.001):
+        self._samples = collections.deque(maxlen=window)
+        self._min_samples = min_samples
+        self._margin = margin
+        self._minimum = minimum
+        self._average = None
+        self._deviation = 0.0
+        self._backoff = 1
+
+    @property
+    def samples(self):
+        """The number of response times currently in the window."""
+        return len(self._samples)
+
+    def update(self, elapsed):
+        """Record the *elapsed* seconds of a successful command."""
+        if self._average is None:
+            self._average, self._deviation = elapsed, elapsed / 2
+        else:
+            error = elapsed - self._average
+            self._average += error / 8
+            self._deviation += (abs(error) - self._deviation) / 4
+        self._samples.append(elapsed)
+        self._backoff = 1
+
+    def expired(self):
+        """Record that a command did not receive a response in time."""
+        self._backoff = min(2 * self._backoff, 64)
+
+    def timeout(self, default):
+        """Return the timeout to use instead of the *default* timeout."""
+        if len(self._samples) < self._min_samples:
+            return default
+        samples = sorted(self._samples)
+        percentile = samples[int(math.ceil(0.95 * len(samples))) - 1]
+        estimate = max(percentile, self._average + 4 * self._deviation)
+        estimate = max(self._margin * estimate, self._minimum)
+        return min(self._backoff * estimate, default)
+
+    def retries(self, default):
+        """Return the retry budget to use instead of *default* retries."""
+        if len(self._samples) < self._min_samples:
+            return default
+        return min(default, 1)
+
+
 def activate(clf, target):
     import nfc.clf
     try:
@@ -507,8 +571,14 @@ class TagEmulation(object):
 def emulate(clf, target):
     import nfc.clf
     assert isinstance(target, nfc.clf.LocalTarget)
+    if target.tt2_cmd:
+        import nfc.tag.tt2
+        return nfc.tag.tt2.Type2TagEmulation(clf, target)
     if target.tt3_cmd:
         import nfc.tag.tt3
         return nfc.tag.tt3.Type3TagEmulation(clf, target)
+    if target.tt4_cmd:
+        import nfc.tag.tt4
+        return nfc.tag.tt4.Type4TagEmulation(clf, target)
     else:
         log.debug("can't emulate with %s", target)
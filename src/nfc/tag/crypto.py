@@ -0,0 +1,161 @@
+# -*- coding: latin-1 -*-
+# -----------------------------------------------------------------------------
+# Copyright 2014, 2017 Stephen Tiedemann <stephen.tiedemann@gmail.com>
+#
+# Licensed under the EUPL, Version 1.1 or - as soon they
+# will be approved by the European Commission - subsequent
+# versions of the EUPL (the "Licence");
+# You may not use this work except in compliance with the
+# Licence.
+# You may obtain a copy of the Licence at:
+#
+# https://joinup.ec.europa.eu/software/page/eupl
+#
+# Unless required by applicable law or agreed to in
+# writing, software distributed under the Licence is
+# distributed on an "AS IS" basis,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# See the Licence for the specific language governing
+# permissions and limitations under the Licence.
+# -----------------------------------------------------------------------------
+"""Triple DES in CBC mode for the tag authentication and MAC
+functions. The cipher runs in the OpenSSL crypto library, preferably
+the one already bound by :mod:`nfc.llcp.sec`, and falls back to the
+pure Python :mod:`pyDes` implementation if libcrypto can not be
+loaded or refuses the two-key or three-key cipher. The selected
+implementation is the module level :data:`backend`, it is replaced
+by the pyDes implementation if libcrypto fails later on.
+
+"""
+import nfc.llcp.sec
+
+import ctypes
+import ctypes.util
+from ctypes import c_void_p, c_int
+import pyDes
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class PyDesBackend(object):
+    name = "pyDes"
+
+    def encrypt(self, key, iv, data):
+        return pyDes.triple_des(key, pyDes.CBC, iv).encrypt(data)
+
+    def decrypt(self, key, iv, data):
+        return pyDes.triple_des(key, pyDes.CBC, iv).decrypt(data)
+
+
+class OpenSSLBackend(object):
+    name = "OpenSSL"
+
+    def __init__(self, crypto):
+        crypto.EVP_CIPHER_CTX_new.restype = c_void_p
+        crypto.EVP_CIPHER_CTX_free.restype = None
+        crypto.EVP_CIPHER_CTX_set_padding.restype = c_int
+        crypto.EVP_EncryptInit_ex.restype = c_int
+        crypto.EVP_EncryptUpdate.restype = c_int
+        crypto.EVP_DecryptInit_ex.restype = c_int
+        crypto.EVP_DecryptUpdate.restype = c_int
+        crypto.EVP_des_ede_cbc.restype = c_void_p
+        crypto.EVP_des_ede_cbc.argtypes = []
+        crypto.EVP_des_ede3_cbc.restype = c_void_p
+        crypto.EVP_des_ede3_cbc.argtypes = []
+        self._crypto = crypto
+        self._cipher = {16: c_void_p(crypto.EVP_des_ede_cbc()),
+                        24: c_void_p(crypto.EVP_des_ede3_cbc())}
+
+    def _process(self, key, iv, data, init, update):
+        # Data is always a multiple of the block size, so padding is
+        # disabled and the final call would never produce output.
+        # The library is shared with nfc.llcp.sec and its lock.
+        crypto = self._crypto
+        with nfc.llcp.sec.libcrypto_lock:
+            ctx = c_void_p(crypto.EVP_CIPHER_CTX_new())
+            try:
+                if init(ctx, self._cipher[len(key)], None, key, iv) != 1:
+                    raise AssertionError(init.__name__)
+                crypto.EVP_CIPHER_CTX_set_padding(ctx, 0)
+                out_buf = ctypes.create_string_buffer(len(data))
+                out_len = c_int(0)
+                r = update(ctx, out_buf, ctypes.byref(out_len),
+                           data, len(data))
+                if r != 1:
+                    raise AssertionError(update.__name__)
+                return out_buf.raw[0:out_len.value]
+            finally:
+                crypto.EVP_CIPHER_CTX_free(ctx)
+
+    def encrypt(self, key, iv, data):
+        return self._process(key, iv, data, self._crypto.EVP_EncryptInit_ex,
+                             self._crypto.EVP_EncryptUpdate)
+
+    def decrypt(self, key, iv, data):
+        return self._process(key, iv, data, self._crypto.EVP_DecryptInit_ex,
+                             self._crypto.EVP_DecryptUpdate)
+
+
+def _probe_backend(backend):
+    # A libcrypto provider may refuse DES-EDE, both key sizes must
+    # work and give the same result as pyDes.
+    for size in (16, 24):
+        key, iv = bytes(bytearray(range(size))), bytes(bytearray(8))
+        data = bytes(bytearray(range(16)))
+        expected = PyDesBackend().encrypt(key, iv, data)
+        if backend.encrypt(key, iv, data) != expected:
+            raise AssertionError("wrong result with %d byte key" % size)
+    return backend
+
+
+def _select_backend():
+    # The EVP cipher interface used here is the same in all OpenSSL
+    # versions, so libcrypto is loaded here even if nfc.llcp.sec did
+    # not accept it for the elliptic curve functions.
+    try:
+        if nfc.llcp.sec.OpenSSL is not None:
+            return _probe_backend(
+                OpenSSLBackend(nfc.llcp.sec.OpenSSL.crypto))
+        libcrypto = ctypes.util.find_library('crypto')
+        if libcrypto is not None:
+            return _probe_backend(OpenSSLBackend(ctypes.CDLL(libcrypto)))
+    except (OSError, AttributeError, AssertionError) as error:
+        log.debug("can not use libcrypto for triple des: %s", error)
+    return PyDesBackend()
+
+
+backend = _select_backend()
+
+
+def _process(operation, key, iv, data):
+    global backend
+    try:
+        return getattr(backend, operation)(key, iv, data)
+    except AssertionError as error:
+        if isinstance(backend, PyDesBackend):
+            raise
+        log.warning("libcrypto triple des failed in %s, using pyDes", error)
+        backend = PyDesBackend()
+        return getattr(backend, operation)(key, iv, data)
+
+
+def triple_des_cbc_encrypt(key, iv, data):
+    """Encrypt *data* with two-key (16 byte *key*) or three-key (24
+    byte *key*) Triple DES in CBC mode with the 8 byte initialization
+    vector *iv*. The length of *data* must be a multiple of 8.
+
+    """
+    assert len(key) in (16, 24) and len(iv) == 8 and len(data) % 8 == 0
+    return _process("encrypt", bytes(key), bytes(iv), bytes(data))
+
+
+def triple_des_cbc_decrypt(key, iv, data):
+    """Decrypt *data* with two-key (16 byte *key*) or three-key (24
+    byte *key*) Triple DES in CBC mode with the 8 byte initialization
+    vector *iv*. The length of *data* must be a multiple of 8.
+
+    """
+    assert len(key) in (16, 24) and len(iv) == 8 and len(data) % 8 == 0
+    return _process("decrypt", bytes(key), bytes(iv), bytes(data))
@@ -452,14 +452,27 @@ class Type1Tag(Tag):
     def transceive(self, data, timeout=0.1):
         log.debug(">> {0} ({1:f}s)".format(hexlify(data), timeout))
 
+        retries = 2
+        estimator = self.clf.response_time_estimator(
+            self.type, str(data[:1]), timeout)
+        if estimator is not None:
+            retries = estimator.retries(retries)
+
         started = time.time()
-        for retry in range(3):
+        for retry in range(1 + retries):
             try:
-                data = self.clf.exchange(data, timeout)
+                if estimator is None:
+                    data = self.clf.exchange(data, timeout)
+                else:
+                    issued = time.time()
+                    data = self.clf.exchange(data, estimator.timeout(timeout))
+                    estimator.update(time.time() - issued)
                 break
             except nfc.clf.CommunicationError as error:
                 reason = error.__class__.__name__
                 log.debug("%s after %d retries" % (reason, retry))
+                if type(error) is nfc.clf.TimeoutError and estimator:
+                    estimator.expired()
         else:
             if type(error) is nfc.clf.TimeoutError:
                 raise Type1TagCommandError(nfc.tag.TIMEOUT_ERROR)
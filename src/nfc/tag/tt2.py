@@ -23,7 +23,7 @@ import time
 from binascii import hexlify
 from struct import pack, unpack
 
-from . import Tag, TagCommandError
+from . import Tag, TagCommandError, TagEmulation
 import nfc.clf
 
 import logging
@@ -334,15 +334,25 @@ class Type2Tag(Tag):
     def _is_present(self):
         # Verify that the tag is still present. This is implemented as
         # reading page 0-3 (from whatever sector is currently active).
+        # A tag that does not answer may just have fallen back to
+        # IDLE state, so we try once to select it again.
         try:
             data = self.transceive("\x30\x00")
         except Type2TagCommandError as error:
             if error.errno != TIMEOUT_ERROR:
                 log.warning("unexpected error in presence check: %s" % error)
-            return False
+                return False
+            return bool(self._reactivate())
         else:
             return bool(data and len(data) == 16)
 
+    def _reactivate(self):
+        # Select the tag again after it went to IDLE state, leaving
+        # the RF field on. A reselected tag starts in sector 0.
+        self._target = self.clf.reactivate(self.target)
+        self._current_sector = 0
+        return self.target
+
     def format(self, version=None, wipe=None):
         """Erase the NDEF message on a Type 2 Tag.
 
@@ -482,8 +492,7 @@ class Type2Tag(Tag):
 
         if len(data) == 1 and data[0] & 0xFA == 0x00:
             log.debug("received nak response")
-            self.target.sel_req = self.target.sdd_res[:]
-            self._target = self.clf.sense(self.target)
+            self._reactivate()
             raise Type2TagCommandError(
                 INVALID_PAGE_ERROR if self.target else nfc.tag.RECEIVE_ERROR)
 
@@ -581,14 +590,26 @@ class Type2Tag(Tag):
             # "unrecoverable timeout error".
             raise Type2TagCommandError(nfc.tag.TIMEOUT_ERROR)
 
+        estimator = self.clf.response_time_estimator(
+            self.type, str(data[:1]), timeout)
+        if estimator is not None:
+            retries = estimator.retries(retries)
+
         started = time.time()
         for retry in range(1 + retries):
             try:
-                data = self.clf.exchange(data, timeout)
+                if estimator is None:
+                    data = self.clf.exchange(data, timeout)
+                else:
+                    issued = time.time()
+                    data = self.clf.exchange(data, estimator.timeout(timeout))
+                    estimator.update(time.time() - issued)
                 break
             except nfc.clf.CommunicationError as error:
                 reason = error.__class__.__name__
                 log.debug("%s after %d retries" % (reason, retry))
+                if type(error) is nfc.clf.TimeoutError and estimator:
+                    estimator.expired()
         else:
             if type(error) is nfc.clf.TimeoutError:
                 raise Type2TagCommandError(nfc.tag.TIMEOUT_ERROR)
@@ -674,6 +695,99 @@ class Type2TagMemoryReader(object):
         self._write_to_tag(stop=len(self))
 
 
+class Type2TagEmulation(TagEmulation):
+    """Framework for Type 2 Tag emulation.
+
+    The emulated tag memory is the :attr:`memory` bytearray of 4 byte
+    pages, with the UID in pages 0 to 2, the static lock bytes in
+    page 2, the capability container in page 3 and the data area
+    from page 4. The emulation answers the READ, FAST_READ and WRITE
+    commands from the memory image and does not respond to other
+    commands. Responses to READ are prepared when memory is assigned
+    and kept up to date by WRITE, so that they are returned without
+    copying. If the memory image is changed by other means it must be
+    assigned again.
+
+    """
+    ACK = bytearray([0x0A])
+    NAK = bytearray([0x00])
+
+    def __init__(self, clf, target):
+        self.target = target
+        self.cmd = target.tt2_cmd
+        self.clf = clf
+        self.memory = bytearray(64)
+
+    def __str__(self):
+        """x.__str__() <==> str(x)"""
+        return "Type2TagEmulation UID={0} PAGES={1}".format(
+            hexlify(self.target.sdd_res), len(self._read_rsp))
+
+    @property
+    def memory(self):
+        """The tag memory image as a bytearray of at least 4 pages."""
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory):
+        if len(memory) < 16 or len(memory) % 4 != 0:
+            raise ValueError("memory size must be a multiple of 4 and "
+                             "at least 16 byte")
+        # A READ command returns 4 pages and rolls over to page 0.
+        self._memory = memory
+        wrapped = memory + memory[0:12]
+        self._read_rsp = [wrapped[i:i+16] for i in range(0, len(memory), 4)]
+
+    def process_command(self, cmd):
+        log.debug("cmd: " + (hexlify(cmd) if cmd else str(cmd)))
+        if not cmd:
+            return None
+        if cmd[0] == 0x30 and len(cmd) == 2:
+            log.debug("process 'read' command")
+            if cmd[1] < len(self._read_rsp):
+                return self._read_rsp[cmd[1]]
+            return self.NAK
+        if cmd[0] == 0x3A and len(cmd) == 3:
+            log.debug("process 'fast read' command")
+            if cmd[1] <= cmd[2] < len(self._read_rsp):
+                return self._memory[cmd[1]*4:(cmd[2]+1)*4]
+            return self.NAK
+        if cmd[0] == 0xA2 and len(cmd) == 6:
+            log.debug("process 'write' command")
+            return self.ACK if self.write(cmd[1], cmd[2:6]) else self.NAK
+        log.debug("no response to command {0:02x}".format(cmd[0]))
+
+    def send_response(self, rsp, timeout):
+        log.debug("rsp: " + (hexlify(rsp) if rsp is not None else 'None'))
+        return self.clf.exchange(rsp, timeout)
+
+    def write(self, page, data):
+        """Write the 4 byte *data* to *page* as the WRITE command does.
+        Pages 0 and 1 are read-only, the lock bytes in page 2 and the
+        capability container in page 3 can only set more bits, and
+        pages 3 to 15 are read-only once the static lock bits are set.
+        Returns True if the page was written.
+
+        """
+        pages = len(self._read_rsp)
+        if not 2 <= page < pages:
+            return False
+        if 3 <= page < 16 and (self._memory[10] | self._memory[11] << 8) \
+                >> page & 1:
+            return False
+        offset = page * 4
+        if page == 2:
+            data = self._memory[8:10] + bytearray(
+                [self._memory[10] | data[2], self._memory[11] | data[3]])
+        elif page == 3:
+            data = bytearray([x | y for x, y in zip(data, self._memory[12:])])
+        self._memory[offset:offset+4] = data
+        for first_page in range(page - 3, page + 1):
+            index = (page - first_page) * 4
+            self._read_rsp[first_page % pages][index:index+4] = data
+        return True
+
+
 def activate(clf, target):
     # Type 2 Tags go mute when they receive an unsupported command. It
     # is then necessary to sense again and by copying sdd_res to
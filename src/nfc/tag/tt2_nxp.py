@@ -24,7 +24,7 @@ from . import tt2
 
 import os
 from binascii import hexlify
-from pyDes import triple_des, CBC
+from .crypto import triple_des_cbc_encrypt, triple_des_cbc_decrypt
 
 import logging
 log = logging.getLogger(__name__)
@@ -211,7 +211,7 @@ class MifareUltralightC(tt2.Type2Tag):
         rsp = self.transceive(b"\x1A\x00")
         m1 = bytes(rsp[1:9])
         iv = b"\x00\x00\x00\x00\x00\x00\x00\x00"
-        rb = triple_des(key, CBC, iv).decrypt(m1)
+        rb = triple_des_cbc_decrypt(key, iv, m1)
 
         log.debug("received challenge")
         log.debug("iv = " + bytes(iv).encode("hex"))
@@ -220,7 +220,7 @@ class MifareUltralightC(tt2.Type2Tag):
 
         ra = os.urandom(8)
         iv = bytes(rsp[1:9])
-        m2 = triple_des(key, CBC, iv).encrypt(ra + rb[1:8] + rb[0])
+        m2 = triple_des_cbc_encrypt(key, iv, ra + rb[1:8] + rb[0])
 
         log.debug("sending response")
         log.debug("ra = " + bytes(ra).encode("hex"))
@@ -237,7 +237,7 @@ class MifareUltralightC(tt2.Type2Tag):
         log.debug("iv = " + bytes(iv).encode("hex"))
         log.debug("m3 = " + bytes(m3).encode("hex"))
 
-        return triple_des(key, CBC, iv).decrypt(m3) == ra[1:9] + ra[0]
+        return triple_des_cbc_decrypt(key, iv, m3) == ra[1:9] + ra[0]
 
 
 class NTAG203(tt2.Type2Tag):
@@ -310,14 +310,7 @@ class Type3Tag(nfc.tag.Tag):
         last_data = None
         same_data = 0
 
-        for i in itertools.count():  # pragma: no branch
-            assert i < 0x10000
-            try:
-                this_data = self.read_without_encryption([sc], [BlockCode(i)])
-            except Type3TagCommandError:
-                i = i - 1
-                break
-
+        for i, this_data in enumerate(self._read_service_data(sc)):
             if this_data == last_data:
                 same_data += 1
             else:
@@ -334,6 +327,16 @@ class Type3Tag(nfc.tag.Tag):
 
         return lines
 
+    def _read_service_data(self, sc):
+        # Yield the data of consecutive blocks from service *sc*,
+        # starting at block 0, until a block can not be read.
+        for i in itertools.count():  # pragma: no branch
+            assert i < 0x10000
+            try:
+                yield self.read_without_encryption([sc], [BlockCode(i)])
+            except Type3TagCommandError:
+                return
+
     def format(self, version=None, wipe=None):
         """Format and blank an NFC Forum Type 3 Tag.
 
@@ -687,14 +690,27 @@ class Type3Tag(nfc.tag.Tag):
         log.debug(">> {0:02x} {1:02x} {2} {3} ({4}s)".format(
             cmd[0], cmd[1], hexlify(cmd[2:10]), hexlify(cmd[10:]), timeout))
 
+        retries = 2
+        estimator = self.clf.response_time_estimator(
+            self.type, cmd_code, timeout)
+        if estimator is not None:
+            retries = estimator.retries(retries)
+
         started = time.time()
-        for retry in range(3):
+        for retry in range(1 + retries):
             try:
-                rsp = self.clf.exchange(cmd, timeout)
+                if estimator is None:
+                    rsp = self.clf.exchange(cmd, timeout)
+                else:
+                    issued = time.time()
+                    rsp = self.clf.exchange(cmd, estimator.timeout(timeout))
+                    estimator.update(time.time() - issued)
                 break
             except nfc.clf.CommunicationError as error:
                 reason = error.__class__.__name__
                 log.debug("%s after %d retries" % (reason, retry))
+                if type(error) is nfc.clf.TimeoutError and estimator:
+                    estimator.expired()
         else:
             if type(error) is nfc.clf.TimeoutError:
                 raise Type3TagCommandError(nfc.tag.TIMEOUT_ERROR)
@@ -729,6 +745,67 @@ class Type3Tag(nfc.tag.Tag):
         return rsp[12:]
 
 
+class MemoryService(object):
+    """Block data of a :class:`Type3TagEmulation` service kept in
+    *memory*, which may be any object that supports slice access
+    like :class:`bytearray` or :class:`mmap.mmap`. Block number *n*
+    is the 16 byte slice ``memory[n*16:n*16+16]``. The blocks can be
+    written by the reader only if *writeable* is True. Consecutive
+    blocks of a Read Without Encryption or Write Without Encryption
+    command are copied with a single slice operation.
+
+    The same memory object may be used for more than one service,
+    for example the read/write and read-only NDEF services 0009h and
+    000Bh.
+
+    """
+    def __init__(self, memory, writeable=True):
+        self.memory = memory
+        self.writeable = writeable
+
+    def read_blocks(self, block_number, count):
+        # Returns less than count blocks if the memory ends earlier.
+        return self.memory[block_number*16:(block_number+count)*16]
+
+    def write_blocks(self, block_number, data):
+        # Returns the number of blocks that could be written.
+        if not self.writeable:
+            return 0
+        count = min(len(data), len(self.memory) - block_number*16) // 16
+        if count > 0:
+            first = block_number * 16
+            self.memory[first:first+count*16] = bytes(data[0:count*16])
+        return max(count, 0)
+
+
+class NdefMemoryService(MemoryService):
+    """A :class:`MemoryService` with the NDEF attribute information
+    block in block 0 and the NDEF data area in the following blocks.
+    The :attr:`ndef` property allows the emulator to change the NDEF
+    message between reader accesses. Only the length and checksum
+    bytes of the attribute block are then updated, with the checksum
+    adjusted by the difference of the length bytes instead of being
+    summed up again.
+
+    """
+    @property
+    def ndef(self):
+        """The NDEF message data as given by the attribute block."""
+        length = unpack(">I", b"\0" + bytes(self.memory[11:14]))[0]
+        return bytearray(self.memory[16:16+length])
+
+    @ndef.setter
+    def ndef(self, data):
+        if len(data) > len(self.memory) - 16:
+            raise ValueError("ndef data exceeds the ndef data area")
+        old_ln = bytearray(self.memory[11:14])
+        new_ln = bytearray(pack(">I", len(data))[1:])
+        checksum = unpack(">H", bytes(self.memory[14:16]))[0]
+        checksum = (checksum - sum(old_ln) + sum(new_ln)) & 0xFFFF
+        self.memory[16:16+len(data)] = bytes(data)
+        self.memory[11:16] = bytes(new_ln + bytearray(pack(">H", checksum)))
+
+
 class Type3TagEmulation(nfc.tag.TagEmulation):
     """Framework for Type 3 Tag emulation.
 
@@ -762,6 +839,17 @@ class Type3TagEmulation(nfc.tag.TagEmulation):
 
         self.services[service_code] = (block_read_func, block_write_func)
 
+    def add_memory_service(self, service_code, memory, writeable=True):
+        """Add a service with block data in *memory*, see
+        :class:`MemoryService`. The *memory* may also be a
+        :class:`MemoryService` instance. Returns the service.
+
+        """
+        if not isinstance(memory, MemoryService):
+            memory = MemoryService(memory, writeable)
+        self.services[service_code] = memory
+        return memory
+
     def process_command(self, cmd):
         log.debug("cmd: " + (hexlify(cmd) if cmd else str(cmd)))
         if len(cmd) != cmd[0]:
@@ -803,96 +891,121 @@ class Type3TagEmulation(nfc.tag.TagEmulation):
     def request_response(self, cmd_data):
         return bytearray([0])
 
-    def read_without_encryption(self, cmd_data):
-        service_list = cmd_data.pop(0) * [[None, None]]
-        for i in range(len(service_list)):
-            service_code = cmd_data[1] << 8 | cmd_data[0]
-            if service_code not in self.services.keys():
-                return bytearray([0xFF, 0xA1])
-            service_list[i] = [service_code, 0]
-            del cmd_data[0:2]
-
-        service_block_list = cmd_data.pop(0) * [None]
-        if len(service_block_list) > 15:
-            return bytearray([0xFF, 0xA2])
-        for i in range(len(service_block_list)):
+    def _parse_block_list(self, cmd_data, max_blocks=None):
+        # Parse the service and block lists of a read or write
+        # command. Returns the error status (None if successful),
+        # the list of [service_code, block_number, block_count]
+        # items, the number of blocks per service, and the offset of
+        # the block data that follows in a write command.
+        services = []
+        offset = 1
+        for i in range(cmd_data[0]):
+            service_code = cmd_data[offset+1] << 8 | cmd_data[offset]
+            if service_code not in self.services:
+                return bytearray([0xFF, 0xA1]), None, None, None
+            services.append(service_code)
+            offset += 2
+
+        block_list = cmd_data[offset] * [None]
+        offset += 1
+        if max_blocks is not None and len(block_list) > max_blocks:
+            return bytearray([0xFF, 0xA2]), None, None, None
+        service_block_count = dict.fromkeys(services, 0)
+        for i in range(len(block_list)):
             try:
-                service_list_item = service_list[cmd_data[0] & 0x0F]
-                service_code = service_list_item[0]
-                service_list_item[1] += 1
+                service_code = services[cmd_data[offset] & 0x0F]
             except IndexError:
-                return bytearray([1 << (i % 8), 0xA3])
-            if cmd_data[0] >= 128:
-                block_number = cmd_data[1]
-                del cmd_data[0:2]
+                return bytearray([1 << (i % 8), 0xA3]), None, None, None
+            service_block_count[service_code] += 1
+            if cmd_data[offset] >= 128:
+                block_number = cmd_data[offset+1]
+                offset += 2
             else:
-                block_number = cmd_data[2] << 8 | cmd_data[1]
-                del cmd_data[0:3]
-            service_block_list[i] = [service_code, block_number, 0]
+                block_number = cmd_data[offset+2] << 8 | cmd_data[offset+1]
+                offset += 3
+            block_list[i] = [service_code, block_number, 0]
+
+        for block_list_item in block_list:
+            block_list_item[2] = service_block_count[block_list_item[0]]
+
+        return None, block_list, service_block_count, offset
+
+    @staticmethod
+    def _consecutive_blocks(block_list, i):
+        # Number of items from block_list[i] on that address
+        # consecutive blocks of the same service.
+        service_code, block_number = block_list[i][0:2]
+        count = 1
+        while (i + count < len(block_list) and
+               block_list[i+count][0] == service_code and
+               block_list[i+count][1] == block_number + count):
+            count += 1
+        return count
 
-        service_block_count = dict(service_list)
-        for service_block_list_item in service_block_list:
-            service_code = service_block_list_item[0]
-            service_block_list_item[2] = service_block_count[service_code]
+    def read_without_encryption(self, cmd_data):
+        status, block_list, service_block_count, _ = \
+            self._parse_block_list(cmd_data, max_blocks=15)
+        if status is not None:
+            return status
 
         block_data = bytearray()
-        for i, service_block_list_item in enumerate(service_block_list):
-            service_code, block_number, block_count = service_block_list_item
+        i = 0
+        while i < len(block_list):
+            service_code, block_number, block_count = block_list[i]
+            service = self.services[service_code]
+            if isinstance(service, MemoryService):
+                count = self._consecutive_blocks(block_list, i)
+                data = service.read_blocks(block_number, count)
+                block_data.extend(data)
+                if len(data) < count * 16:
+                    i += len(data) // 16
+                    return bytearray([1 << (i % 8), 0xA2])
+                i += count
+                continue
             # rb (read begin) and re (read end) mark an atomic read
             rb = bool(block_count == service_block_count[service_code])
             service_block_count[service_code] -= 1
             re = bool(service_block_count[service_code] == 0)
-            read_func, write_func = self.services[service_code]
+            read_func, write_func = service
             one_block_data = read_func(block_number, rb, re)
             if one_block_data is None:
                 return bytearray([1 << (i % 8), 0xA2])
             block_data.extend(one_block_data)
+            i += 1
 
         return bytearray([0, 0, len(block_data)/16]) + block_data
 
     def write_without_encryption(self, cmd_data):
-        service_list = cmd_data.pop(0) * [[None, None]]
-        for i in range(len(service_list)):
-            service_code = cmd_data[1] << 8 | cmd_data[0]
-            if service_code not in self.services.keys():
-                return bytearray([255, 0xA1])
-            service_list[i] = [service_code, 0]
-            del cmd_data[0:2]
-
-        service_block_list = cmd_data.pop(0) * [None]
-        for i in range(len(service_block_list)):
-            try:
-                service_list_item = service_list[cmd_data[0] & 0x0F]
-                service_code = service_list_item[0]
-                service_list_item[1] += 1
-            except IndexError:
-                return bytearray([1 << (i % 8), 0xA3])
-            if cmd_data[0] >= 128:
-                block_number = cmd_data[1]
-                del cmd_data[0:2]
-            else:
-                block_number = cmd_data[2] << 8 | cmd_data[1]
-                del cmd_data[0:3]
-            service_block_list[i] = [service_code, block_number, 0]
-
-        service_block_count = dict(service_list)
-        for service_block_list_item in service_block_list:
-            service_code = service_block_list_item[0]
-            service_block_list_item[2] = service_block_count[service_code]
+        status, block_list, service_block_count, offset = \
+            self._parse_block_list(cmd_data)
+        if status is not None:
+            return status
 
-        block_data = cmd_data[0:]
+        block_data = cmd_data[offset:]
         if len(block_data) % 16 != 0:
             return bytearray([255, 0xA2])
 
-        for i, service_block_list_item in enumerate(service_block_list):
-            service_code, block_number, block_count = service_block_list_item
+        i = 0
+        while i < len(block_list):
+            service_code, block_number, block_count = block_list[i]
+            service = self.services[service_code]
+            if isinstance(service, MemoryService):
+                count = self._consecutive_blocks(block_list, i)
+                data = block_data[i*16:(i+count)*16]
+                written = service.write_blocks(block_number, data)
+                if written < count:
+                    i += written
+                    return bytearray([1 << (i % 8), 0xA2])
+                i += count
+                continue
             # wb (write begin) and we (write end) mark an atomic write
             wb = bool(block_count == service_block_count[service_code])
             service_block_count[service_code] -= 1
             we = bool(service_block_count[service_code] == 0)
-            read_func, write_func = self.services[service_code]
+            read_func, write_func = service
             if not write_func(block_number, block_data[i*16:(i+1)*16], wb, we):
                 return bytearray([1 << (i % 8), 0xA2])
+            i += 1
 
         return bytearray([0, 0])
 
@@ -23,8 +23,9 @@ import nfc.tag
 from . import tt3
 
 import os
+import json
 from binascii import hexlify
-from pyDes import triple_des, CBC
+from .crypto import triple_des_cbc_encrypt
 from struct import pack, unpack
 import itertools
 
@@ -32,6 +33,53 @@ import logging
 log = logging.getLogger(__name__)
 
 
+class ServiceMapCache(object):
+    """A directory of files with the area and service definitions found
+    on FeliCa Standard cards. Cards of the same IC type that carry
+    the same system usually have the same service map, which can
+    then be verified with a few commands instead of walking through
+    all service indices. A cache instance must be assigned to
+    :attr:`FelicaStandard.service_map_cache` to be used. ::
+
+        import nfc.tag.tt3_sony
+        cache = nfc.tag.tt3_sony.ServiceMapCache("~/.cache/nfcpy")
+        nfc.tag.tt3_sony.FelicaStandard.service_map_cache = cache
+
+    """
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def _filename(self, pmm, system_code):
+        name = "felica-{0}-{1:04X}.json".format(
+            hexlify(pmm[0:2]).upper(), system_code)
+        return os.path.join(self.path, name)
+
+    def load(self, pmm, system_code):
+        """Return the service map stored for the IC type given by the
+        first two bytes of *pmm* and *system_code*, or :const:`None`
+        if there is no (readable) cache entry.
+
+        """
+        try:
+            with open(self._filename(pmm, system_code)) as f:
+                return [tuple(item) for item in json.load(f)]
+        except (IOError, ValueError, TypeError) as error:
+            log.debug("no service map cache entry ({0})".format(error))
+
+    def save(self, pmm, system_code, service_map):
+        """Store *service_map* for the IC type given by the first two
+        bytes of *pmm* and *system_code*.
+
+        """
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            with open(self._filename(pmm, system_code), "w") as f:
+                json.dump([list(item) for item in service_map], f)
+        except (IOError, OSError) as error:
+            log.warning("can not store service map ({0})".format(error))
+
+
 def activate(clf, target):
     # http://www.sony.net/Products/felica/business/tech-support/list.html
     ic_code = target.sensf_res[10]
@@ -71,10 +119,15 @@ class FelicaStandard(tt3.Type3Tag):
         0x35: ("RC-SA00/2",  1,  1),
     }
 
+    #: A :class:`ServiceMapCache` used by :meth:`search_service_map`
+    #: or :const:`None` to not keep service maps across tags.
+    service_map_cache = None
+
     def __init__(self, clf, target):
         super(FelicaStandard, self).__init__(clf, target)
         self._product = "FeliCa Standard ({0})".format(
             self.IC_CODE_MAP[self.pmm[1]][0])
+        self._service_maps = dict()
 
     def _is_present(self):
         # Perform a presence check. Modern FeliCa cards implement the
@@ -181,13 +234,12 @@ class FelicaStandard(tt3.Type3Tag):
             area_stack = []
             overlap_services = []
 
-            # Walk through the list of services by index. The first
-            # index for which there is no service returns None and
-            # terminate the loop.
-            for service_index in itertools.count():  # pragma: no branch
-                assert service_index < 0x10000
+            # Walk through the list of services and areas in index
+            # order. The None appended to the service map terminates
+            # the loop.
+            service_map = self._iterate_service_map()
+            for area_or_service in itertools.chain(service_map, [None]):
                 depth = len(area_stack)
-                area_or_service = self.search_service_code(service_index)
                 if area_or_service is None:
                     # Went beyond the service index. Print overlap
                     # services if any and exit loop.
@@ -322,6 +374,76 @@ class FelicaStandard(tt3.Type3Tag):
             unpack_format = "<H" if len(data) == 2 else "<HH"
             return unpack(unpack_format, data)
 
+    def search_service_map(self):
+        """Return all area and service definitions of the active system.
+
+        The list returned contains the :meth:`search_service_code`
+        results for all service indices in order, i.e. tuples of area
+        code and last service index for areas and one-tuples with the
+        service code for services. The list is built only once per
+        system and tag. If a :attr:`service_map_cache` is set and has
+        an entry for the same IC type and system code, a sample of the
+        cached areas and services is verified with a single
+        :meth:`request_service` command and the end of the list with
+        one :meth:`search_service_code` command. Only if that fails
+        are all service indices searched and the cache entry updated.
+
+        Command execution errors raise :exc:`~nfc.tag.TagCommandError`.
+
+        """
+        return list(self._iterate_service_map())
+
+    def _iterate_service_map(self):
+        # Yield the service map entries of the active system. When
+        # the service indices must be searched, entries are yielded
+        # as they are found so that dump() can read service data in
+        # between.
+        service_map = self._service_maps.get(self.sys)
+        cache = self.service_map_cache
+        if service_map is None and cache is not None:
+            service_map = cache.load(self.pmm, self.sys)
+            if service_map is not None:
+                if self._verify_service_map(service_map):
+                    log.debug("using cached service map for system "
+                              "{0:04X}".format(self.sys))
+                    self._service_maps[self.sys] = service_map
+                else:
+                    service_map = None
+
+        if service_map is not None:
+            for area_or_service in service_map:
+                yield area_or_service
+            return
+
+        service_map = []
+        for service_index in itertools.count():  # pragma: no branch
+            assert service_index < 0x10000
+            area_or_service = self.search_service_code(service_index)
+            if area_or_service is None:
+                break
+            service_map.append(area_or_service)
+            yield area_or_service
+
+        self._service_maps[self.sys] = service_map
+        if cache is not None:
+            cache.save(self.pmm, self.sys, service_map)
+
+    def _verify_service_map(self, service_map):
+        # Check that a sample of at most 8 cached areas and services,
+        # evenly spaced back from the last one, exists on the card and
+        # that the service index after the last one is unused.
+        step = max(1, len(service_map) // 8)
+        sample = service_map[::-step][:8][::-1]
+        node_list = [tt3.ServiceCode(item[0] >> 6, item[0] & 0x3F)
+                     for item in sample]
+        try:
+            if node_list and 0xFFFF in self.request_service(node_list):
+                return False
+            return self.search_service_code(len(service_map)) is None
+        except tt3.Type3TagCommandError as error:
+            log.debug("can not verify service map ({0})".format(error))
+            return False
+
     def request_system_code(self):
         """Return all system codes that are registered in the card.
 
@@ -346,6 +468,101 @@ class FelicaStandard(tt3.Type3Tag):
             raise tt3.Type3TagCommandError(tt3.DATA_SIZE_ERROR)
         return [unpack(">H", data[i:i+2])[0] for i in range(1, len(data), 2)]
 
+    def batch_read_without_encryption(self, requests):
+        """Read data blocks from one or more unencrypted services.
+
+        Each item of the *requests* sequence is a tuple of a
+        :class:`~nfc.tag.tt3.ServiceCode` and an iterable of block
+        numbers (a range, for example). The blocks of all requests
+        are packed into as few Read Without Encryption commands as
+        the maximum number of blocks per command of the card and the
+        frame size of the reader allow, with blocks from up to 16
+        services in one command. The return value is a list with the
+        data read for each request, in request order. ::
+
+            sc1 = nfc.tag.tt3.ServiceCode(68, 0x0B)
+            sc2 = nfc.tag.tt3.ServiceCode(92, 0x0F)
+            balance, history = tag.batch_read_without_encryption(
+                [(sc1, range(1)), (sc2, range(20))])
+
+        Command execution errors raise :exc:`~nfc.tag.TagCommandError`.
+
+        """
+        max_blocks = self._max_read_blocks()
+        max_size = min(self.clf.max_send_data_size, 255) - 10
+        service_list, block_list, owners = [], [], []
+        results = [bytearray() for _ in requests]
+
+        def read_without_encryption():
+            data = self.read_without_encryption(service_list, block_list)
+            for i, owner in enumerate(owners):
+                results[owner].extend(data[i*16:(i+1)*16])
+            del service_list[:], block_list[:], owners[:]
+
+        for owner, (sc, block_numbers) in enumerate(requests):
+            for number in block_numbers:
+                codes = [int(x) for x in service_list]
+                sx = codes.index(int(sc)) if int(sc) in codes else len(codes)
+                bc = tt3.BlockCode(number, service=sx)
+                size = (2 + 2 * max(sx + 1, len(codes)) + len(bc.pack())
+                        + sum([len(x.pack()) for x in block_list]))
+                if block_list and (len(block_list) == max_blocks or
+                                   sx == 16 or size > max_size):
+                    read_without_encryption()
+                    sx, bc = 0, tt3.BlockCode(number, service=0)
+                if sx == len(service_list):
+                    service_list.append(sc)
+                block_list.append(bc)
+                owners.append(owner)
+
+        if block_list:
+            read_without_encryption()
+        return results
+
+    def _max_read_blocks(self):
+        # The number of blocks in one Read Without Encryption command
+        # is limited by the card and by the response frame size (13
+        # header bytes plus 16 bytes per block).
+        nbr = self.IC_CODE_MAP.get(self.pmm[1], (None, 1, 1))[1]
+        frame_size = min(self.clf.max_recv_data_size, 255)
+        return max(1, min(nbr, (frame_size - 13) // 16))
+
+    def _read_service_data(self, sc):
+        # Read up to 8 blocks per command. When a block does not
+        # exist the card stops and sets the bit for the position of
+        # that block in Status Flag 1, which is unambiguous for up to
+        # 8 blocks, so that the remaining blocks can be read with one
+        # more command. For other errors we continue one by one.
+        def read_blocks(number, count):
+            block_list = [tt3.BlockCode(number + i) for i in range(count)]
+            data = self.read_without_encryption([sc], block_list)
+            return [data[i:i+16] for i in range(0, len(data), 16)]
+
+        number, count, end = 0, min(self._max_read_blocks(), 8), 0x10000
+        while number < end and count > 1:
+            try:
+                blocks = read_blocks(number, min(count, end - number))
+            except tt3.Type3TagCommandError as error:
+                flag = error.errno >> 8
+                if error.errno <= 0xFF or flag & (flag - 1) or end < 0x10000:
+                    break
+                end = number + flag.bit_length() - 1
+                continue
+            for data in blocks:
+                yield data
+            number += len(blocks)
+        else:
+            if number >= end:
+                return
+
+        for number in itertools.count(number):  # pragma: no branch
+            assert number < 0x10000
+            try:
+                yield self.read_without_encryption(
+                    [sc], [tt3.BlockCode(number)])
+            except tt3.Type3TagCommandError:
+                return
+
 
 class FelicaMobile(FelicaStandard):
     """Mobile FeliCa is a modification of FeliCa for use in mobile
@@ -486,8 +703,9 @@ class FelicaLite(tt3.Type3Tag):
         # reversed order.
         assert len(data) % 8 == 0 and len(key) == 16 and len(iv) == 8
         key = bytes(key[8:] + key[:8]) if flip_key else bytes(key)
-        txt = [''.join(reversed(x)) for x in zip(*[iter(bytes(data))]*8)]
-        return triple_des(key, CBC, bytes(iv)).encrypt(''.join(txt))[:-9:-1]
+        data = bytes(data)
+        txt = ''.join([data[i:i+8][::-1] for i in xrange(0, len(data), 8)])
+        return triple_des_cbc_encrypt(key, iv, txt)[:-9:-1]
 
     def protect(self, password=None, read_protect=False, protect_from=0):
         """Protect a FeliCa Lite Tag.
@@ -598,7 +816,7 @@ class FelicaLite(tt3.Type3Tag):
         # The session key becomes the triple_des encryption of the random
         # challenge under the card key and with an initialization vector of
         # all zero.
-        sk = triple_des(key, CBC, 8 * '\0').encrypt(rc)
+        sk = triple_des_cbc_encrypt(key, 8 * '\0', rc)
         log.debug("sk1 = " + sk[:8].encode("hex"))
         log.debug("sk2 = " + sk[8:].encode("hex"))
 
@@ -33,6 +33,37 @@ log = logging.getLogger(__name__)
 ndef_aid_v1 = bytearray.fromhex("D2760000850100")
 ndef_aid_v2 = bytearray.fromhex("D2760000850101")
 
+# ISO/IEC 14443-4 frame sizes for FSDI/FSCI 0 to 12, higher are RFU.
+frame_size_table = (16, 24, 32, 40, 48, 64, 96, 128, 256,
+                    512, 1024, 2048, 4096)
+
+
+def select_frame_size_index(clf):
+    # Return the largest FSDI that the local device can receive.
+    max_recv, fsdi = clf.max_recv_data_size, 0
+    for i, fsd in enumerate(frame_size_table):
+        if fsd <= max_recv:
+            fsdi = i
+    if frame_size_table[fsdi] < 256:
+        log.warning("{0} does not support fsd 256".format(clf))
+    return fsdi
+
+
+def select_bitrate_divisor(clf, target, bitrate_capability):
+    # Return the highest divisor D (0 => 106, 1 => 212, 2 => 424, 3
+    # => 848 kbps) that the local device supports and the remote
+    # target announced for both directions in the bit rate
+    # capability byte (TA(1) of the ATS or SENSB_RES protocol info).
+    if bitrate_capability & 0x77 == 0:
+        return 0
+    supported = clf.supported_bitrates
+    for divisor in (3, 2, 1):
+        brty = "{0}{1}".format(106 << divisor, target.brty[-1])
+        mask = (1 << (divisor - 1)) | (1 << (divisor + 3))
+        if brty in supported and bitrate_capability & mask == mask:
+            return divisor
+    return 0
+
 
 class Type4TagCommandError(nfc.tag.TagCommandError):
     """Type 4 Tag exception class. Beyond the generic error values from
@@ -187,29 +218,67 @@ class Type4Tag(nfc.tag.Tag):
     """
     TYPE = "Type4Tag"
 
+    def __init__(self, clf, target):
+        super(Type4Tag, self).__init__(clf, target)
+        self._extended_length_support = False
+        self._apdu_count = 0
+        # The application and elementary file that are known to be
+        # selected on the card. Any SELECT command and any error
+        # status or transmission error invalidates this knowledge.
+        self._selected_aid = None
+        self._selected_fid = None
+        self._ndef_aid = None
+
+    @property
+    def apdu_count(self):
+        """Number of command APDUs sent to the tag since activation."""
+        return self._apdu_count
+
     class NDEF(nfc.tag.Tag.NDEF):
         # Type 4 Tag specific implementation of the NDEF access type
         # class that is returned by the Tag.ndef attribute.
 
         def _select_ndef_application(self):
-            for self._aid in (ndef_aid_v2, ndef_aid_v1):
+            if self.tag._selected_aid is not None:
+                self._aid = self.tag._selected_aid
+                log.debug("ndef application is selected")
+                return True
+
+            aid_list = (ndef_aid_v2, ndef_aid_v1)
+            if self.tag._ndef_aid is not None:
+                aid_list = (self.tag._ndef_aid,)
+
+            for self._aid in aid_list:
                 try:
                     self.tag.send_apdu(0, 0xA4, 0x04, 0x00, self._aid)
                     log.debug("selected " + hexlify(self._aid))
+                    self.tag._selected_aid = self._aid
+                    self.tag._ndef_aid = self._aid
                     return True
                 except Type4TagCommandError as error:
                     if error.errno <= 0:
                         break
 
         def _select_fid(self, fid):
+            fid = bytearray(fid)
+            if self.tag._selected_fid == fid:
+                log.debug("file %s is selected", hexlify(fid))
+                return True
+
             p2 = 0x00 if self._aid == ndef_aid_v1 else 0x0C
             try:
                 self.tag.send_apdu(0, 0xA4, 0x00, p2, fid)
                 log.debug("selected " + hexlify(fid))
+                self.tag._selected_aid = self._aid
+                self.tag._selected_fid = fid
                 return True
             except Type4TagCommandError:
                 log.debug("failed to select " + hexlify(fid))
 
+        def _select_ndef_file(self):
+            return (self._select_ndef_application() and
+                    self._select_fid(self._ndef_file))
+
         def _read_binary(self, offset, size):
             (p1, p2) = pack(">H", offset)
             max_data = min(self._max_le, size)
@@ -223,9 +292,35 @@ class Type4Tag(nfc.tag.Tag):
             self.tag.send_apdu(0, 0xD6, p1, p2, data[:max_data])
             return max_data
 
+        def _read_capability_container(self):
+            # Read CCLEN and the capabilities up to the end of the
+            # NDEF file control TLV with a single READ BINARY. Tags
+            # that reject an Le beyond the file size are read in two
+            # steps, first CCLEN and then the capabilities.
+            try:
+                data = self._read_binary(0, 17)
+            except Type4TagCommandError as error:
+                if error.errno <= 0:
+                    raise
+                log.debug("capability file read with le 17 failed")
+            else:
+                if len(data) < 2:
+                    log.debug("error reading capability length")
+                    return None
+                cclen = unpack(">H", data[0:2])[0]
+                return data[2:max(min(cclen, 17), 2)]
+
+            cclen = self._read_binary(0, 2)
+            if not (cclen and len(cclen) == 2):
+                log.debug("error reading capability length")
+                return None
+
+            cclen = unpack(">H", cclen)[0]
+            return self._read_binary(2, min(cclen-2, 15))
+
         def _discover_ndef(self):
             self._max_lc = 1
-            self._max_le = 15
+            self._max_le = 17
 
             log.debug("select ndef application")
             if not self._select_ndef_application():
@@ -238,13 +333,7 @@ class Type4Tag(nfc.tag.Tag):
                 return False
 
             log.debug("read ndef capability file")
-            cclen = self._read_binary(0, 2)
-            if not (cclen and len(cclen) == 2):
-                log.debug("error reading capability length")
-                return False
-
-            cclen = unpack(">H", cclen)[0]
-            capabilities = self._read_binary(2, min(cclen-2, 15))
+            capabilities = self._read_capability_container()
 
             if capabilities is None or len(capabilities) < 13:
                 log.warning("insufficient capability data")
@@ -272,8 +361,18 @@ class Type4Tag(nfc.tag.Tag):
             log.debug("ndef file read flag is %d", rf)
             log.debug("ndef file write flag is %d", wf)
 
-            self._max_le = mle
-            self._max_lc = mlc
+            # NDEF mapping 3.0 requires extended length APDU support
+            # if MLe or MLc exceed the short length field encoding.
+            self.tag._extended_length_support = bool(
+                ver >> 4 >= 3 and (mle > 255 or mlc > 255))
+            if self.tag._extended_length_support:
+                self._max_le = min(mle, 65535)
+                self._max_lc = min(mlc, 65535)
+            else:
+                self._max_le = min(mle, 256)
+                self._max_lc = min(mlc, 255)
+            log.debug("effective max read length %d", self._max_le)
+
             self._capacity = mfs - tag + 2
             self._readable = bool(rf == 0)
             self._writeable = bool(wf == 0)
@@ -291,32 +390,50 @@ class Type4Tag(nfc.tag.Tag):
                     return None
 
                 log.debug("select ndef data file")
-                if not self._select_fid(self._ndef_file):
+                if not self._select_ndef_file():
                     log.warning("ndef file select error")
                     return None
 
+                # The first READ BINARY returns NLEN together with up
+                # to a short Le of NDEF data, as far as MLe and the file
+                # size permit. Only the part of the NLEN octets that is
+                # still missing is then read, not the whole file.
                 log.debug("read ndef data file")
+                apdu_count = self.tag.apdu_count
                 lfmt = ">I" if self._nlen_size == 4 else ">H"
-                nlen = self._read_binary(0, self._nlen_size)
-                if len(nlen) != self._nlen_size:
+                size = self._nlen_size + min(self._capacity, 256)
+                data = self._read_binary(0, size)
+                if len(data) < self._nlen_size:
                     return None
 
-                nlen = unpack(lfmt, nlen)[0]
+                nlen = unpack(lfmt, data[0:self._nlen_size])[0]
                 log.debug("ndef data length is {0}".format(nlen))
 
-                data = bytearray()
+                data = data[self._nlen_size:self._nlen_size+nlen]
                 while len(data) < nlen:
                     offset = self._nlen_size + len(data)
                     data += self._read_binary(offset, nlen - len(data))
 
+                self._read_apdu_count = self.tag.apdu_count - apdu_count
+                log.debug("read ndef data with {0} apdu".format(
+                    self._read_apdu_count))
+
             except Type4TagCommandError:
                 return None
             else:
                 return data
 
+        @property
+        def read_apdu_count(self):
+            """Number of READ BINARY APDUs used for the last NDEF read."""
+            return getattr(self, "_read_apdu_count", 0)
+
         def _write_ndef_data(self, data):
             log.debug("write ndef data")
 
+            if not self._select_ndef_file():
+                raise Type4TagCommandError(0x6A82)
+
             lfmt = ">I" if self._nlen_size == 4 else ">H"
             nlen = bytearray(pack(lfmt, len(data)))
             if len(nlen) + len(data) <= self._max_lc:
@@ -335,6 +452,9 @@ class Type4Tag(nfc.tag.Tag):
             return True
 
         def _wipe_ndef_data(self, wipe=None):
+            if not self._select_ndef_file():
+                raise Type4TagCommandError(0x6A82)
+
             lfmt = ">I" if self._nlen_size == 4 else ">H"
             nlen = bytearray(pack(lfmt, 0))
             self._update_binary(0, nlen)
@@ -345,6 +465,9 @@ class Type4Tag(nfc.tag.Tag):
 
         def _dump_ndef_data(self):
             lines = []
+            if not self._select_ndef_file():
+                return lines
+
             for offset in itertools.count(0, 16):  # pragma: no branch
                 try:
                     line = self._read_binary(offset, 16)
@@ -485,16 +608,34 @@ class Type4Tag(nfc.tag.Tag):
                 le = 0 if mrl == 65536 else mrl
                 apdu += pack(">H", le) if data else pack(">xH", le)
 
-        apdu = self.transceive(apdu)
+        if ins == 0xA4:
+            self._invalidate_selection()
+
+        self._apdu_count += 1
+        try:
+            apdu = self.transceive(apdu)
+        except Type4TagCommandError:
+            self._invalidate_selection()
+            raise
 
         if not apdu or len(apdu) < 2:
+            self._invalidate_selection()
             raise Type4TagCommandError(nfc.tag.PROTOCOL_ERROR)
 
+        if apdu[-2] not in (0x90, 0x61, 0x62, 0x63):
+            self._invalidate_selection()
+
         if check_status and apdu[-2:] != b"\x90\x00":
             raise Type4TagCommandError.from_status(apdu[-2:])
 
         return apdu[:-2] if check_status else apdu
 
+    def _invalidate_selection(self):
+        if self._selected_aid is not None:
+            log.debug("forget selected application and file")
+        self._selected_aid = None
+        self._selected_fid = None
+
     def __str__(self):
         s = "{tag.__class__.__name__} MIU={tag._dep.miu} FWT={tag._dep.fwt:f}"
         return s.format(tag=self)
@@ -506,23 +647,26 @@ class Type4ATag(Type4Tag):
         self._nfcid = bytearray(target.sdd_res)
 
         log.debug("send RATS command to activate the Type 4A Tag")
-        if self.clf.max_recv_data_size < 256:
-            log.warning("{0} does not support fsd 256".format(self.clf))
-            rats_cmd = bytearray.fromhex("E0 70")
-        else:
-            rats_cmd = bytearray.fromhex("E0 80")
+        fsdi = select_frame_size_index(self.clf)
+        rats_cmd = bytearray([0xE0, fsdi << 4])
         rats_res = self.clf.exchange(rats_cmd, timeout=0.03)
         log.debug("rcvd RATS response: {0}".format(hexlify(rats_res)))
 
-        fsci, fwti = rats_res[1] & 0x0F, rats_res[3] >> 4
-        if fsci > 8:
+        # The ATS format byte T0 indicates presence of the interface
+        # bytes TA(1), TB(1) and TC(1) in this order.
+        t0 = rats_res[1]
+        ta = rats_res[2] if t0 & 0x10 else 0x00
+        tb = rats_res[2 + bool(t0 & 0x10)] if t0 & 0x20 else 0x40
+
+        fsci, fwti = t0 & 0x0F, tb >> 4
+        if fsci > 12:
             log.warning("FSCI with RFU value in RATS_RES")
             fsci = 8
         if fwti > 14:
             log.warning("FWI with RFU value in RATS_RES")
             fwti = 4
 
-        fsc = (16, 24, 32, 40, 48, 64, 96, 128, 256)[fsci]
+        fsc = frame_size_table[fsci]
         fwt = 4096 / 13.56E6 * (2**fwti)
 
         if fsc > self.clf.max_send_data_size:
@@ -532,8 +676,22 @@ class Type4ATag(Type4Tag):
         log.debug("max command frame size is {0:d} byte".format(fsc))
         log.debug("max frame waiting time is {0:f}".format(fwt))
 
+        divisor = select_bitrate_divisor(self.clf, target, ta)
+        if divisor > 0:
+            brty = "{0}A".format(106 << divisor)
+            log.debug("send PPS command to switch to {0}".format(brty))
+            pps_cmd = bytearray([0xD0, 0x11, divisor << 2 | divisor])
+            try:
+                pps_res = self.clf.exchange(pps_cmd, timeout=0.03)
+            except nfc.clf.CommunicationError as error:
+                log.warning("PPS failed with {0!r}".format(error))
+            else:
+                if pps_res == pps_cmd[0:1]:
+                    target.brty = brty
+                else:
+                    log.warning("invalid PPS response")
+
         self._dep = IsoDepInitiator(clf, fsc, fwt)
-        self._extended_length_support = False
 
 
 class Type4BTag(Type4Tag):
@@ -541,24 +699,30 @@ class Type4BTag(Type4Tag):
         super(Type4BTag, self).__init__(clf, target)
         self._nfcid = bytearray(target.sensb_res[1:5])
 
+        # The ATTRIB command param 2 encodes the bit rates to use
+        # after activation in the upper and FSDI in the lower nibble.
+        fsdi = select_frame_size_index(self.clf)
+        divisor = select_bitrate_divisor(self.clf, target, target.sensb_res[9])
+        param2 = divisor << 6 | divisor << 4 | fsdi
+
         log.debug("send ATTRIB command to activate the Type 4B Tag")
-        if self.clf.max_recv_data_size < 256:
-            log.warning("{0} does not support fsd 256".format(self.clf))
-            attrib_cmd = b'\x1D' + self._nfcid + b'\x00\x07\x01\x00'
-        else:
-            attrib_cmd = b'\x1D' + self._nfcid + b'\x00\x08\x01\x00'
+        attrib_cmd = b'\x1D' + self._nfcid + bytearray([0, param2, 1, 0])
         attrib_res = self.clf.exchange(attrib_cmd, timeout=0.03)
         log.debug("rcvd ATTRIB response {0}".format(hexlify(attrib_res)))
 
+        if divisor > 0:
+            target.brty = "{0}B".format(106 << divisor)
+            log.debug("communication bitrate is {0}".format(target.brty))
+
         fsci, fwti = target.sensb_res[10] >> 4, target.sensb_res[11] >> 4
-        if fsci > 8:
+        if fsci > 12:
             log.warning("FSCI with RFU value in SENSB_RES")
             fsci = 8
         if fwti > 14:
             log.warning("FWI with RFU value in SENSB_RES")
             fwti = 4
 
-        fsc = (16, 24, 32, 40, 48, 64, 96, 128, 256)[fsci]
+        fsc = frame_size_table[fsci]
         fwt = 4096 / 13.56E6 * (2**fwti)
 
         if fsc > self.clf.max_send_data_size:
@@ -569,7 +733,194 @@ class Type4BTag(Type4Tag):
         log.debug("max frame waiting time is {0:f}".format(fwt))
 
         self._dep = IsoDepInitiator(clf, fsc, fwt)
-        self._extended_length_support = False
+
+
+class Type4TagEmulation(nfc.tag.TagEmulation):
+    """Framework for Type 4 Tag emulation.
+
+    The emulation runs the ISO-DEP block protocol for a Type 4A Tag
+    that was activated by RATS and serves the NDEF Tag Application
+    with the capability container file E103h and the NDEF file E104h
+    from the :attr:`ndef_file` bytearray. A RATS command passed on by
+    the driver is answered with the target's ``rats_res`` attribute or
+    a default ATS. The NDEF file content is
+    the 2 byte NLEN followed by the NDEF message; its length is the
+    maximum NDEF file size announced in the capability container.
+    UPDATE BINARY commands write directly into the bytearray unless
+    :attr:`writeable` is False.
+
+    """
+    SW_SUCCESS = bytearray(b"\x90\x00")
+    SW_WRONG_LENGTH = bytearray(b"\x67\x00")
+    SW_SECURITY_STATUS = bytearray(b"\x69\x82")
+    SW_NO_CURRENT_EF = bytearray(b"\x69\x86")
+    SW_NOT_FOUND = bytearray(b"\x6A\x82")
+    SW_WRONG_P1P2 = bytearray(b"\x6A\x86")
+    SW_WRONG_OFFSET = bytearray(b"\x6B\x00")
+    SW_INS_NOT_SUPPORTED = bytearray(b"\x6D\x00")
+    SW_CLA_NOT_SUPPORTED = bytearray(b"\x6E\x00")
+
+    def __init__(self, clf, target):
+        self.target = target
+        self.cmd = target.tt4_cmd
+        self.clf = clf
+        # The frame size the reader announced with RATS, less the
+        # PCB, CID and EDC bytes, is the most INF we may send.
+        fsdi = target.rats_cmd[1] >> 4 if target.rats_cmd else 8
+        self._max_inf = frame_size_table[min(fsdi, 8)] - 4
+        self._pni = 1
+        self._chain = bytearray()
+        self._rsp = bytearray()
+        self._rsp_offset = 0
+        self._last_block = None
+        self._application_selected = False
+        self._selected_file = None
+        self._writeable = True
+        self._capability_container = bytearray(15)
+        self.ndef_file = bytearray(b"\x00\x00") + bytearray(1022)
+
+    def __str__(self):
+        """x.__str__() <==> str(x)"""
+        return "Type4TagEmulation UID={0} FILE={1}".format(
+            hexlify(self.target.sdd_res), len(self._ndef_file))
+
+    @property
+    def ndef_file(self):
+        """The NDEF file content as a bytearray of NLEN and message."""
+        return self._ndef_file
+
+    @ndef_file.setter
+    def ndef_file(self, ndef_file):
+        if not 2 <= len(ndef_file) <= 0x7FFF:
+            raise ValueError("ndef file size must be from 2 to 32767 byte")
+        self._ndef_file = ndef_file
+        self._selected_file = None
+        self._update_capability_container()
+
+    @property
+    def writeable(self):
+        """If False then UPDATE BINARY on the NDEF file is refused."""
+        return self._writeable
+
+    @writeable.setter
+    def writeable(self, value):
+        self._writeable = bool(value)
+        self._update_capability_container()
+
+    def _update_capability_container(self):
+        # Updated in place, the file may be selected.
+        self._capability_container[:] = pack(
+            ">HBHHBBHHBB", 15, 0x20, 255, 255, 4, 6, 0xE104,
+            len(self._ndef_file), 0, 0 if self._writeable else 255)
+
+    def process_command(self, cmd):
+        log.debug("cmd: " + (hexlify(cmd) if cmd else str(cmd)))
+        if not cmd:
+            return None
+        pcb = cmd[0]
+        if pcb == 0xE0 and len(cmd) == 2:
+            # RATS when the driver did not already answer it
+            log.debug("rcvd RATS_CMD " + hexlify(cmd))
+            self._max_inf = frame_size_table[min(cmd[1] >> 4, 8)] - 4
+            return self.target.rats_res or bytearray(b"\x05\x78\x80\x70\x02")
+        cid = cmd[1:2] if pcb & 0x08 else cmd[0:0]
+        if pcb & 0xE2 == 0x02:
+            # I-block, chained blocks are collected until the last
+            self._pni = pcb & 1
+            self._chain += cmd[1+len(cid):]
+            if pcb & 0x10:
+                return self._block(0xA2, cid)
+            apdu, self._chain = self._chain, bytearray()
+            self._rsp = self.process_apdu(apdu)
+            self._rsp_offset = 0
+            return self._next_block(cid)
+        if pcb & 0xE6 == 0xA2:
+            # R-block, answer R(ACK) for the next response chunk or
+            # R(NAK) to poll for presence, otherwise retransmit.
+            if pcb & 1 != self._pni:
+                if pcb & 0x10:
+                    return self._block(0xA2, cid)
+                if self._rsp_offset < len(self._rsp):
+                    self._pni ^= 1
+                    return self._next_block(cid)
+            return self._last_block
+        if pcb & 0xF7 == 0xC2:
+            # S(DESELECT) is answered with S(DESELECT)
+            self._chain = bytearray()
+            self._rsp, self._rsp_offset = bytearray(), 0
+            return cmd[0:1+len(cid)]
+        log.debug("no response to block {0:02x}".format(pcb))
+
+    def _block(self, pcb, cid, data=None):
+        block = bytearray([pcb | self._pni | (0x08 if cid else 0)]) + cid
+        return block + data if data else block
+
+    def _next_block(self, cid):
+        offset = self._rsp_offset
+        self._rsp_offset = min(offset + self._max_inf, len(self._rsp))
+        more = self._rsp_offset < len(self._rsp)
+        data = self._rsp[offset:self._rsp_offset]
+        self._last_block = self._block(0x12 if more else 0x02, cid, data)
+        return self._last_block
+
+    def send_response(self, rsp, timeout):
+        log.debug("rsp: " + (hexlify(rsp) if rsp is not None else 'None'))
+        return self.clf.exchange(rsp, timeout)
+
+    def process_apdu(self, apdu):
+        """Process a command *apdu* and return the response apdu."""
+        if len(apdu) < 4:
+            return self.SW_WRONG_LENGTH
+        if apdu[0] != 0:
+            return self.SW_CLA_NOT_SUPPORTED
+        ins, p1, p2 = apdu[1], apdu[2], apdu[3]
+        if ins == 0xA4:
+            return self._select(p1, p2, apdu[5:5+apdu[4]] if apdu[4:] else '')
+        if ins == 0xB0:
+            le = (apdu[4] or 256) if len(apdu) == 5 else 256
+            return self._read_binary(p1 << 8 | p2, le)
+        if ins == 0xD6:
+            data = apdu[5:5+apdu[4]] if apdu[4:] else ''
+            return self._update_binary(p1 << 8 | p2, data)
+        return self.SW_INS_NOT_SUPPORTED
+
+    def _select(self, p1, p2, data):
+        if p1 == 0x04:
+            log.debug("select application " + hexlify(data))
+            self._application_selected = data in (ndef_aid_v2, ndef_aid_v1)
+            self._selected_file = None
+            if self._application_selected:
+                return self.SW_SUCCESS
+            return self.SW_NOT_FOUND
+        if p1 == 0x00 and p2 in (0x00, 0x0C):
+            log.debug("select file " + hexlify(data))
+            self._selected_file = None
+            if self._application_selected:
+                if data == b"\xE1\x03":
+                    self._selected_file = self._capability_container
+                elif data == b"\xE1\x04":
+                    self._selected_file = self._ndef_file
+            if self._selected_file is not None:
+                return self.SW_SUCCESS
+            return self.SW_NOT_FOUND
+        return self.SW_WRONG_P1P2
+
+    def _read_binary(self, offset, le):
+        if self._selected_file is None:
+            return self.SW_NO_CURRENT_EF
+        if offset > len(self._selected_file):
+            return self.SW_WRONG_OFFSET
+        return self._selected_file[offset:offset+le] + self.SW_SUCCESS
+
+    def _update_binary(self, offset, data):
+        if self._selected_file is None:
+            return self.SW_NO_CURRENT_EF
+        if self._selected_file is not self._ndef_file or not self._writeable:
+            return self.SW_SECURITY_STATUS
+        if offset + len(data) > len(self._selected_file):
+            return self.SW_WRONG_OFFSET
+        self._selected_file[offset:offset+len(data)] = data
+        return self.SW_SUCCESS
 
 
 def activate(clf, target):
@@ -473,6 +473,67 @@ class TestChipset(object):
 
 
 class TestDevice(object):
+    @pytest.mark.parametrize("brty, bitrates", [
+        ('106A', ['106A', '212A', '424A']),
+        ('106B', ['106B', '212B', '424B']),
+        ('212F', ['212F']),
+    ])
+    def test_get_supported_bitrates(self, device, brty, bitrates):
+        target = nfc.clf.RemoteTarget(brty)
+        assert device.get_supported_bitrates(target) == bitrates
+
+    def test_reactivate_with_rf_field_on(self, device):
+        device.chipset.transport.read.side_effect = [
+            ACK(), self.reg_rsp('8080'),                  # ReadRegister
+            ACK(), RSP('09 00'),                          # WriteRegister
+            ACK(), RSP('43 00 4400'),                     # InCommunicateThru
+            ACK(), RSP('09 00'),                          # WriteRegister
+            ACK(), RSP('43 00 04'),                       # InCommunicateThru
+            ACK(), RSP('43 00 00'),                       # InCommunicateThru
+            ACK(), RSP('09 00'),                          # WriteRegister
+            ACK(), RSP('09 00'),                          # WriteRegister
+        ]
+        target = nfc.clf.RemoteTarget('106A', sdd_res=HEX('01020304050607'))
+        target = device.reactivate(target)
+        assert target.sens_res == HEX('4400')
+        assert target.sel_res == HEX('00')
+        assert target.sdd_res == HEX('01020304050607')
+        assert device.chipset.transport.write.mock_calls == [call(_) for _ in [
+            CMD('06 63026303'),                           # ReadRegister
+            CMD('08 630200 630300 633d07'),               # WriteRegister
+            CMD('42 52'),                                 # InCommunicateThru
+            CMD('08 630280 630380 633d00'),               # WriteRegister
+            CMD('42 937088010203 88'),                    # InCommunicateThru
+            CMD('42 957004050607 00'),                    # InCommunicateThru
+            CMD('08 630280 630380 633d00'),               # WriteRegister
+            CMD('08 630300'),                             # WriteRegister
+        ]]
+
+    @pytest.mark.parametrize("wupa_rsp, sel_rsp, target", [
+        ('43 01', None, None),
+        ('43 00 4400', '43 01', None),
+        ('43 02', '43 00 20', nfc.clf.RemoteTarget(
+            '106A', sens_res=HEX('4400'), sel_res=HEX('20'),
+            sdd_res=HEX('01020304'))),
+    ])
+    def test_reactivate_wupa_response(self, device, wupa_rsp, sel_rsp,
+                                      target):
+        device.chipset.transport.read.side_effect = [
+            ACK(), self.reg_rsp('8080'),                  # ReadRegister
+            ACK(), RSP('09 00'),                          # WriteRegister
+            ACK(), RSP(wupa_rsp),                         # InCommunicateThru
+        ] + ([
+            ACK(), RSP('09 00'),                          # WriteRegister
+            ACK(), RSP(sel_rsp),                          # InCommunicateThru
+        ] if sel_rsp else []) + [
+            ACK(), RSP('09 00'),                          # WriteRegister
+        ]
+        known = nfc.clf.RemoteTarget('106A', sens_res=HEX('4400'),
+                                     sdd_res=HEX('01020304'))
+        assert device.reactivate(known) == target
+        assert device.chipset.transport.write.mock_calls[-1] == call(
+            CMD('08 630280 630380 633d00'))               # WriteRegister
+
     def test_sense_tta_no_target_found(self, device):
         device.chipset.transport.read.side_effect = [
             ACK(), RSP('4B 00'),                          # InListPassiveTarget
@@ -637,6 +698,89 @@ class TestDevice(object):
             CMD('4A 010100ffff0100'),                     # InListPassiveTarget
         ]]
 
+    def test_inventory_tta_two_targets_found(self, device):
+        target_1 = '0044 00 04 01020304'
+        target_2 = '0044 00 04 11121314'
+        if device.chipset.in_list_passive_target_max_target > 1:
+            device.chipset.transport.read.side_effect = [
+                ACK(), RSP('4B 0201' + target_1 +
+                           '   02' + target_2),       # InListPassiveTarget
+                ACK(), RSP('43 01'),                      # InCommunicateThru
+                ACK(), RSP('4B 00'),                      # InListPassiveTarget
+            ]
+            commands = [
+                CMD('4A 0200'),                           # InListPassiveTarget
+                CMD('42 5000'),                           # InCommunicateThru
+                CMD('4A 0200'),                           # InListPassiveTarget
+            ]
+        else:
+            device.chipset.transport.read.side_effect = [
+                ACK(), RSP('4B 0101' + target_1),         # InListPassiveTarget
+                ACK(), RSP('43 01'),                      # InCommunicateThru
+                ACK(), RSP('4B 0101' + target_2),         # InListPassiveTarget
+                ACK(), RSP('43 01'),                      # InCommunicateThru
+                ACK(), RSP('4B 0101' + target_1),         # InListPassiveTarget
+            ]
+            commands = [
+                CMD('4A 0100'),                           # InListPassiveTarget
+                CMD('42 5000'),                           # InCommunicateThru
+                CMD('4A 0100'),                           # InListPassiveTarget
+                CMD('42 5000'),                           # InCommunicateThru
+                CMD('4A 0100'),                           # InListPassiveTarget
+            ]
+        targets = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+        assert [t.sdd_res for t in targets] == [
+            HEX('01020304'), HEX('11121314')]
+        assert [t.sens_res for t in targets] == [HEX('4400'), HEX('4400')]
+        assert [t.sel_res for t in targets] == [HEX('00'), HEX('00')]
+        assert device.chipset.transport.write.mock_calls == [
+            call(_) for _ in commands]
+
+    def test_inventory_ttf_two_targets_found(self, device):
+        sensf_res_1 = '01 0102030405060708 F1F2F3F4F5F6F7F8 AABB'
+        sensf_res_2 = '01 1112131415161718 F1F2F3F4F5F6F7F8 AABB'
+        sensf_req = HEX('00FFFF010F')
+        if device.chipset.in_list_passive_target_max_target > 1:
+            device.chipset.transport.read.side_effect = [
+                ACK(), self.reg_rsp('03'),                # ReadRegister
+                ACK(), RSP('4B 0201 14' + sensf_res_1 +
+                           '   02 14' + sensf_res_2),    # InListPassiveTarget
+            ]
+            commands = [
+                CMD('06 6304'),                           # ReadRegister
+                CMD('4A 020100ffff010f'),                 # InListPassiveTarget
+            ]
+        else:
+            device.chipset.transport.read.side_effect = [
+                ACK(), self.reg_rsp('03'),                # ReadRegister
+                ACK(), RSP('4B 0101 14' + sensf_res_1),   # InListPassiveTarget
+                ACK(), self.reg_rsp('03'),                # ReadRegister
+                ACK(), RSP('4B 0101 14' + sensf_res_2),   # InListPassiveTarget
+                ACK(), self.reg_rsp('03'),                # ReadRegister
+                ACK(), RSP('4B 0101 14' + sensf_res_1),   # InListPassiveTarget
+                ACK(), self.reg_rsp('03'),                # ReadRegister
+                ACK(), RSP('4B 00'),                      # InListPassiveTarget
+            ]
+            commands = 4 * [
+                CMD('06 6304'),                           # ReadRegister
+                CMD('4A 010100ffff010f'),                 # InListPassiveTarget
+            ]
+        target = nfc.clf.RemoteTarget('212F', sensf_req=sensf_req)
+        targets = device.inventory_ttf(target)
+        assert [t.brty for t in targets] == ['212F', '212F']
+        assert [t.sensf_res for t in targets] == [
+            HEX(sensf_res_1), HEX(sensf_res_2)]
+        assert device.chipset.transport.write.mock_calls == [
+            call(_) for _ in commands]
+
+    def test_inventory_ttf_no_target_found(self, device):
+        device.chipset.transport.read.side_effect = [
+            ACK(), self.reg_rsp('03'),                    # ReadRegister
+            ACK(), RSP('4B 00'),                          # InListPassiveTarget
+        ]
+        target = nfc.clf.RemoteTarget('212F', sensf_req=HEX('00FFFF0103'))
+        assert device.inventory_ttf(target) == []
+
     def test_sense_ttf_unsupported_bitrate(self, device):
         with pytest.raises(ValueError) as excinfo:
             device.sense_ttf(nfc.clf.RemoteTarget('100F'))
@@ -0,0 +1,101 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.bench
+
+import pytest
+from pytest_mock import mocker  # noqa: F401
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.bench").setLevel(logging_level)
+
+
+@pytest.fixture()
+def registry(mocker):
+    registry = nfc.bench.registry.__class__()
+    mocker.patch('nfc.bench.registry', registry)
+    return registry
+
+
+class TestBenchmark:
+    def test_register_and_measure(self, registry):
+        calls = []
+
+        @nfc.bench.benchmark("test.count", unit="B")
+        def count():
+            """Count to ten."""
+            calls.append("setup")
+            yield lambda: 10
+            calls.append("teardown")
+
+        bench = registry["test.count"]
+        assert str(bench) == "test.count (B/s)"
+        assert bench.doc == "Count to ten."
+        result = bench.measure(min_time=0, repeat=2)
+        assert calls == ["setup", "teardown"]
+        assert result['group'] == "micro"
+        assert result['unit'] == "B"
+        assert len(result['rates']) == 2
+        assert result['rate'] == max(result['rates']) > 0
+
+    def test_measure_with_run_timer(self, registry):
+        clock = [0.0]
+
+        @nfc.bench.benchmark("test.timer", unit="card")
+        def count():
+            def run():
+                clock[0] += 0.5
+                return 2
+            run.timer = lambda: clock[0]
+            yield run
+
+        result = registry["test.timer"].measure(min_time=1.0, repeat=2)
+        assert result['rates'] == [4.0, 4.0]
+
+    def test_skip_benchmark(self, registry):
+        @nfc.bench.benchmark("test.skip")
+        def skip():
+            raise nfc.bench.Skip("not here")
+            yield
+
+        result = registry["test.skip"].measure(min_time=0, repeat=1)
+        assert result == {'group': "micro", 'unit': "op",
+                          'skipped': "not here"}
+
+    def test_select_benchmarks(self, registry):
+        for name, group in (("a.x", "micro"), ("a.y", "macro"),
+                            ("b.x", "micro")):
+            nfc.bench.benchmark(name, group=group)(lambda: iter([]))
+        select = nfc.bench.select
+        assert [b.name for b in select()] == ["a.x", "a.y", "b.x"]
+        assert [b.name for b in select(["a.*"])] == ["a.x", "a.y"]
+        names = [b.name for b in select(["*.x", "a.y"])]
+        assert names == ["a.x", "a.y", "b.x"]
+        assert [b.name for b in select(group="micro")] == ["a.x", "b.x"]
+        assert [b.name for b in select(["a.*"], "macro")] == ["a.y"]
+
+
+def test_compare_with_baseline():
+    results = {'a': {'rate': 80.0}, 'b': {'rate': 95.0},
+               'c': {'rate': 120.0}, 'd': {'skipped': "no"},
+               'e': {'rate': 1.0}}
+    baseline = {'a': {'rate': 100.0}, 'b': {'rate': 100.0},
+                'c': {'rate': 100.0}, 'd': {'rate': 100.0}}
+    verdicts = nfc.bench.compare(results, baseline, threshold=0.1)
+    assert sorted(verdicts) == ['a', 'b', 'c']
+    assert verdicts['a'] == (0.8, "regressed")
+    assert verdicts['b'] == (0.95, "unchanged")
+    assert verdicts['c'] == (1.2, "improved")
+
+
+@pytest.mark.parametrize("name", [
+    bench.name for bench in nfc.bench.select(group="micro")
+] + [
+    "tag.read.ntag215", "tag.write.type4", "clf.inventory",
+    "clf.inventory.212F", "dep.exchange",
+])
+def test_run_benchmark(name):
+    result = nfc.bench.registry[name].measure(min_time=0, repeat=1)
+    assert 'skipped' in result or result['rate'] > 0
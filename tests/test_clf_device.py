@@ -59,10 +59,52 @@ class TestDevice(object):
         with pytest.raises(NotImplementedError):
             device.sense_ttb(nfc.clf.RemoteTarget('106B'))
 
+    def test_reactivate(self, device, mocker):  # noqa: F811
+        mocker.patch.object(device, 'mute')
+        mocker.patch.object(device, 'sense_tta').return_value = 'target'
+        target = nfc.clf.RemoteTarget('424A', sdd_res=HEX('01020304'))
+        assert device.reactivate(target) == 'target'
+        assert device.mute.call_count == 1
+        sense_target = device.sense_tta.call_args[0][0]
+        assert sense_target.brty == '106A'
+        assert sense_target.sel_req == HEX('01020304')
+
+    @pytest.mark.parametrize("target", [
+        nfc.clf.RemoteTarget('106A'),
+        nfc.clf.RemoteTarget('106B', sdd_res=HEX('01020304')),
+    ])
+    def test_reactivate_unsupported_target(self, device, target):
+        with pytest.raises(nfc.clf.UnsupportedTargetError):
+            device.reactivate(target)
+
     def test_sense_ttf(self, device):
         with pytest.raises(NotImplementedError):
             device.sense_ttf(nfc.clf.RemoteTarget('212F'))
 
+    def test_inventory_tta(self, device, mocker):  # noqa: F811
+        found = nfc.clf.RemoteTarget('106A', sdd_res=HEX('01020304'))
+        mocker.patch.object(device, 'sense_tta').side_effect = [found, None]
+        target = nfc.clf.RemoteTarget('106A')
+        assert device.inventory_tta(target) == [found]
+        assert device.inventory_tta(target) == []
+
+    def test_inventory_ttf(self, device, mocker):  # noqa: F811
+        found = [nfc.clf.RemoteTarget('212F', sensf_res=HEX(_)) for _ in (
+            '01 0102030405060708 F1F2F3F4F5F6F7F8',
+            '01 0102030405060708 F1F2F3F4F5F6F7F8',
+            '01 1112131415161718 F1F2F3F4F5F6F7F8')]
+        mocker.patch.object(device, 'sense_ttf').side_effect = found + [None]
+        target = nfc.clf.RemoteTarget('212F', sensf_req=HEX('00FFFF0107'))
+        assert device.inventory_ttf(target) == [found[0], found[2]]
+        assert device.sense_ttf.call_count == 4
+
+    def test_inventory_ttf_single_time_slot(self, device, mocker):  # noqa
+        found = nfc.clf.RemoteTarget('212F', sensf_res=HEX(17 * '01'))
+        mocker.patch.object(device, 'sense_ttf').return_value = found
+        target = nfc.clf.RemoteTarget('212F')
+        assert device.inventory_ttf(target) == [found]
+        assert device.sense_ttf.call_count == 1
+
     def test_sense_dep(self, device):
         with pytest.raises(NotImplementedError):
             device.sense_dep(nfc.clf.RemoteTarget('106A'))
@@ -99,6 +141,11 @@ class TestDevice(object):
         with pytest.raises(NotImplementedError):
             device.get_max_recv_data_size(nfc.clf.LocalTarget())
 
+    def test_get_supported_bitrates(self, device):
+        target = nfc.clf.RemoteTarget('106A')
+        assert device.get_supported_bitrates(target) == ['106A']
+        assert device.get_supported_bitrates(None) == []
+
     def test_turn_on_led_and_buzzer(self, device):
         assert device.turn_on_led_and_buzzer() is None
 
@@ -215,3 +262,18 @@ def test_connect_udp(mocker, device):  # noqa: F811
     device = nfc.clf.device.connect('udp:remotehost:12345')
     assert isinstance(device, nfc.clf.device.Device)
     assert device.path == "udp:remotehost:12345"
+
+
+def test_connect_sim(mocker):  # noqa: F811
+    mocker.patch('nfc.clf.transport.USB')
+    mocker.patch('nfc.clf.transport.USB.find').return_value = None
+    mocker.patch('nfc.clf.transport.TTY')
+    mocker.patch('nfc.clf.transport.TTY.find').return_value = None
+    device = nfc.clf.device.connect('sim')
+    assert isinstance(device, nfc.clf.device.Device)
+    assert device.path == "sim:ntag215"
+    device = nfc.clf.device.connect('sim:tt1,tt3')
+    assert isinstance(device, nfc.clf.device.Device)
+    assert device.path == "sim:tt1,tt3"
+    assert len(device.tags) == 2
+    assert nfc.clf.device.connect('sim:unknown') is None
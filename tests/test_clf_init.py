@@ -366,6 +366,75 @@ class TestContactlessFrontend(object):
     def test_sense_without_targets(self, clf):
         assert clf.sense() is None
 
+    def test_reactivate_without_device(self, clf):
+        clf.device = None
+        with pytest.raises(IOError) as excinfo:
+            clf.reactivate(nfc.clf.RemoteTarget('106A'))
+        assert excinfo.value.errno == errno.ENODEV
+
+    def test_reactivate_target(self, clf):
+        target = nfc.clf.RemoteTarget('106A', sdd_res=HEX('01020304'))
+        clf.device.reactivate.return_value = target
+        assert clf.reactivate(target) is target
+        assert clf.target is target
+        clf.device.reactivate.assert_called_once_with(target)
+        assert clf.device.mute.call_count == 0
+
+    def test_reactivate_communication_error(self, clf):
+        target = nfc.clf.RemoteTarget('106A', sdd_res=HEX('01020304'))
+        clf.device.reactivate.side_effect = nfc.clf.ProtocolError
+        assert clf.reactivate(target) is None
+        assert clf.target is None
+
+    def test_inventory_without_device(self, clf):
+        clf.device = None
+        with pytest.raises(IOError) as excinfo:
+            clf.inventory(nfc.clf.RemoteTarget('212F'))
+        assert excinfo.value.errno == errno.ENODEV
+
+    def test_inventory_with_invalid_target(self, clf):
+        with pytest.raises(ValueError) as excinfo:
+            clf.inventory(nfc.clf.LocalTarget())
+        assert str(excinfo.value).startswith("invalid target argument type")
+
+    def test_inventory_with_unsupported_technology(self, clf):
+        with pytest.raises(nfc.clf.UnsupportedTargetError) as excinfo:
+            clf.inventory(nfc.clf.RemoteTarget('106B'))
+        assert str(excinfo.value) == \
+            "no inventory for technology type in '106B'"
+
+    def test_inventory_tta(self, clf):
+        found = [nfc.clf.RemoteTarget('106A', sdd_res=HEX('01020304')),
+                 nfc.clf.RemoteTarget('106A', sdd_res=HEX('11121314'))]
+        clf.device.inventory_tta.return_value = found
+        target = nfc.clf.RemoteTarget('106A')
+        assert clf.inventory(target) == found
+        assert clf.target is None
+        clf.device.inventory_tta.assert_called_once_with(target)
+
+    def test_inventory_ttf_default_sensf_req(self, clf):
+        found = [nfc.clf.RemoteTarget('212F', sensf_res=HEX(17 * '01')),
+                 nfc.clf.RemoteTarget('212F', sensf_res=HEX(17 * '02'))]
+        clf.device.inventory_ttf.return_value = found
+        assert clf.inventory(nfc.clf.RemoteTarget('424F')) == found
+        assert clf.target is found[0]
+        target = clf.device.inventory_ttf.call_args[0][0]
+        assert target.brty == '424F'
+        assert target.sensf_req == HEX('00FFFF010F')
+        assert clf.device.mute.call_count == 1
+
+    def test_inventory_ttf_with_sensf_req(self, clf):
+        target = nfc.clf.RemoteTarget('212F', sensf_req=HEX('0012FC0003'))
+        clf.device.inventory_ttf.return_value = []
+        assert clf.inventory(target) == []
+        assert clf.target is None
+        clf.device.inventory_ttf.assert_called_once_with(target)
+
+    def test_inventory_ttf_communication_error(self, clf):
+        clf.device.inventory_ttf.side_effect = nfc.clf.TransmissionError
+        assert clf.inventory(nfc.clf.RemoteTarget('212F')) == []
+        assert clf.target is None
+
     def test_sense_without_device(self, clf):
         clf.device = None
         with pytest.raises(IOError) as excinfo:
@@ -526,6 +595,23 @@ class TestContactlessFrontend(object):
             clf.max_recv_data_size()
         assert excinfo.value.errno == errno.ENODEV
 
+    def test_supported_bitrates_without_device(self, clf):
+        clf.device = None
+        with pytest.raises(IOError) as excinfo:
+            clf.supported_bitrates
+        assert excinfo.value.errno == errno.ENODEV
+
+    def test_response_time_estimator(self, clf):
+        assert clf.adaptive_timeouts is False
+        assert clf.response_time_estimator('Type2Tag', 0x30) is None
+        clf.adaptive_timeouts = True
+        estimator = clf.response_time_estimator('Type2Tag', 0x30)
+        assert isinstance(estimator, nfc.tag.ResponseTimeEstimator)
+        assert clf.response_time_estimator('Type2Tag', 0x30) is estimator
+        assert clf.response_time_estimator('Type2Tag', 0xA2) is not estimator
+        clf.close()
+        assert clf.response_time_estimator('Type2Tag', 0x30) is not estimator
+
     def test_format_string_without_device(self, clf):
         clf.device = None
         assert str(clf).startswith("<nfc.clf.ContactlessFrontend object")
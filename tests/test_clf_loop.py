@@ -0,0 +1,243 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc
+import nfc.clf
+import nfc.clf.loop
+import nfc.dep
+
+import os
+import threading
+import pytest
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.clf").setLevel(logging_level)
+logging.getLogger("nfc.clf.loop").setLevel(logging_level)
+
+
+def HEX(s):
+    return bytearray.fromhex(s)
+
+
+ATR_REQ = HEX('D400 30313233343536373839 00000032 46666D010111')
+ATR_RES = HEX('D501 66f6e98d1c13dfe56de4 0000000732 46666d010110')
+
+
+@pytest.fixture()
+def channel(request):
+    return "test-{0}".format(request.node.name)
+
+
+@pytest.fixture()
+def initiator(channel):
+    clf = nfc.ContactlessFrontend("loop:" + channel)
+    yield clf
+    clf.close()
+
+
+@pytest.fixture()
+def target(channel):
+    clf = nfc.ContactlessFrontend("loop:" + channel)
+    yield clf
+    clf.close()
+
+
+def in_thread(func, *args):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func(*args)))
+    thread.start()
+    return thread, result
+
+
+class TestPipe:
+    def test_put_get(self):
+        pipe = nfc.clf.loop.Pipe()
+        data = HEX('0102')
+        pipe.put(data)
+        assert pipe.get(0.1) is data
+
+    def test_get_timeout(self):
+        with pytest.raises(nfc.clf.TimeoutError):
+            nfc.clf.loop.Pipe().get(0.01)
+
+    def test_get_wakeup(self):
+        pipe = nfc.clf.loop.Pipe()
+        timer = threading.Timer(0.05, pipe.put, (HEX('01'),))
+        timer.start()
+        assert pipe.get(1.0) == HEX('01')
+        timer.join()
+
+    def test_put_does_not_block_on_full_pipe(self):
+        pipe = nfc.clf.loop.Pipe()
+        for i in range(100000):
+            pipe.put(i)
+        assert [pipe.get(0.1) for i in range(100000)] == list(range(100000))
+        with pytest.raises(nfc.clf.TimeoutError):
+            pipe.get(0.01)
+
+    def test_clear(self):
+        pipe = nfc.clf.loop.Pipe()
+        pipe.put(HEX('01'))
+        pipe.put(HEX('02'))
+        pipe.clear()
+        with pytest.raises(nfc.clf.TimeoutError):
+            pipe.get(0.01)
+        pipe.put(HEX('03'))
+        assert pipe.get(0.1) == HEX('03')
+
+
+class TestDevice:
+    def test_init(self, initiator, channel):
+        assert str(initiator.device) == \
+            "nfcpy Loopback LOOP at loop:" + channel
+        assert initiator.device.get_max_send_data_size(None) == 290
+        assert initiator.device.get_max_recv_data_size(None) == 290
+
+    def test_connect_default_channel(self):
+        device = nfc.clf.device.connect('loop')
+        assert device.path == "loop"
+        assert device.channel is nfc.clf.loop.channels['']
+        device.close()
+        assert '' not in nfc.clf.loop.channels
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"),
+                        reason="requires /proc/self/fd")
+    def test_close_releases_channel(self, channel):
+        fds = len(os.listdir("/proc/self/fd"))
+        initiator = nfc.ContactlessFrontend("loop:" + channel)
+        target = nfc.ContactlessFrontend("loop:" + channel)
+        assert nfc.clf.loop.channels[channel].devices == 2
+        assert len(os.listdir("/proc/self/fd")) == fds + 4
+        initiator.close()
+        assert channel in nfc.clf.loop.channels
+        target.close()
+        target.close()
+        assert channel not in nfc.clf.loop.channels
+        assert len(os.listdir("/proc/self/fd")) == fds
+
+    def test_sense_passive(self, initiator):
+        assert initiator.sense(nfc.clf.RemoteTarget('106A')) is None
+        assert initiator.sense(nfc.clf.RemoteTarget('106B')) is None
+        assert initiator.sense(nfc.clf.RemoteTarget('212F')) is None
+
+    def test_sense_dep_unsupported_bitrate(self, initiator):
+        with pytest.raises(nfc.clf.UnsupportedTargetError):
+            initiator.sense(nfc.clf.RemoteTarget('106B', atr_req=ATR_REQ))
+
+    def test_sense_dep_without_target(self, initiator):
+        assert initiator.sense(nfc.clf.RemoteTarget(
+            '106A', atr_req=ATR_REQ)) is None
+
+    def test_sense_dep_without_target_queues_nothing(self, initiator):
+        for i in range(20):
+            assert initiator.sense(nfc.clf.RemoteTarget(
+                '106A', atr_req=ATR_REQ)) is None
+        assert len(initiator.device.channel.to_target._frames) == 0
+
+    @pytest.mark.parametrize("listen", ['listen_tta', 'listen_ttb',
+                                        'listen_ttf'])
+    def test_listen_unsupported(self, target, listen):
+        with pytest.raises(nfc.clf.UnsupportedTargetError):
+            getattr(target.device, listen)(nfc.clf.LocalTarget(), 0.1)
+
+    def test_listen_dep_timeout(self, target):
+        assert target.listen(nfc.clf.LocalTarget(atr_res=ATR_RES), 0.01) \
+            is None
+
+    @pytest.mark.parametrize("brty", ['106A', '212F', '424F'])
+    def test_activate_and_exchange(self, initiator, target, brty):
+        thread, result = in_thread(
+            target.listen, nfc.clf.LocalTarget(atr_res=ATR_RES), 1.0)
+        found = initiator.sense(nfc.clf.RemoteTarget(brty, atr_req=ATR_REQ))
+        assert found.atr_res == ATR_RES
+        assert found.atr_req == ATR_REQ
+        frame = nfc.clf.loop.frame(brty, HEX('D406 00'))
+        initiator.device.send_cmd_recv_rsp(found, frame, 0)
+        thread.join()
+        activated = result[0]
+        assert activated.brty == brty
+        assert activated.atr_req == ATR_REQ
+        assert activated.dep_req == HEX('D406 00')
+
+        response = nfc.clf.loop.frame(brty, HEX('D507 00'))
+        command = nfc.clf.loop.frame(brty, HEX('D406 01'))
+        thread, result = in_thread(target.exchange, response, 1.0)
+        assert initiator.exchange(command, 1.0) is response
+        thread.join()
+        assert result[0] is command
+
+    def test_activate_with_psl(self, initiator, target):
+        thread, result = in_thread(
+            target.listen, nfc.clf.LocalTarget(atr_res=ATR_RES), 1.0)
+        found = initiator.sense(nfc.clf.RemoteTarget('106A', atr_req=ATR_REQ))
+        rsp = initiator.exchange(nfc.clf.loop.frame('106A', HEX('D404001203')),
+                                 1.0)
+        assert rsp == nfc.clf.loop.frame('106A', HEX('D50500'))
+        found.brty = '424F'
+        initiator.device.send_cmd_recv_rsp(
+            found, nfc.clf.loop.frame('424F', HEX('D406 00')), 0)
+        thread.join()
+        assert result[0].brty == '424F'
+        assert result[0].psl_req == HEX('D404001203')
+        assert result[0].psl_res == HEX('D50500')
+
+    @pytest.mark.parametrize("req, res", [
+        ('D40800', 'D50900'), ('D40A00', 'D50B00'),
+    ])
+    def test_activate_with_release(self, initiator, target, req, res):
+        thread, result = in_thread(
+            target.listen, nfc.clf.LocalTarget(atr_res=ATR_RES), 1.0)
+        initiator.sense(nfc.clf.RemoteTarget('212F', atr_req=ATR_REQ))
+        rsp = initiator.exchange(nfc.clf.loop.frame('212F', HEX(req)), 1.0)
+        assert rsp == nfc.clf.loop.frame('212F', HEX(res))
+        thread.join()
+        assert result[0] is None
+
+    def test_initiator_mute_breaks_link(self, initiator, target):
+        thread, result = in_thread(
+            target.listen, nfc.clf.LocalTarget(atr_res=ATR_RES), 1.0)
+        found = initiator.sense(nfc.clf.RemoteTarget('212F', atr_req=ATR_REQ))
+        initiator.device.send_cmd_recv_rsp(
+            found, nfc.clf.loop.frame('212F', HEX('D406 00')), 0)
+        thread.join()
+        initiator.device.mute()
+        with pytest.raises(nfc.clf.BrokenLinkError):
+            target.exchange(nfc.clf.loop.frame('212F', HEX('D507 00')), 1.0)
+
+    def test_late_response_is_dropped(self, initiator, target):
+        atr_req = nfc.clf.RemoteTarget('212F', atr_req=ATR_REQ)
+        assert initiator.sense(atr_req) is None
+        thread, result = in_thread(
+            target.listen, nfc.clf.LocalTarget(atr_res=ATR_RES), 1.0)
+        found = initiator.sense(atr_req)
+        assert found.atr_res == ATR_RES
+        initiator.device.send_cmd_recv_rsp(
+            found, nfc.clf.loop.frame('212F', HEX('D406 00')), 0)
+        thread.join()
+        assert result[0].dep_req == HEX('D406 00')
+
+
+class TestDataExchangeProtocol:
+    def test_dep_exchange(self, initiator, target):
+        def run_target():
+            dep = nfc.dep.Target(target)
+            if dep.activate(timeout=1.0, rwt=8, lrt=3) is None:
+                return None
+            data = dep.exchange(None, timeout=1.0)
+            while data:
+                data = dep.exchange(data[::-1], timeout=1.0)
+            return True
+
+        thread, result = in_thread(run_target)
+        dep = nfc.dep.Initiator(initiator)
+        for i in range(10):
+            if dep.activate(None, brs=2, acm=True) is not None:
+                break
+        payload = bytearray(range(256)) * 4
+        for i in range(10):
+            assert dep.exchange(payload, timeout=1.0) == payload[::-1]
+        dep.deactivate(release=True)
+        thread.join()
+        assert result == [True]
@@ -9,6 +9,7 @@ import pytest
 from pytest_mock import mocker  # noqa: F401
 from mock import call
 
+import operator
 import logging
 logging.basicConfig(level=logging.DEBUG-1)
 logging_level = logging.getLogger().getEffectiveLevel()
@@ -396,6 +397,76 @@ class TestChipset(object):
         assert excinfo.value.errno == 1
 
 
+class TypeATags(object):
+    # Stands in for in_set_protocol and in_comm_rf with Type A tags
+    # that run the ISO/IEC 14443-3 anticollision on a bit level.
+    def __init__(self, *tags):
+        self.tags = [dict(sens_res=HEX(sens_res), uid=HEX(uid),
+                          state='IDLE', level=0) for sens_res, uid in tags]
+        self.commands = []
+
+    def in_set_rf(self, brty):
+        pass
+
+    def in_set_protocol(self, data=None, **kwargs):
+        pass
+
+    def uid_cln(self, tag):
+        uid = tag['uid']
+        if len(uid) > 4:
+            uid = b'\x88' + uid
+        if len(uid) > 8:
+            uid = uid[0:4] + b'\x88' + uid[4:]
+        cln = uid[tag['level']*4:tag['level']*4+4]
+        return cln + chr(reduce(operator.xor, cln))
+
+    def answer(self, responses):
+        if len(responses) == 0:
+            raise nfc.clf.rcs380.CommunicationError(HEX('80000000'))
+        if len(set(bytes(r) for r in responses)) > 1:
+            raise nfc.clf.rcs380.CommunicationError(HEX('08000000'))
+        return responses[0]
+
+    def in_comm_rf(self, data, timeout):
+        data = bytearray(data)
+        self.commands.append(data)
+        if data in (HEX('26'), HEX('52')):
+            states = ('IDLE', 'HALT') if data == HEX('52') else ('IDLE',)
+            tags = [tag for tag in self.tags if tag['state'] in states]
+            for tag in tags:
+                tag['state'], tag['level'] = 'READY', 0
+            return self.answer([tag['sens_res'] for tag in tags])
+        if data == HEX('5000'):
+            for tag in self.tags:
+                if tag['state'] == 'ACTIVE':
+                    tag['state'] = 'HALT'
+            return self.answer([])
+        level = (0x93, 0x95, 0x97).index(data[0])
+        tags = [tag for tag in self.tags
+                if tag['state'] == 'READY' and tag['level'] == level]
+        if data[1] == 0x70:
+            responses = []
+            for tag in tags:
+                if self.uid_cln(tag) == data[2:7]:
+                    last = tag['level'] * 3 + 4 >= len(tag['uid'])
+                    tag['state'] = 'ACTIVE' if last else 'READY'
+                    tag['level'] += 1
+                    responses.append(HEX('00') if last else HEX('04'))
+                else:
+                    tag['state'] = 'IDLE'
+            return self.answer(responses)
+        nbits = (data[1] >> 4) * 8 - 16 + (data[1] & 7)
+        nbyte, nbit = divmod(nbits, 8)
+        responses = []
+        for tag in tags:
+            cln = self.uid_cln(tag)
+            mask = (1 << nbit) - 1
+            if (cln[0:nbyte] == data[2:2+nbyte] and
+                    (nbit == 0 or cln[nbyte] & mask == data[2+nbyte] & mask)):
+                responses.append(cln[nbyte:])
+        return self.answer(responses)
+
+
 class TestDevice(object):
     def test_close(self, device):
         chipset = device.chipset
@@ -422,6 +493,15 @@ class TestDevice(object):
     def test_get_max_recv_data_size(self, device):
         assert device.get_max_recv_data_size(None) == 290
 
+    @pytest.mark.parametrize("brty, bitrates", [
+        ('106A', ['106A', '212A', '424A']),
+        ('106B', ['106B', '212B', '424B']),
+        ('212F', ['212F']),
+    ])
+    def test_get_supported_bitrates(self, device, brty, bitrates):
+        target = nfc.clf.RemoteTarget(brty)
+        assert device.get_supported_bitrates(target) == bitrates
+
     #
     # SENSE
     #
@@ -687,6 +767,135 @@ class TestDevice(object):
             CMD('04 360193700102030404'),
         ]]
 
+    def test_reactivate_tt2_with_wupa(self, device):
+        device.chipset.transport.read.side_effect = [
+            ACK(), RSP('01 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 4400'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 00'),
+        ]
+        uid = '01020304'
+        target = nfc.clf.RemoteTarget('106A', sdd_res=HEX(uid))
+        target = device.reactivate(target)
+        assert isinstance(target, nfc.clf.RemoteTarget)
+        assert target.sdd_res == HEX(uid)
+        assert device.chipset.transport.write.mock_calls == [call(_) for _ in [
+            CMD('00 02030f03'),
+            CMD('02 00180101020103000400050006000708'
+                '   080009000a000b000c000e040f001000'
+                '   110012001306'),
+            CMD('02 01000200050100060707'),
+            CMD('04 360152'),
+            CMD('02 04010708'),
+            CMD('02 01010201'),
+            CMD('04 360193700102030404'),
+        ]]
+
+    def test_inventory_tta_two_targets(self, device):
+        device.chipset.transport.read.side_effect = [
+            ACK(), RSP('01 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 4400'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 08000000'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 0012131415'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 00'),
+            ACK(), RSP('05 80000000'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 4400'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 0102030404'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 00'),
+            ACK(), RSP('05 80000000'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 80000000'),
+        ]
+        targets = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+        assert [t.sdd_res for t in targets] == [
+            HEX('00121314'), HEX('01020304')]
+        assert [t.sens_res for t in targets] == [HEX('4400'), HEX('4400')]
+        assert [t.sel_res for t in targets] == [HEX('00'), HEX('00')]
+        assert device.chipset.transport.write.mock_calls == [call(_) for _ in [
+            CMD('00 02030f03'),
+            CMD('02 00180101020103000400050006000708'
+                '   080009000a000b000c000e040f001000'
+                '   110012001306'),
+            CMD('02 01000200050100060707'),
+            CMD('04 360126'),
+            CMD('02 04010708'),
+            CMD('02 0100060002000708'),
+            CMD('04 36019320'),
+            CMD('02 0100060102000701'),
+            CMD('04 36019321 00'),
+            CMD('02 0101060002010708'),
+            CMD('04 360193700012131415'),
+            CMD('04 14005000'),
+            CMD('02 01000200050100060707'),
+            CMD('04 360126'),
+            CMD('02 04010708'),
+            CMD('02 0100060002000708'),
+            CMD('04 36019320'),
+            CMD('02 0101060002010708'),
+            CMD('04 360193700102030404'),
+            CMD('04 14005000'),
+            CMD('02 01000200050100060707'),
+            CMD('04 360126'),
+        ]]
+
+    @pytest.mark.parametrize("sens_res", [
+        '05 08000000', '05 00000000 08 44'])
+    def test_inventory_tta_sens_res_collision(self, device, sens_res):
+        device.chipset.transport.read.side_effect = [
+            ACK(), RSP('01 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP(sens_res),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 0102030404'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 00000000 08 00'),
+            ACK(), RSP('05 80000000'),
+            ACK(), RSP('03 00'),
+            ACK(), RSP('05 80000000'),
+        ]
+        targets = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+        assert [t.sdd_res for t in targets] == [HEX('01020304')]
+        assert [t.sens_res for t in targets] == [HEX('0000')]
+        assert [t.sel_res for t in targets] == [HEX('00')]
+
+    @pytest.mark.parametrize("sens_res", [('4400', '4400'), ('4400', '4200')])
+    def test_inventory_tta_uid_differs_in_late_byte(self, device, sens_res):
+        tags = TypeATags((sens_res[0], '04112233445566'),
+                         (sens_res[1], '041122334455E6'))
+        device.chipset.in_set_rf = tags.in_set_rf
+        device.chipset.in_set_protocol = tags.in_set_protocol
+        device.chipset.in_comm_rf = tags.in_comm_rf
+        targets = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+        assert sorted(t.sdd_res for t in targets) == [
+            HEX('04112233445566'), HEX('041122334455E6')]
+        assert [t.sel_res for t in targets] == [HEX('00'), HEX('00')]
+        assert [tag['state'] for tag in tags.tags] == ['HALT', 'HALT']
+        sdd_req = [cmd for cmd in tags.commands
+                   if cmd[0] in (0x93, 0x95, 0x97) and cmd[1] != 0x70]
+        assert len(sdd_req) == 1 + 1 + 8 * 4 + 2
+        target = device.reactivate(targets[0])
+        assert target.sdd_res == targets[0].sdd_res
+
+    def test_inventory_tta_unsupported_bitrate(self, device):
+        with pytest.raises(nfc.clf.UnsupportedTargetError) as excinfo:
+            device.inventory_tta(nfc.clf.RemoteTarget('106B'))
+        assert str(excinfo.value) == "unsupported bitrate 106B"
+
     def test_sense_tta_tt2_request_uid_7(self, device):
         device.chipset.transport.read.side_effect = [
             ACK(), RSP('01 00'),
@@ -0,0 +1,237 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc
+import nfc.clf
+import nfc.clf.sim
+import nfc.ndef
+
+import pytest
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.clf").setLevel(logging_level)
+logging.getLogger("nfc.clf.sim").setLevel(logging_level)
+
+
+def HEX(s):
+    return bytearray.fromhex(s)
+
+
+@pytest.fixture()
+def clf():
+    clf = nfc.ContactlessFrontend()
+    yield clf
+    clf.close()
+
+
+def connect(clf, device):
+    clf.device = device
+    rdwr_options = {'targets': ['106A', '212F'], 'on-connect': lambda _: False}
+    return clf.connect(rdwr=rdwr_options)
+
+
+class TestTiming:
+    def test_frame_time(self):
+        timing = nfc.clf.sim.Timing()
+        assert round(timing.frame_time('106A', 16) * 1E6) == 1548
+        assert round(timing.frame_time('212F', 16) * 1E6) == 982
+        assert round(timing.frame_time('424F', 16) * 1E6) == 491
+        assert round(timing.frame_time('106B', 16) * 1E6) == 1907
+
+    def test_response_delay(self):
+        timing = nfc.clf.sim.Timing(1E-3, {0xA2: 5E-3})
+        assert timing.response_delay(HEX('3000')) == 1E-3
+        assert timing.response_delay(HEX('A2040000')) == 5E-3
+
+    def test_repr(self):
+        assert repr(nfc.clf.sim.Timing()) == \
+            "Timing(frame_delay=8.6e-05, command_delay={}, error_rate=0.0)"
+
+
+class TestDevice:
+    def test_init(self):
+        device = nfc.clf.sim.init()
+        assert str(device) == "nfcpy Simulator SIM at sim"
+        assert device.get_max_send_data_size(None) == 290
+        assert device.get_max_recv_data_size(None) == 290
+
+    @pytest.mark.parametrize("method, brty", [
+        ('sense_tta', '212A'), ('sense_ttb', '848B'), ('sense_ttf', '106F'),
+        ('sense_dep', '106A'), ('inventory_tta', '212A'),
+        ('inventory_ttf', '106F'),
+    ])
+    def test_sense_unsupported(self, method, brty):
+        device = nfc.clf.sim.init()
+        with pytest.raises(nfc.clf.UnsupportedTargetError):
+            getattr(device, method)(nfc.clf.RemoteTarget(brty))
+
+    @pytest.mark.parametrize("method", [
+        'listen_tta', 'listen_ttb', 'listen_ttf', 'listen_dep',
+    ])
+    def test_listen_unsupported(self, method):
+        device = nfc.clf.sim.init()
+        with pytest.raises(nfc.clf.UnsupportedTargetError):
+            getattr(device, method)(nfc.clf.LocalTarget(), 1.0)
+
+    def test_sense_nothing(self):
+        device = nfc.clf.sim.init(nfc.clf.sim.Type3TagModel())
+        assert device.sense_tta(nfc.clf.RemoteTarget('106A')) is None
+        assert device.sense_ttb(nfc.clf.RemoteTarget('106B')) is None
+        with pytest.raises(nfc.clf.TimeoutError):
+            device.send_cmd_recv_rsp(nfc.clf.RemoteTarget('106A'),
+                                     HEX('3000'), 0.1)
+        assert device.rf_time == 0.1
+
+    def test_sense_with_sel_req(self):
+        tag1 = nfc.clf.sim.Type2TagModel.ntag213(b"\x04" + 6 * b"\x01")
+        tag2 = nfc.clf.sim.Type2TagModel.ntag213(b"\x04" + 6 * b"\x02")
+        device = nfc.clf.sim.init(tag1, tag2)
+        target = nfc.clf.RemoteTarget('106A', sel_req=tag2.uid)
+        assert device.sense_tta(target).sdd_res == tag2.uid
+        target = nfc.clf.RemoteTarget('106A', sel_req=HEX('01020304'))
+        assert device.sense_tta(target) is None
+
+    def test_inventory(self):
+        tags = [nfc.clf.sim.Type2TagModel.ntag213(b"\x04" + 6 * uid)
+                for uid in (b"\x01", b"\x02")]
+        device = nfc.clf.sim.init(nfc.clf.sim.Type3TagModel(), *tags)
+        found = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+        assert [t.sdd_res for t in found] == [tag.uid for tag in tags]
+        found = device.inventory_ttf(nfc.clf.RemoteTarget('212F'))
+        assert len(found) == 1 and found[0].sensf_res[1:3] == HEX('012E')
+        target = device.reactivate(nfc.clf.RemoteTarget(
+            '106A', sdd_res=tags[1].uid))
+        assert target.sdd_res == tags[1].uid
+
+    def test_inventory_tta_anticollision_time(self):
+        def inventory_time(*uids):
+            device = nfc.clf.sim.init(
+                *[nfc.clf.sim.Type2TagModel.ntag213(HEX(uid)) for uid in uids])
+            found = device.inventory_tta(nfc.clf.RemoteTarget('106A'))
+            assert len(found) == len(uids)
+            return device.rf_time
+        one = inventory_time('04010203040506')
+        early = inventory_time('04010203040506', '14010203040506')
+        late = inventory_time('04010203040506', '04010203040586')
+        assert 0 < one < early < late
+
+    def test_inventory_ttf_time_slots(self):
+        tags = [nfc.clf.sim.Type3TagModel(b"\x01\x2E" + 6 * idm)
+                for idm in (b"\x01", b"\x02", b"\x03")]
+        device = nfc.clf.sim.init(*tags, seed=1)
+        target = nfc.clf.RemoteTarget('212F', sensf_req=HEX('00FFFF0000'))
+        assert len(device.inventory_ttf(target)) == 0
+        assert abs(device.rf_time - 2.4E-3) < 1E-9
+        target = nfc.clf.RemoteTarget('212F', sensf_req=HEX('00FFFF00FF'))
+        found = device.inventory_ttf(target)
+        assert 1 <= len(found) <= 3
+        assert len(set(bytes(t.sensf_res[1:9]) for t in found)) == len(found)
+
+    def test_timing(self):
+        tag = nfc.clf.sim.Type2TagModel.ntag213()
+        device = nfc.clf.sim.init(tag)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        assert len(device.send_cmd_recv_rsp(target, HEX('3000'), 0.1)) == 16
+        timing = tag.get_timing('106A')
+        assert abs(device.rf_time - timing.frame_time('106A', 2) -
+                   timing.frame_delay - timing.frame_time('106A', 16)) < 1E-9
+
+    def test_response_delay_exceeds_timeout(self):
+        tag = nfc.clf.sim.Type2TagModel.ntag213()
+        device = nfc.clf.sim.init(tag)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        with pytest.raises(nfc.clf.TimeoutError):
+            device.send_cmd_recv_rsp(target, HEX('A204 01020304'), 0.001)
+        assert tag.memory[16:20] == HEX('01020304')
+
+    def test_error_injection(self):
+        tag = nfc.clf.sim.Type2TagModel.ntag213()
+        tag.timing['106A'] = nfc.clf.sim.Timing(error_rate=0.5)
+        device = nfc.clf.sim.init(tag, seed=0)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        errors = 0
+        for i in range(100):
+            try:
+                device.send_cmd_recv_rsp(target, HEX('3000'), 0.1)
+            except nfc.clf.TransmissionError:
+                errors += 1
+        assert 30 < errors < 70
+
+    def test_realtime(self, mocker):  # noqa: F811
+        sleep = mocker.patch('nfc.clf.sim.time.sleep')
+        device = nfc.clf.sim.init(nfc.clf.sim.Type2TagModel.ntag213(),
+                                  realtime=True)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        device.send_cmd_recv_rsp(target, HEX('3000'), 0.1)
+        assert sum(c[1][0] for c in sleep.mock_calls) == device.rf_time
+
+
+class TestTagModels:
+    @pytest.mark.parametrize("model, tag_type, product", [
+        ("topaz", "Type1Tag", "Topaz (BCM20203T96)"),
+        ("topaz512", "Type1Tag", "Topaz 512 (BCM20203T512)"),
+        ("ntag213", "Type2Tag", "NXP NTAG213"),
+        ("ntag215", "Type2Tag", "NXP NTAG215"),
+        ("ntag216", "Type2Tag", "NXP NTAG216"),
+        ("felica-lite-s", "Type3Tag", "FeliCa Lite-S (RC-S966)"),
+        ("type4", "Type4Tag", "Type4Tag"),
+    ])
+    def test_read_write_ndef(self, clf, model, tag_type, product):
+        device = nfc.clf.sim.init(nfc.clf.sim.MODELS[model]())
+        tag = connect(clf, device)
+        assert tag.type == tag_type
+        assert tag.product == product
+        assert tag.ndef is not None
+        assert tag.ndef.length == 0
+        assert tag.ndef.is_writeable
+        octets = HEX('D1010854 02656E') + bytearray(5 * b'x')
+        tag.ndef.octets = octets
+        assert tag.is_present
+        tag = connect(clf, device)
+        assert tag.ndef.octets == octets
+        assert device.rf_time > 0
+
+    def test_type4_read_only(self, clf):
+        model = nfc.clf.sim.Type4TagModel()
+        model.writeable = False
+        tag = connect(clf, nfc.clf.sim.init(model))
+        assert tag.ndef is not None
+        assert not tag.ndef.is_writeable
+
+    def test_type2_read_only_pages(self):
+        tag = nfc.clf.sim.Type2TagModel.ntag213()
+        device = nfc.clf.sim.init(tag)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        rsp = device.send_cmd_recv_rsp(target, HEX('A200 00000000'), 0.1)
+        assert rsp == HEX('00')
+        with pytest.raises(nfc.clf.TimeoutError):
+            device.send_cmd_recv_rsp(target, HEX('3000'), 0.1)
+        target = device.reactivate(target)
+        assert device.send_cmd_recv_rsp(target, HEX('60'), 0.1) == \
+            HEX('0004040201000F03')
+
+    @pytest.mark.parametrize("cmd, rsp", [
+        ('78 0000 00000000', '124C 01020304'),
+        ('01 08 00 01020304', '08 E1'),
+        ('53 20 AA 01020304', '20 AA'),
+        ('1A 20 55 01020304', '20 55'),
+        ('53 00 AA 01020304', '00 01'),
+        ('02 01 0000000000000000 01020304', '01 E1103F000103F230'),
+        ('54 10 0102030405060708 01020304', '10 0102030405060708'),
+        ('1B 10 F0F0F0F0F0F0F0F0 01020304', '10 F0F0F0F0F0F0F0F0'),
+        ('54 00 0102030405060708 01020304', '00 0102030400000000'),
+    ])
+    def test_type1_commands(self, cmd, rsp):
+        tag = nfc.clf.sim.Type1TagModel.topaz512()
+        device = nfc.clf.sim.init(tag)
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        assert target.rid_res == HEX('124C 01020304')
+        assert device.send_cmd_recv_rsp(target, HEX(cmd), 0.1) == HEX(rsp)
+
+    def test_type1_wrong_uid(self):
+        device = nfc.clf.sim.init(nfc.clf.sim.Type1TagModel.topaz())
+        target = device.sense_tta(nfc.clf.RemoteTarget('106A'))
+        with pytest.raises(nfc.clf.TimeoutError):
+            device.send_cmd_recv_rsp(target, HEX('01 08 00 04030201'), 0.1)
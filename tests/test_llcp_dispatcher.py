@@ -0,0 +1,152 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.llcp
+import nfc.llcp.tco
+import nfc.llcp.pdu
+import nfc.llcp.dispatcher
+
+import errno
+import threading
+import pytest
+from mock import MagicMock
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.llcp").setLevel(logging_level)
+
+
+class Socket(nfc.llcp.Socket):
+    # Socket calls go straight to the transmission control object.
+    def __init__(self, tco):
+        super(Socket, self).__init__(MagicMock(), None)
+        self._tco = tco
+
+    def recv(self):
+        return self._tco.recv()
+
+    def recvfrom(self):
+        return self._tco.recvfrom()
+
+    def accept(self):
+        return Socket(self._tco.accept())
+
+    def send(self, data, flags=0):
+        return self._tco.send(data, flags)
+
+
+@pytest.fixture()
+def dlc():
+    tco = nfc.llcp.tco.DataLinkConnection(128, 7)
+    tco.bind(16)
+    pdu = nfc.llcp.pdu.ConnectionComplete(16, 17, 128, 1)
+    threading.Timer(0.01, tco.enqueue, (pdu,)).start()
+    tco.connect(17)
+    tco.dequeue(128, 0)
+    return Socket(tco)
+
+
+@pytest.fixture()
+def dispatcher():
+    dispatcher = nfc.llcp.Dispatcher()
+    yield dispatcher
+    dispatcher.close()
+
+
+def i_pdu(ns, data):
+    return nfc.llcp.pdu.Information(16, 17, ns, 0, data)
+
+
+class TestFuture:
+    def test_result(self):
+        future = nfc.llcp.dispatcher.Future()
+        assert future.done() is False
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            future.result(0)
+        assert excinfo.value.errno == errno.ETIMEDOUT
+        future.set_result(1)
+        assert future.done() is True
+        assert future.result() == 1
+        assert future.exception() is None
+
+    def test_exception(self):
+        future = nfc.llcp.dispatcher.Future()
+        future.set_exception(nfc.llcp.Error(errno.EPIPE))
+        with pytest.raises(nfc.llcp.Error):
+            future.result()
+        assert future.exception().errno == errno.EPIPE
+
+    def test_done_callback(self):
+        future = nfc.llcp.dispatcher.Future()
+        done = []
+        future.add_done_callback(done.append)
+        future.add_done_callback(lambda future: 1 / 0)
+        assert done == []
+        future.set_result(1)
+        assert done == [future]
+        future.add_done_callback(done.append)
+        assert done == [future, future]
+
+
+class TestDispatcher:
+    def test_recv_in_order(self, dispatcher, dlc):
+        futures = [dispatcher.recv(dlc) for _ in range(2)]
+        assert not any(future.done() for future in futures)
+        dlc._tco.enqueue(i_pdu(0, b'123'))
+        assert futures[0].result(5.0) == b'123'
+        assert futures[1].done() is False
+        dlc._tco.enqueue(i_pdu(1, b'456'))
+        assert futures[1].result(5.0) == b'456'
+
+    def test_recv_connection_closed(self, dispatcher, dlc):
+        future = dispatcher.recv(dlc)
+        dlc._tco.enqueue(nfc.llcp.pdu.Disconnect(16, 17))
+        threading.Timer(0.01, dlc._tco.dequeue, (128, 0)).start()
+        assert future.result(5.0) is None
+
+    def test_send_waits_for_send_window(self, dispatcher, dlc):
+        first = dispatcher.send(dlc, b'123')
+        assert first.result(5.0) is True
+        second = dispatcher.send(dlc, b'456')
+        assert dlc._tco.dequeue(128, 0).data == b'123'
+        assert second.done() is False
+        dlc._tco.enqueue(nfc.llcp.pdu.ReceiveReady(16, 17, nr=1))
+        assert second.result(5.0) is True
+        assert dlc._tco.dequeue(128, 0).data == b'456'
+
+    def test_accept(self, dispatcher):
+        tco = nfc.llcp.tco.DataLinkConnection(128, 1)
+        tco.bind(16)
+        tco.listen(1)
+        future = dispatcher.accept(Socket(tco))
+        tco.enqueue(nfc.llcp.pdu.Connect(16, 32))
+        client = future.result(5.0)
+        assert client._tco.state.ESTABLISHED is True
+        assert client._tco.peer == 32
+
+    def test_callback_submits_next_request(self, dispatcher, dlc):
+        received, done = [], threading.Event()
+
+        def on_recv(future):
+            received.append(future.result())
+            if len(received) < 3:
+                dispatcher.recv(dlc).add_done_callback(on_recv)
+            else:
+                done.set()
+
+        dispatcher.recv(dlc).add_done_callback(on_recv)
+        for ns in range(3):
+            dlc._tco.enqueue(i_pdu(ns, b'%d' % ns))
+        assert done.wait(5.0)
+        assert received == [b'0', b'1', b'2']
+
+    def test_close_cancels_requests(self, dlc):
+        dispatcher = nfc.llcp.Dispatcher()
+        future = dispatcher.recv(dlc)
+        dispatcher.close()
+        assert future.exception(1.0).errno == errno.ESHUTDOWN
+        assert len(dispatcher.selector) == 0
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            dispatcher.recv(dlc)
+        assert excinfo.value.errno == errno.ESHUTDOWN
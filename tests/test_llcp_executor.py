@@ -0,0 +1,156 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.llcp
+import nfc.llcp.executor
+
+import time
+import errno
+import threading
+import pytest
+from mock import MagicMock
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.llcp.executor").setLevel(logging_level)
+
+
+def listening_socket(clients, addr=4):
+    # A listening socket that accepts *clients* and then fails as if
+    # the link was deactivated.
+    socket = MagicMock()
+    socket.getsockname.return_value = addr
+    socket.accept.side_effect = list(clients) + [
+        nfc.llcp.Error(errno.EPIPE)]
+    return socket
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+
+@pytest.fixture()
+def executor():
+    executor = nfc.llcp.ServiceExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+class TestServiceExecutor:
+    def test_listen_runs_handler_for_each_client(self, executor):
+        served = []
+        socket = listening_socket(["a", "b", "c"])
+        executor.listen(socket, served.append)
+        assert wait_until(lambda: executor.metrics[4].completed == 3)
+        assert sorted(served) == ["a", "b", "c"]
+        assert socket.close.call_count == 1
+        metrics = executor.metrics[4]
+        assert metrics.accepted == 3
+        assert metrics.queued == metrics.active == metrics.failed == 0
+        assert metrics.mean_service_time >= 0
+        assert str(metrics).startswith("4 accepted 3 queued 0 active 0")
+        assert executor.workers <= 2
+
+    def test_listen_reuses_workers(self, executor):
+        executor.listen(listening_socket(["a"]), lambda client: None, "x")
+        assert wait_until(lambda: executor.metrics["x"].completed == 1)
+        assert executor.workers == 1
+        executor.listen(listening_socket(["b"]), lambda client: None, "x")
+        assert wait_until(lambda: executor.metrics["x"].completed == 2)
+        assert executor.workers == 1
+        assert executor.metrics["x"].accepted == 2
+
+    def test_connections_wait_for_workers(self, executor):
+        release = threading.Event()
+        executor.listen(listening_socket(range(4)),
+                        lambda client: release.wait(2.0), "svc")
+        metrics = executor.metrics["svc"]
+        assert wait_until(lambda: metrics.active == 2)
+        assert metrics.queued == executor.queue_depth == 2
+        assert executor.max_queue_depth >= 2
+        assert executor.workers == 2
+        release.set()
+        assert wait_until(lambda: metrics.completed == 4)
+        assert executor.queue_depth == 0
+        assert metrics.wait_time > 0
+
+    def test_dispatch_back_to_back_with_one_idle_worker(self, executor):
+        executor.listen(listening_socket(["a"]), lambda client: None, "svc")
+        metrics = executor.metrics["svc"]
+        assert wait_until(lambda: metrics.completed == 1)
+        assert wait_until(lambda: executor._idle == 1)
+        release = threading.Event()
+        with executor._lock:
+            executor.listen(listening_socket(["b", "c"]),
+                            lambda client: release.wait(2.0), "svc")
+            assert executor.workers == 2
+        assert wait_until(lambda: metrics.active == 2)
+        assert executor.queue_depth == 0
+        release.set()
+        assert wait_until(lambda: metrics.completed == 3)
+
+    def test_max_concurrency_limits_accept(self, executor):
+        release = threading.Event()
+        socket = listening_socket(range(3))
+        thread = executor.register(socket, lambda client: release.wait(2.0),
+                                   "svc", max_concurrency=1)
+        metrics = executor.metrics["svc"]
+        assert wait_until(lambda: metrics.active == 1)
+        time.sleep(0.01)
+        assert socket.accept.call_count == 1
+        assert metrics.accepted == 1 and executor.queue_depth == 0
+        release.set()
+        thread.join(2.0)
+        assert not thread.is_alive()
+        assert wait_until(lambda: metrics.completed == 3)
+
+    def test_handler_exception_is_counted(self, executor):
+        def handler(client):
+            raise ValueError(client)
+        executor.listen(listening_socket(["a", "b"]), handler, "svc")
+        metrics = executor.metrics["svc"]
+        assert wait_until(lambda: metrics.completed == 2)
+        assert metrics.failed == 2
+
+    def test_accept_error_other_than_epipe(self, executor):
+        socket = MagicMock()
+        socket.accept.side_effect = nfc.llcp.Error(errno.ENOTSOCK)
+        executor.listen(socket, lambda client: None, "svc")
+        assert socket.close.call_count == 1
+        assert executor.metrics["svc"].accepted == 0
+
+    def test_shutdown_closes_new_connections(self, executor):
+        executor.shutdown()
+        client = MagicMock()
+        executor.listen(listening_socket([client]), lambda c: None, "svc")
+        assert client.close.call_count == 1
+        assert executor.metrics["svc"].accepted == 0
+        assert executor.workers == 0
+
+    def test_shutdown_waits_for_workers(self, executor):
+        release = threading.Event()
+        executor.listen(listening_socket(["a"]),
+                        lambda client: release.wait(2.0), "svc")
+        assert executor.workers == 1
+        threading.Timer(0.01, release.set).start()
+        executor.shutdown(wait=True)
+        assert executor.workers == 0
+        assert executor.metrics["svc"].completed == 1
+
+
+def test_default_executor_is_shared():
+    import nfc.snep
+    import nfc.handover
+    llc = MagicMock()
+    llc.socket.return_value = None
+    snep_server = nfc.snep.SnepServer(llc)
+    handover_server = nfc.handover.HandoverServer(llc, max_concurrency=2)
+    assert snep_server.executor is nfc.llcp.executor.default
+    assert handover_server.executor is nfc.llcp.executor.default
+    assert handover_server.max_concurrency == 2
+    executor = nfc.llcp.ServiceExecutor()
+    assert nfc.snep.SnepServer(llc, executor=executor).executor is executor
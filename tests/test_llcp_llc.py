@@ -303,6 +303,25 @@ class TestLogicalLinkController:
             assert isinstance(pdu, nfc.llcp.pdu.Information)
             assert pdu.dsap == 17 and pdu.ssap == 32 and pdu.data == b'123'
 
+        def test_sendmsg_with_invalid_socket_type(self, llc, ldl):
+            with pytest.raises(nfc.llcp.Error) as excinfo:
+                llc.sendmsg(object(), [b'123'], nfc.llcp.MSG_DONTWAIT)
+            assert excinfo.value.errno == errno.ENOTSOCK
+            with pytest.raises(nfc.llcp.Error) as excinfo:
+                llc.sendmsg(ldl, [b'123'], nfc.llcp.MSG_DONTWAIT)
+            assert excinfo.value.errno == errno.EOPNOTSUPP
+
+        def test_sendmsg_with_connected_dlc_socket(self, llc, dlc):
+            pdu = nfc.llcp.pdu.ConnectionComplete(32, 17, miu=2, rw=2)
+            threading.Timer(0.01, llc.collect).start()
+            threading.Timer(0.02, llc.dispatch, (pdu,)).start()
+            llc.connect(dlc, 17)
+            llc.sendmsg(dlc, [b'12', b'3'], nfc.llcp.MSG_DONTWAIT)
+            pdu = llc.collect()
+            assert isinstance(pdu, nfc.llcp.pdu.AggregatedFrame)
+            assert [(p.name, p.ns, p.data) for p in pdu] == \
+                [("I", 0, b'12'), ("I", 1, b'3')]
+
         def test_sendto_with_invalid_socket_type(self, llc):
             with pytest.raises(nfc.llcp.Error) as excinfo:
                 llc.sendto(object(), b'123', 16, nfc.llcp.MSG_DONTWAIT)
@@ -363,6 +382,21 @@ class TestLogicalLinkController:
             assert llc.recv(dlc) == b'123'
             assert llc.collect() == nfc.llcp.pdu.ReceiveReady(17, 32, 1)
 
+        def test_recv_into(self, llc, ldl, raw):
+            buffer = bytearray(4)
+            pdu = nfc.llcp.pdu.UnnumberedInformation(32, 17, b'123')
+            threading.Timer(0.01, llc.dispatch, (pdu,)).start()
+            llc.bind(ldl, 32)
+            assert llc.recv_into(ldl, buffer, 0) == 3
+            assert buffer == b'123\x00'
+            llc.bind(raw, 33)
+            with pytest.raises(nfc.llcp.Error) as excinfo:
+                llc.recv_into(raw, buffer, 0)
+            assert excinfo.value.errno == errno.EOPNOTSUPP
+            with pytest.raises(nfc.llcp.Error) as excinfo:
+                llc.recv_into(object(), buffer, 0)
+            assert excinfo.value.errno == errno.ENOTSOCK
+
         def test_recvfrom_with_invalid_socket_type(self, llc):
             with pytest.raises(nfc.llcp.Error) as excinfo:
                 llc.recvfrom(object())
@@ -458,6 +492,29 @@ class TestLogicalLinkController:
             assert llc.collect() == \
                 nfc.llcp.pdu.UnnumberedInformation(16, 32, 120 * b'6')
 
+        @pytest.mark.parametrize("weight, order", [
+            (1, [32, 33, 32, 32]),
+            (2, [32, 32, 33, 32]),
+        ])
+        def test_collect_with_send_weight(self, llc, weight, order):
+            bulk = llc.socket(nfc.llcp.LOGICAL_DATA_LINK)
+            chat = llc.socket(nfc.llcp.LOGICAL_DATA_LINK)
+            llc.bind(bulk, 32)
+            llc.bind(chat, 33)
+            llc.setsockopt(bulk, nfc.llcp.SO_SNDWGT, weight)
+            for i in range(3):
+                llc.sendto(bulk, 248 * b'1', 16, nfc.llcp.MSG_DONTWAIT)
+            llc.sendto(chat, 240 * b'2', 16, nfc.llcp.MSG_DONTWAIT)
+            assert [llc.collect().ssap for _ in order] == order
+            assert llc.collect() is None
+            stats = llc.scheduler.stats
+            assert stats[32].sent_count == 3
+            assert stats[32].sent_octets == 3 * 248
+            assert stats[33].sent_count == 1
+            assert stats[33].sent_octets == 240
+            assert 0 <= stats[33].mean_delay <= stats[33].max_delay
+            assert str(stats[33]).startswith("sent 1 PDU 240 byte")
+
         def test_collect_voluntary_ack_before_aggregation(self, llc):
             dlc = [None, None, None]
             for i in range(len(dlc)):
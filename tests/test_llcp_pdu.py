@@ -394,6 +394,44 @@ class TestAggregatedFrame:
         with pytest.raises(nfc.llcp.pdu.EncodeError):
             self.pdu_class(*args).encode()
 
+    @pytest.mark.parametrize("size", [None, 0, 6, 10, 2048])
+    def test_append_and_encode(self, size):
+        agf = self.pdu_class(0, 0, size=size)
+        assert len(agf) == 2
+        assert agf.encode() == HEX("0080")
+        agf.append(nfc.llcp.pdu.Symmetry())
+        assert len(agf) == 6
+        assert agf.encode() == HEX("008000020000")
+        agf.append(nfc.llcp.pdu.UnnumberedInformation(1, 1, HEX("0102")))
+        assert len(agf) == 12
+        assert agf.encode() == HEX("008000020000000404C10102")
+        assert agf == nfc.llcp.pdu.decode(agf.encode())
+
+    def test_buffer_not_used_for_single_pdu(self):
+        class Symmetry(nfc.llcp.pdu.Symmetry):
+            encode_count = 0
+
+            def encode(self):
+                self.encode_count += 1
+                return super(Symmetry, self).encode()
+
+        pdu = Symmetry()
+        agf = self.pdu_class(0, 0, [pdu], size=2048)
+        assert len(agf) == 6
+        assert pdu.encode_count == 0
+        agf.append(pdu)
+        assert len(agf) == 10
+        assert pdu.encode_count == 2
+        assert agf.encode() == HEX("00800002000000020000")
+        assert pdu.encode_count == 2
+
+    def test_encode_with_buffer_checks_header(self):
+        agf = self.pdu_class(0, 1, [nfc.llcp.pdu.Symmetry()], size=6)
+        with pytest.raises(nfc.llcp.pdu.EncodeError):
+            agf.encode()
+        agf.ssap = 0
+        assert agf.encode() == HEX("008000020000")
+
 
 # ----------------------------------------------------------------------------
 # UI PDU
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division
 
+import time
 import pytest
 import nfc.llcp.sec
 
@@ -229,3 +230,78 @@ def test_bi_cs1_set_invalid_tag_size(remote_ecpk, remote_nonce):
         assert cs._ccm_t == 4
         cs._ccm_t = 5
         cs.encrypt(b'A', b'P')
+
+
+# =============================================================================
+# Key Pool
+# =============================================================================
+@pytest.fixture
+def key_pool(mocker):
+    keys = iter(range(1000))
+    mocker.patch('nfc.llcp.sec.generate_key', side_effect=lambda: next(keys))
+    key_pool = nfc.llcp.sec.KeyPool(size=3, refill=1)
+    yield key_pool
+    key_pool.stop()
+
+
+def wait_for_keys(key_pool, count):
+    for _ in range(500):
+        if len(key_pool) == count:
+            return
+        time.sleep(0.002)
+    assert len(key_pool) == count
+
+
+def test_key_pool_get_from_empty_pool(key_pool):
+    assert key_pool.get() is None
+
+
+def test_key_pool_fill_and_refill(key_pool):
+    key_pool.start()
+    wait_for_keys(key_pool, 3)
+    assert key_pool.get() == 0
+    time.sleep(0.02)
+    assert len(key_pool) == 2
+    assert key_pool.get() == 1
+    wait_for_keys(key_pool, 3)
+    assert [key_pool.get() for _ in range(3)] == [2, 3, 4]
+
+
+def test_key_pool_resize_and_stop(key_pool):
+    key_pool.start()
+    wait_for_keys(key_pool, 3)
+    key_pool.size, key_pool.refill = 5, 4
+    key_pool.start()
+    wait_for_keys(key_pool, 5)
+    key_pool.stop()
+    assert len(key_pool) == 0
+    assert key_pool.get() is None
+
+
+@pytest.mark.parametrize("failure", [
+    {'return_value': None}, {'side_effect': AssertionError},
+])
+def test_key_pool_restarts_after_failure(mocker, failure):
+    mocker.patch('nfc.llcp.sec.generate_key', **failure)
+    key_pool = nfc.llcp.sec.KeyPool(size=1, refill=0)
+    key_pool.start()
+    for _ in range(500):
+        if key_pool._thread is None:
+            break
+        time.sleep(0.002)
+    assert key_pool._thread is None
+    nfc.llcp.sec.generate_key.side_effect = None
+    nfc.llcp.sec.generate_key.return_value = 1
+    key_pool.start()
+    wait_for_keys(key_pool, 1)
+    assert key_pool.get() == 1
+    key_pool.stop()
+
+
+def test_key_pool_used_by_cipher_suite(mocker):
+    key = (mocker.sentinel.ec_key, 32 * b'x', 32 * b'y', 8 * b'n')
+    mocker.patch.object(nfc.llcp.sec.key_pool, 'get', return_value=key)
+    cipher = nfc.llcp.sec.cipher_suite("ECDH_anon_WITH_AEAD_AES_128_CCM_4")
+    assert cipher.public_key_x == 32 * b'x'
+    assert cipher.public_key_y == 32 * b'y'
+    assert cipher.random_nonce == 8 * b'n'
@@ -0,0 +1,150 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.llcp
+import nfc.llcp.tco
+import nfc.llcp.pdu
+
+import time
+import errno
+import threading
+import pytest
+from mock import MagicMock
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.llcp").setLevel(logging_level)
+
+
+def socket(tco):
+    llc = MagicMock()
+    llc.socket.return_value = tco
+    return nfc.llcp.Socket(llc, nfc.llcp.LOGICAL_DATA_LINK)
+
+
+@pytest.fixture()
+def ldl():
+    tco = nfc.llcp.tco.LogicalDataLink(128)
+    tco.bind(32)
+    return socket(tco)
+
+
+@pytest.fixture()
+def dlc():
+    tco = nfc.llcp.tco.DataLinkConnection(128, 1)
+    tco.bind(16)
+    pdu = nfc.llcp.pdu.ConnectionComplete(16, 17, 128, 1)
+    threading.Timer(0.01, tco.enqueue, (pdu,)).start()
+    tco.connect(17)
+    tco.dequeue(128, 0)
+    return socket(tco)
+
+
+@pytest.fixture()
+def selector():
+    selector = nfc.llcp.Selector()
+    yield selector
+    selector.close()
+
+
+def ui_pdu(data=b'123'):
+    return nfc.llcp.pdu.UnnumberedInformation(32, 17, data)
+
+
+def test_register_with_invalid_events(selector, ldl):
+    for events in ([], ["read"], ["acks"]):
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            selector.register(ldl, events)
+        assert excinfo.value.errno == errno.EINVAL
+    assert len(selector) == 0
+
+
+def test_register_and_unregister(selector, ldl):
+    selector.register(ldl, ["send", "recv"])
+    assert len(selector) == 1
+    assert ldl._tco.selectors == {selector}
+    assert selector.select(0) == [(ldl, ("send",))]
+    selector.unregister(ldl)
+    assert len(selector) == 0
+    assert ldl._tco.selectors == set()
+    with pytest.raises(KeyError):
+        selector.unregister(ldl)
+
+
+def test_select_timeout(selector, ldl):
+    selector.register(ldl, ["recv"])
+    assert selector.select(0) == []
+    started = time.time()
+    assert selector.select(0.05) == []
+    assert time.time() - started >= 0.05
+
+
+def test_select_wakes_on_recv(selector, ldl):
+    selector.register(ldl, ["recv"])
+    threading.Timer(0.01, ldl._tco.enqueue, (ui_pdu(),)).start()
+    assert selector.select(5.0) == [(ldl, ("recv",))]
+    assert ldl._tco.recvfrom() == (b'123', 17)
+    assert selector.select(0) == []
+
+
+def test_select_over_many_sockets(selector):
+    sockets = [socket(nfc.llcp.tco.LogicalDataLink(128)) for _ in range(20)]
+    for sock in sockets:
+        selector.register(sock, ["recv"])
+    threading.Timer(0.01, sockets[7]._tco.enqueue, (ui_pdu(),)).start()
+    threading.Timer(0.01, sockets[12]._tco.enqueue, (ui_pdu(),)).start()
+    ready = []
+    while len(ready) < 2:
+        for sock, events in selector.select(5.0):
+            sock._tco.recvfrom()
+            ready.append(sock)
+    assert sorted(ready) == sorted([sockets[7], sockets[12]])
+
+
+def test_select_wakes_on_send(selector, ldl):
+    ldl._tco.send(ui_pdu(), nfc.llcp.MSG_DONTWAIT)
+    selector.register(ldl, ["send"])
+    assert selector.select(0) == []
+    threading.Timer(0.01, ldl._tco.dequeue, (128, 0)).start()
+    assert selector.select(5.0) == [(ldl, ("send",))]
+
+
+def test_select_closed_socket(selector, ldl):
+    selector.register(ldl, ["recv"])
+    threading.Timer(0.01, ldl._tco.close).start()
+    assert selector.select(5.0) == [(ldl, ("recv",))]
+
+
+def test_select_interrupt(selector, ldl):
+    selector.register(ldl, ["recv"])
+    threading.Timer(0.01, selector.interrupt).start()
+    assert selector.select() == []
+
+
+def test_select_data_link_connection(selector, dlc):
+    selector.register(dlc, ["recv", "send", "acks"])
+    assert selector.select(0) == [(dlc, ("send",))]
+    dlc._tco.send(b'123', nfc.llcp.MSG_DONTWAIT)
+    assert selector.select(0) == []
+    dlc._tco.dequeue(128, 0)
+    rr_pdu = nfc.llcp.pdu.ReceiveReady(16, 17, nr=1)
+    threading.Timer(0.01, dlc._tco.enqueue, (rr_pdu,)).start()
+    assert selector.select(5.0) == [(dlc, ("send", "acks"))]
+    assert dlc._tco.poll("acks", 0) is True
+    selector.register(dlc, ["recv"])
+    i_pdu = nfc.llcp.pdu.Information(16, 17, 0, 1, b'456')
+    threading.Timer(0.01, dlc._tco.enqueue, (i_pdu,)).start()
+    assert selector.select(5.0) == [(dlc, ("recv",))]
+
+
+def test_select_listening_socket(selector):
+    tco = nfc.llcp.tco.DataLinkConnection(128, 1)
+    tco.bind(16)
+    tco.listen(1)
+    sock = socket(tco)
+    selector.register(sock, ["recv"])
+    assert selector.select(0) == []
+    connect_pdu = nfc.llcp.pdu.Connect(16, 32)
+    threading.Timer(0.01, tco.enqueue, (connect_pdu,)).start()
+    assert selector.select(5.0) == [(sock, ("recv",))]
@@ -108,12 +108,37 @@ def test_sendto(sock):
     sock.llc.sendto.assert_called_with(sock._tco, 'data', 'addr', 'flags')
 
 
+def test_sendall(sock):
+    sock.llc.sendmsg.return_value = 'result'
+    assert sock.sendall('data') == 'result'
+    sock.llc.sendmsg.assert_called_with(sock._tco, ['data'], 0)
+    assert sock.sendall('data', 'flags') == 'result'
+    sock.llc.sendmsg.assert_called_with(sock._tco, ['data'], 'flags')
+
+
+def test_sendmsg(sock):
+    sock.llc.sendmsg.return_value = 'result'
+    assert sock.sendmsg(['a', 'b']) == 'result'
+    sock.llc.sendmsg.assert_called_with(sock._tco, ['a', 'b'], 0)
+    assert sock.sendmsg(buffers=['a'], flags='flags') == 'result'
+    sock.llc.sendmsg.assert_called_with(sock._tco, ['a'], 'flags')
+
+
 def test_recv(sock):
     sock.llc.recv.return_value = 'data'
     assert sock.recv() == 'data'
     sock.llc.recv.assert_called_with(sock._tco)
 
 
+def test_recv_into(sock):
+    buffer = bytearray(8)
+    sock.llc.recv_into.return_value = 4
+    assert sock.recv_into(buffer) == 4
+    sock.llc.recv_into.assert_called_with(sock._tco, buffer, 0)
+    assert sock.recv_into(buffer, 2) == 4
+    sock.llc.recv_into.assert_called_with(sock._tco, buffer, 2)
+
+
 def test_recvfrom(sock):
     sock.llc.recvfrom.return_value = ('data', 'addr')
     assert sock.recvfrom() == ('data', 'addr')
@@ -17,6 +17,17 @@ def HEX(s):
     return bytearray.fromhex(s)
 
 
+@pytest.mark.parametrize("buffers, fragments", [
+    ([], []),
+    ([b''], []),
+    ([b'12345'], [b'12', b'34', b'5']),
+    ([b'1', b'2', b'3'], [b'12', b'3']),
+    ([b'123', bytearray(b'45'), memoryview(b'6')], [b'12', b'34', b'56']),
+])
+def test_fragments(buffers, fragments):
+    assert list(nfc.llcp.tco.fragments(buffers, 2)) == fragments
+
+
 # =============================================================================
 # Transmission Control Object
 # =============================================================================
@@ -55,6 +66,13 @@ class TestTransmissionControlObject:
         assert tco.getsockopt(nfc.llcp.SO_SNDBUF) == 1
         tco.setsockopt(nfc.llcp.SO_RCVBUF, 2)
         assert tco.getsockopt(nfc.llcp.SO_RCVBUF) == 2
+        assert tco.getsockopt(nfc.llcp.SO_SNDWGT) == 1
+        tco.setsockopt(nfc.llcp.SO_SNDWGT, 4)
+        assert tco.getsockopt(nfc.llcp.SO_SNDWGT) == 4
+        tco.setsockopt(nfc.llcp.SO_SNDWGT, 0)
+        assert tco.getsockopt(nfc.llcp.SO_SNDWGT) == 1
+        tco.setsockopt(nfc.llcp.SO_SNDWGT, 256)
+        assert tco.getsockopt(nfc.llcp.SO_SNDWGT) == 255
         assert tco.getsockopt(-1) is None
         with pytest.raises(ValueError) as excinfo:
             tco.setsockopt(-1, 0)
@@ -256,6 +274,10 @@ class TestLogicalDataLink:
         pdu = nfc.llcp.pdu.UnnumberedInformation(1, 1, HEX('1122'))
         assert tco.enqueue(pdu) is True
         assert tco.recvfrom() == (pdu.data, pdu.ssap)
+        buffer = bytearray(3)
+        assert tco.enqueue(pdu) is True
+        assert tco.recv_into(buffer, 0) == 2
+        assert buffer == HEX('112200')
         threading.Timer(0.01, tco.close).start()
         with pytest.raises(nfc.llcp.Error) as excinfo:
             tco.recvfrom()
@@ -450,6 +472,62 @@ class TestDataLinkConnection:
             tco.send(b'', nfc.llcp.MSG_DONTWAIT)
         assert excinfo.value.errno == errno.ENOTCONN
 
+    def test_sendmsg_with_flags_dont_wait(self, dlc):
+        dlc.send_win = 7
+        buffers = [b'1' * 100, bytearray(b'2' * 100), memoryview(b'3' * 60)]
+        assert dlc.sendmsg(buffers, nfc.llcp.MSG_DONTWAIT) is True
+        assert dlc.dequeue(128, 0) == nfc.llcp.pdu.Information(
+            17, 16, 0, 0, b'1' * 100 + b'2' * 28)
+        assert dlc.dequeue(128, 0) == nfc.llcp.pdu.Information(
+            17, 16, 1, 0, b'2' * 72 + b'3' * 56)
+        assert dlc.dequeue(128, 0) == nfc.llcp.pdu.Information(
+            17, 16, 2, 0, b'3' * 4)
+        assert dlc.dequeue(128, 0) is None
+
+    def test_sendmsg_with_error_would_block(self, dlc):
+        dlc.send_win = 2
+        assert dlc.sendmsg([b'1'], nfc.llcp.MSG_DONTWAIT) is True
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            dlc.sendmsg([b'.' * 100, b'.' * 29], nfc.llcp.MSG_DONTWAIT)
+        assert excinfo.value.errno == errno.EWOULDBLOCK
+        assert dlc.send_cnt == 1
+        assert dlc.dequeue(128, 0) == nfc.llcp.pdu.Information(
+            17, 16, 0, 0, b'1')
+        assert dlc.dequeue(128, 0) is None
+
+    def test_sendmsg_with_error_message_size(self, dlc):
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            dlc.sendmsg([b'.' * 129], nfc.llcp.MSG_DONTWAIT)
+        assert excinfo.value.errno == errno.EMSGSIZE
+        assert dlc.send_cnt == 0
+        assert dlc.dequeue(128, 0) is None
+
+    def test_sendmsg_with_wait_send_window(self, dlc):
+        pdu = nfc.llcp.pdu.ReceiveReady(dlc.addr, dlc.peer, nr=1)
+        threading.Timer(0.01, dlc.dequeue, (128, 0)).start()
+        threading.Timer(0.02, dlc.enqueue, (pdu,)).start()
+        threading.Timer(0.03, dlc.dequeue, (128, 0)).start()
+        assert dlc.sendmsg([b'.' * 200], 0) is True
+        assert dlc.send_cnt == 2
+
+    def test_sendmsg_with_busy_then_closed(self, dlc):
+        pdu = nfc.llcp.pdu.DisconnectedMode(dlc.addr, dlc.peer)
+        threading.Timer(0.01, dlc.dequeue, (128, 0)).start()
+        threading.Timer(0.02, dlc.close).start()
+        threading.Timer(0.03, dlc.enqueue, (pdu,)).start()
+        assert dlc.sendmsg([b'.' * 200], 0) is False
+
+    def test_sendmsg_while_state_close_wait(self, dlc):
+        dlc.enqueue(nfc.llcp.pdu.Disconnect(dlc.addr, dlc.peer))
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            dlc.sendmsg([b'123'], 0)
+        assert excinfo.value.errno == errno.EPIPE
+
+    def test_sendmsg_with_error_not_connected(self, tco):
+        with pytest.raises(nfc.llcp.Error) as excinfo:
+            tco.sendmsg([b''], nfc.llcp.MSG_DONTWAIT)
+        assert excinfo.value.errno == errno.ENOTCONN
+
     def test_recv_two_messages(self, dlc):
         dlc.enqueue(nfc.llcp.pdu.Information(dlc.addr, dlc.peer, 0, 0, b'123'))
         assert dlc.recv() == b'123'
@@ -460,6 +538,21 @@ class TestDataLinkConnection:
         assert dlc.dequeue(128, 0) == \
             nfc.llcp.pdu.ReceiveReady(dlc.peer, dlc.addr, nr=2)
 
+    def test_recv_into(self, dlc, caplog):
+        buffer = bytearray(6)
+        dlc.enqueue(nfc.llcp.pdu.Information(dlc.addr, dlc.peer, 0, 0, b'123'))
+        assert dlc.recv_into(memoryview(buffer)[1:], 0) == 3
+        assert buffer == b'\x00123\x00\x00'
+        assert dlc.dequeue(128, 0) == \
+            nfc.llcp.pdu.ReceiveReady(dlc.peer, dlc.addr, nr=1)
+        dlc.enqueue(nfc.llcp.pdu.Information(dlc.addr, dlc.peer, 1, 0, b'456'))
+        assert dlc.recv_into(buffer, 2) == 2
+        assert buffer == b'4523\x00\x00'
+        assert "discarded 1 of 3 received octets" in caplog.text
+        dlc.enqueue(nfc.llcp.pdu.Disconnect(dlc.addr, dlc.peer))
+        threading.Timer(0.01, dlc.dequeue, (128, 0)).start()
+        assert dlc.recv_into(buffer, 0) is None
+
     def test_recv_peer_disconnect(self, dlc):
         dlc.enqueue(nfc.llcp.pdu.Information(dlc.addr, dlc.peer, 0, 0, b'123'))
         assert dlc.recv() == b'123'
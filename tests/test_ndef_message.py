@@ -0,0 +1,60 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.ndef
+
+import pytest
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.ndef").setLevel(logging_level)
+
+
+def HEX(s):
+    return bytearray.fromhex(s)
+
+
+# A short record with id, a long record and an empty last record.
+MESSAGE = (HEX('99 01 03 01 54 41 616263') +
+           HEX('01 01 00000104 54') + bytearray(b"x" * 260) +
+           HEX('50 00 00'))
+
+
+class TestMessageFramer:
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 100, len(MESSAGE)])
+    def test_feed_fragments(self, size):
+        framer = nfc.ndef.MessageFramer()
+        data = bytearray()
+        for offset in range(0, len(MESSAGE), size):
+            assert not framer.complete
+            fragment = bytes(MESSAGE[offset:offset+size])
+            assert framer.feed(fragment) == len(fragment)
+            data += fragment
+        assert framer.complete
+        assert framer.records == 3
+        assert framer.offset == framer.length == len(MESSAGE)
+        assert str(nfc.ndef.Message(data)) == bytes(MESSAGE)
+
+    def test_feed_data_after_message(self):
+        framer = nfc.ndef.MessageFramer()
+        assert framer.feed(HEX('D1 01 00 54 0102')) == 4
+        assert framer.complete and framer.length == 4
+        assert framer.feed(HEX('0102')) == 0
+
+    def test_feed_memoryview(self):
+        framer = nfc.ndef.MessageFramer()
+        assert framer.feed(memoryview(MESSAGE)[0:20]) == 20
+        assert framer.length is None
+        assert framer.feed(memoryview(MESSAGE)[20:]) == len(MESSAGE) - 20
+        assert framer.complete
+
+    def test_feed_empty_data(self):
+        framer = nfc.ndef.MessageFramer()
+        assert framer.feed(b"") == 0
+        assert not framer.complete
+
+    def test_message_begin_not_set(self):
+        framer = nfc.ndef.MessageFramer()
+        with pytest.raises(nfc.ndef.FormatError):
+            framer.feed(HEX('51 01 00 54'))
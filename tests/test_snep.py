@@ -0,0 +1,303 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.snep
+import nfc.snep.client
+
+import io
+import pytest
+from mock import MagicMock
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.snep").setLevel(logging_level)
+
+
+def HEX(s):
+    return bytearray.fromhex(s)
+
+
+def fragments(data, size):
+    return [bytes(data[i:i+size]) for i in range(0, len(data), size)]
+
+
+def recv_into(recv):
+    # Socket.recv_into with the data returned by recv().
+    def recv_into(buffer, nbytes=0):
+        data = recv()
+        if data is not None:
+            buffer[0:len(data)] = data
+            return len(data)
+    return recv_into
+
+
+@pytest.fixture()
+def socket():
+    socket = MagicMock()
+    socket.poll.return_value = True
+    socket.recv_into.side_effect = recv_into(socket.recv)
+    return socket
+
+
+NDEF = HEX('D1 01 E4 54 02 656E') + bytearray(b"x" * 225)
+
+
+class TestClient:
+    def test_recv_response_in_one_fragment(self, socket):
+        socket.recv.return_value = bytes(HEX('1081 00000003 D00000'))
+        response = nfc.snep.client.recv_response(socket, 3, 1.0)
+        assert response == HEX('1081 00000003 D00000')
+        assert socket.send.call_count == 0
+
+    def test_recv_response_in_many_fragments(self, socket):
+        message = HEX('1081 000000E8') + NDEF
+        socket.recv.side_effect = fragments(message, 50)
+        response = nfc.snep.client.recv_response(socket, 1024, 1.0)
+        assert isinstance(response, bytearray)
+        assert response == message
+        socket.send.assert_called_once_with(HEX('100000000000'))
+        assert socket.recv_into.call_count == 4
+
+    def test_recv_response_connection_closed(self, socket):
+        message = HEX('1081 000000E8') + NDEF
+        socket.recv.side_effect = fragments(message, 50)[0:2] + [None]
+        assert nfc.snep.client.recv_response(socket, 1024, 1.0) is None
+
+    def test_recv_response_timeout(self, socket):
+        message = HEX('1081 000000E8') + NDEF
+        socket.recv.side_effect = fragments(message, 50)
+        socket.poll.side_effect = [True, True, False]
+        assert nfc.snep.client.recv_response(socket, 1024, 1.0) is None
+
+    def test_recv_response_exceeds_acceptable_length(self, socket):
+        socket.recv.return_value = bytes(HEX('1081 000000E8') + NDEF[0:50])
+        assert nfc.snep.client.recv_response(socket, 100, 1.0) is None
+
+
+class TestClientStream:
+    @pytest.fixture()
+    def client(self, socket):
+        client = nfc.snep.SnepClient(llc=MagicMock())
+        client.socket, client.send_miu = socket, 100
+        return client
+
+    @pytest.mark.parametrize("stream", [
+        io.BytesIO(bytes(NDEF)),
+        [bytes(NDEF[i:i+7]) for i in range(0, len(NDEF), 7)],
+    ])
+    def test_iter_fragments(self, stream):
+        fragments = list(nfc.snep.client.iter_fragments(
+            stream, 94, 100, len(NDEF)))
+        assert [len(fragment) for fragment in fragments] == [94, 100, 38]
+        assert b"".join(fragments) == NDEF
+
+    def test_put_stream_from_file(self, client, socket):
+        socket.recv.side_effect = [b"\x10\x80\0\0\0\0", b"\x10\x81\0\0\0\0"]
+        stream = io.BytesIO(b"xxxx" + bytes(NDEF))
+        stream.seek(4)
+        assert client.put_stream(stream) is True
+        sent = [args[0] for args, kwargs in socket.send.call_args_list]
+        assert [len(data) for data in sent] == [100, 100, 38]
+        assert b"".join(sent) == HEX('1002 000000E8') + NDEF
+
+    def test_put_stream_from_iterator(self, client, socket):
+        socket.recv.side_effect = [b"\x10\x80\0\0\0\0", b"\x10\xC1\0\0\0\0"]
+        chunks = iter([bytes(NDEF[0:200]), bytes(NDEF[200:])])
+        with pytest.raises(nfc.snep.SnepError):
+            client.put_stream(chunks, len(NDEF))
+        sent = [args[0] for args, kwargs in socket.send.call_args_list]
+        assert b"".join(sent) == HEX('1002 000000E8') + NDEF
+
+    @pytest.mark.parametrize("length, sent_lengths", [
+        (10, []), (94, []), (150, [100]), (194, [100]), (233, [100, 100]),
+    ])
+    def test_put_stream_length_mismatch(self, client, socket,
+                                        length, sent_lengths):
+        socket.recv.side_effect = [b"\x10\x80\0\0\0\0"]
+        with pytest.raises(ValueError):
+            client.put_stream(io.BytesIO(bytes(NDEF)), length)
+        sent = [args[0] for args, kwargs in socket.send.call_args_list]
+        assert [len(data) for data in sent] == sent_lengths
+        request = HEX('1002') + bytearray.fromhex('%08X' % length) + NDEF
+        assert b"".join(sent) == request[0:sum(sent_lengths)]
+        assert socket.close.call_count == 1
+        assert client.socket is None
+
+    def test_put_stream_not_continued(self, client, socket):
+        socket.recv.side_effect = [b"\x10\xFF\0\0\0\0"]
+        assert client.put_stream(io.BytesIO(bytes(NDEF))) is False
+        assert socket.send.call_count == 1
+
+    def test_get_stream(self, client, socket):
+        response = HEX('1081 000000E8') + NDEF
+        socket.recv.side_effect = fragments(response, 100)
+        stream = io.BytesIO()
+        assert client.get_stream(stream, acceptable_length=1000) == len(NDEF)
+        assert stream.getvalue() == NDEF
+        assert socket.send.call_args_list[0][0][0] == \
+            HEX('1001 00000007 000003E8 D00000')
+        assert socket.send.call_args_list[1][0][0] == HEX('100000000000')
+
+    def test_get_stream_errors(self, client, socket):
+        socket.recv.side_effect = [bytes(HEX('10C0 00000000'))]
+        with pytest.raises(nfc.snep.SnepError):
+            client.get_stream(io.BytesIO())
+        socket.recv.side_effect = [bytes(HEX('1081 000000E8'))]
+        assert client.get_stream(io.BytesIO(), acceptable_length=100) is None
+        socket.recv.side_effect = [bytes(HEX('1081 000000E8')), None]
+        assert client.get_stream(io.BytesIO()) is None
+
+
+class TestClientDispatch:
+    class Dispatcher(object):
+        # Completes each operation right away with the socket mock.
+        def complete(self, operation, *args):
+            future = nfc.llcp.dispatcher.Future()
+            future.set_result(operation(*args))
+            return future
+
+        def send(self, socket, data):
+            return self.complete(socket.send, data)
+
+        def recv(self, socket):
+            return self.complete(socket.recv)
+
+    @pytest.fixture()
+    def client(self, socket):
+        client = nfc.snep.SnepClient(llc=MagicMock())
+        client.socket, client.send_miu = socket, 100
+        return client
+
+    def test_dispatch_put(self, client, socket):
+        socket.recv.side_effect = [b"\x10\x80\0\0\0\0", b"\x10\x81\0\0\0\0"]
+        future = client.dispatch_put(self.Dispatcher(), bytes(NDEF))
+        assert future.result(0) is True
+        sent = [args[0] for args, kwargs in socket.send.call_args_list]
+        assert [len(data) for data in sent] == [100, 100, 38]
+        assert b"".join(sent) == HEX('1002 000000E8') + NDEF
+
+    def test_dispatch_put_errors(self, client, socket):
+        socket.recv.side_effect = [b"\x10\xC2\0\0\0\0"]
+        future = client.dispatch_put(self.Dispatcher(), b"\xD0\0\0")
+        with pytest.raises(nfc.snep.SnepError):
+            future.result(0)
+        socket.recv.side_effect = [b"\x10\xFF\0\0\0\0"]
+        future = client.dispatch_put(self.Dispatcher(), bytes(NDEF))
+        assert future.result(0) is False
+        socket.send.return_value = False
+        future = client.dispatch_put(self.Dispatcher(), b"\xD0\0\0")
+        assert future.result(0) is False
+
+    def test_dispatch_get(self, client, socket):
+        client.acceptable_length = 1000
+        response = HEX('1081 000000E8') + NDEF
+        socket.recv.side_effect = fragments(response, 100)
+        future = client.dispatch_get(self.Dispatcher())
+        assert future.result(0) == NDEF
+        assert socket.send.call_args_list[0][0][0] == \
+            HEX('1001 00000007 000003E8 D00000')
+        assert socket.send.call_args_list[1][0][0] == HEX('100000000000')
+
+    def test_dispatch_get_errors(self, client, socket):
+        socket.recv.side_effect = [bytes(HEX('10C0 00000000'))]
+        with pytest.raises(nfc.snep.SnepError):
+            client.dispatch_get(self.Dispatcher()).result(0)
+        socket.recv.side_effect = [bytes(HEX('1081 000000E8'))]
+        client.acceptable_length = 100
+        assert client.dispatch_get(self.Dispatcher()).result(0) is None
+        socket.recv.side_effect = [bytes(HEX('1081 000000E8')), None]
+        client.acceptable_length = 1000
+        assert client.dispatch_get(self.Dispatcher()).result(0) is None
+        socket.recv.side_effect = nfc.llcp.Error(32)
+        with pytest.raises(nfc.llcp.Error):
+            client.dispatch_get(self.Dispatcher()).result(0)
+
+
+class TestServer:
+    @pytest.fixture()
+    def server(self):
+        class Server(nfc.snep.SnepServer):
+            def get(self, acceptable_length, ndef_message):
+                self.request = ('get', acceptable_length, str(ndef_message))
+                return ndef_message
+
+            def put(self, ndef_message):
+                self.request = ('put', str(ndef_message))
+                return nfc.snep.Success
+
+        llc = MagicMock()
+        llc.socket.return_value = None
+        return Server(llc)
+
+    def test_put_in_many_fragments(self, server, socket):
+        request = HEX('1002 000000E8') + NDEF
+        socket.getsockopt.return_value = 128
+        socket.recv.side_effect = fragments(request, 100) + [None]
+        nfc.snep.SnepServer.serve(socket, server)
+        assert server.request == ('put', bytes(NDEF))
+        assert socket.send.call_args_list[0][0] == (b"\x10\x80\0\0\0\0",)
+        assert socket.send.call_args_list[1][0] == (b"\x10\x81\0\0\0\0",)
+        assert socket.close.call_count == 1
+
+    def test_get_in_one_fragment(self, server, socket):
+        request = HEX('1001 00000007 00000400 D00000')
+        socket.getsockopt.return_value = 128
+        socket.recv.side_effect = [bytes(request), None]
+        nfc.snep.SnepServer.serve(socket, server)
+        assert server.request == ('get', 1024, b"\xD0\0\0")
+        socket.send.assert_called_once_with(b"\x10\x81\0\0\0\x03\xD0\0\0")
+
+    def test_put_connection_closed(self, server, socket):
+        request = HEX('1002 000000E8') + NDEF
+        socket.getsockopt.return_value = 128
+        socket.recv.side_effect = fragments(request, 100)[0:2] + [None]
+        nfc.snep.SnepServer.serve(socket, server)
+        assert socket.close.call_count == 1
+
+    def test_put_incomplete_ndef_message(self, server, socket):
+        request = HEX('1002 000000E7') + NDEF[:-1]
+        socket.getsockopt.return_value = 128
+        socket.recv.side_effect = fragments(request, 100) + [None]
+        nfc.snep.SnepServer.serve(socket, server)
+        assert not hasattr(server, "request")
+        assert socket.send.call_args_list[1][0] == (b"\x10\xC2\0\0\0\0",)
+
+    def test_put_stream_reads_fragments_on_demand(self, server, socket):
+        def put_stream(stream, length):
+            self.chunks = [stream.read(50) for _ in range(2)]
+            return nfc.snep.Success
+
+        request = HEX('1002 000000E8') + NDEF
+        socket.getsockopt.return_value = 128
+        socket.recv.side_effect = fragments(request, 100) + [None]
+        server.put_stream = put_stream
+        nfc.snep.SnepServer.serve(socket, server)
+        assert self.chunks == [bytes(NDEF[0:50]), bytes(NDEF[50:94])]
+        assert socket.recv.call_count == 4
+        assert socket.send.call_args_list[1][0] == (b"\x10\x81\0\0\0\0",)
+
+    def test_request_stream(self):
+        socket = MagicMock()
+        socket.recv.side_effect = [b"defgh", b"ijkl", None]
+        stream = nfc.snep.server.RequestStream(socket, b"abc", 10)
+        assert stream.readable()
+        assert stream.read(2) == b"ab"
+        assert stream.read(5) == b"c"
+        assert stream.read() == b"defghij"
+        assert stream.read() == b""
+        stream = nfc.snep.server.RequestStream(socket, b"", 2)
+        with pytest.raises(nfc.llcp.Error):
+            stream.read()
+
+    def test_request_stream_skip(self):
+        socket = MagicMock()
+        socket.recv.side_effect = [b"defgh", b"ijkl", None]
+        stream = nfc.snep.server.RequestStream(socket, b"abc", 10)
+        assert stream.read(1) == b"a"
+        stream.skip()
+        assert socket.recv.call_count == 2
+        assert stream.read() == b""
+        stream = nfc.snep.server.RequestStream(socket, b"abc", 10)
+        with pytest.raises(nfc.llcp.Error):
+            stream.skip()
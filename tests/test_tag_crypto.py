@@ -0,0 +1,83 @@
+# -*- coding: latin-1 -*-
+from __future__ import absolute_import, division
+
+import nfc.tag.crypto
+import nfc.tag.tt3_sony
+
+import pytest
+from pytest_mock import mocker  # noqa: F401
+
+import logging
+logging.basicConfig(level=logging.WARN)
+logging_level = logging.getLogger().getEffectiveLevel()
+logging.getLogger("nfc.tag").setLevel(logging_level)
+
+
+def HEX(s):
+    return bytes(bytearray.fromhex(s))
+
+
+def backends():
+    yield nfc.tag.crypto.PyDesBackend()
+    if isinstance(nfc.tag.crypto.backend, nfc.tag.crypto.OpenSSLBackend):
+        yield nfc.tag.crypto.backend
+
+
+@pytest.fixture(params=list(backends()), ids=lambda backend: backend.name)
+def backend(request, mocker):  # noqa: F811
+    mocker.patch('nfc.tag.crypto.backend', request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("key, ciphertext", [
+    ("0123456789ABCDEF FEDCBA9876543210",
+     "08d7b4fb629d0885 6f674c3fdc2a7670 30e75c916b4102fc dcaf887a91ed5323"),
+    ("0123456789ABCDEF FEDCBA9876543210 0011223344556677",
+     "cbe6a76f9e351c6f 170958d0beaf42b3 610d7e1a6bc53798 4452cfdec45356ac"),
+])
+def test_triple_des_cbc(backend, key, ciphertext):
+    iv = HEX("0001020304050607")
+    plaintext = bytes(bytearray(range(32)))
+    assert nfc.tag.crypto.triple_des_cbc_encrypt(
+        HEX(key), iv, plaintext) == HEX(ciphertext)
+    assert nfc.tag.crypto.triple_des_cbc_decrypt(
+        HEX(key), iv, HEX(ciphertext)) == plaintext
+
+
+def test_triple_des_cbc_accepts_bytearray(backend):
+    key, iv = bytearray(16), bytearray(8)
+    ciphertext = nfc.tag.crypto.triple_des_cbc_encrypt(key, iv, bytearray(8))
+    assert isinstance(ciphertext, bytes) and len(ciphertext) == 8
+    assert nfc.tag.crypto.triple_des_cbc_decrypt(
+        key, iv, bytearray(ciphertext)) == bytes(bytearray(8))
+
+
+def test_triple_des_cbc_argument_errors(backend):
+    with pytest.raises(AssertionError):
+        nfc.tag.crypto.triple_des_cbc_encrypt(bytearray(8), bytearray(8), '')
+    with pytest.raises(AssertionError):
+        nfc.tag.crypto.triple_des_cbc_encrypt(bytearray(16), bytearray(8),
+                                              bytearray(7))
+
+
+def test_openssl_failure_falls_back_to_pydes(mocker):  # noqa: F811
+    failing = mocker.Mock(spec=nfc.tag.crypto.OpenSSLBackend)
+    failing.encrypt.side_effect = AssertionError("EVP_EncryptInit_ex")
+    mocker.patch('nfc.tag.crypto.backend', failing)
+    key, iv = HEX("0123456789ABCDEF FEDCBA9876543210"), HEX(8 * "00")
+    mac = nfc.tag.tt3_sony.FelicaLite.generate_mac(bytearray(16), key, iv)
+    assert isinstance(nfc.tag.crypto.backend, nfc.tag.crypto.PyDesBackend)
+    nfc.tag.crypto.backend = failing
+    failing.encrypt.side_effect = None
+    failing.encrypt.return_value = nfc.tag.crypto.PyDesBackend().encrypt(
+        key, iv, bytes(bytearray(16)))
+    assert nfc.tag.tt3_sony.FelicaLite.generate_mac(
+        bytearray(16), key, iv) == mac
+
+
+def test_select_backend_probes_openssl(mocker):  # noqa: F811
+    openssl = mocker.patch('nfc.tag.crypto.OpenSSLBackend')
+    openssl.return_value.encrypt.return_value = bytes(bytearray(16))
+    mocker.patch('nfc.llcp.sec.OpenSSL')
+    backend = nfc.tag.crypto._select_backend()
+    assert isinstance(backend, nfc.tag.crypto.PyDesBackend)
@@ -137,3 +137,44 @@ def test_activate(mocker, clf, target):  # noqa: F811
 def test_tag_emulate_unsupported(clf, brty):
     target = nfc.clf.LocalTarget(brty)
     assert nfc.tag.emulate(clf, target) is None
+
+
+class TestResponseTimeEstimator:
+    def test_defaults_before_min_samples(self):
+        estimator = nfc.tag.ResponseTimeEstimator(min_samples=4)
+        for _ in range(3):
+            estimator.update(0.002)
+        assert estimator.samples == 3
+        assert estimator.timeout(0.1) == 0.1
+        assert estimator.retries(2) == 2
+
+    def test_timeout_from_samples(self):
+        estimator = nfc.tag.ResponseTimeEstimator(min_samples=4)
+        for _ in range(4):
+            estimator.update(0.002)
+        deviation = 0.001 * 0.75 ** 3
+        assert estimator.timeout(0.1) == \
+            pytest.approx(1.5 * (0.002 + 4 * deviation))
+        assert estimator.retries(2) == 1
+        assert estimator.retries(0) == 0
+        for _ in range(40):
+            estimator.update(0.002)
+        assert estimator.samples == 32
+        assert estimator.timeout(0.1) == pytest.approx(1.5 * 0.002, 0.01)
+
+    def test_timeout_is_bounded(self):
+        estimator = nfc.tag.ResponseTimeEstimator(min_samples=1)
+        estimator.update(0.00001)
+        assert estimator.timeout(0.1) == 0.001
+        estimator.update(1.0)
+        assert estimator.timeout(0.1) == 0.1
+
+    def test_timeout_backoff_after_expired(self):
+        estimator = nfc.tag.ResponseTimeEstimator(min_samples=1)
+        estimator.update(0.00001)
+        estimator.expired()
+        assert estimator.timeout(0.1) == 0.002
+        estimator.expired()
+        assert estimator.timeout(0.1) == 0.004
+        estimator.update(0.00001)
+        assert estimator.timeout(0.1) == 0.001
@@ -35,6 +35,8 @@ def clf(mocker, target):
     mocker.patch.object(clf, 'exchange', autospec=True)
     mocker.patch.object(clf, 'sense', autospec=True)
     clf.sense.return_value = target
+    mocker.patch.object(clf, 'reactivate', autospec=True)
+    clf.reactivate.return_value = target
     return clf
 
 
@@ -111,12 +113,13 @@ class TestTagCommands:
         responses = [
             bytearray(range(1)),
         ]
-        tag.clf.sense.return_value = None
+        tag.clf.reactivate.return_value = None
         tag.clf.exchange.side_effect = responses
         with pytest.raises(nfc.tag.tt2.Type2TagCommandError) as excinfo:
             tag.read(0)
         assert excinfo.value.errno == nfc.tag.RECEIVE_ERROR
         assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+        assert tag.clf.sense.call_count == 0
 
     @pytest.mark.parametrize("page, data", [
         (0, '01020304'), (1, '05060708'), (255, '090a0b0c'), (256, '0d0e0f00'),
@@ -277,6 +280,29 @@ class TestTagCommands:
             tag.transceive(HEX('00'))
         assert excinfo.value.errno == nfc.tag.TIMEOUT_ERROR
 
+    def test_transceive_with_adaptive_timeouts(self, tag):
+        tag.clf.adaptive_timeouts = True
+        commands = 8 * [
+            (HEX('30 00'), 0.005),
+        ] + [
+            (HEX('30 00'), 0.001),
+            (HEX('30 00'), 0.001),
+            (HEX('30 00'), 0.002),
+        ]
+        responses = 9 * [
+            bytearray(range(16)),
+        ] + [
+            nfc.clf.TimeoutError,
+            nfc.clf.TimeoutError,
+        ]
+        tag.clf.exchange.side_effect = responses
+        for _ in range(9):
+            assert tag.read(0) == bytearray(range(16))
+        with pytest.raises(nfc.tag.tt2.Type2TagCommandError) as excinfo:
+            tag.read(0)
+        assert excinfo.value.errno == nfc.tag.TIMEOUT_ERROR
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
 
 ###############################################################################
 #
@@ -363,17 +389,27 @@ class TestTagProcedures:
         responses = [
             HEX("00000000 00000000 00000000 00000000"),
             HEX("00000000 00000000 00000000"),
-        ] + 3 * [
-            nfc.clf.TimeoutError,
         ] + 3 * [
             nfc.clf.TransmissionError,
+        ] + 3 * [
+            nfc.clf.TimeoutError,
         ]
         tag.clf.exchange.side_effect = responses
+        tag.clf.reactivate.return_value = None
         assert tag.is_present is True
         assert tag.is_present is False
         assert tag.is_present is False
         assert tag.is_present is False
         assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+        assert tag.clf.reactivate.call_count == 1
+
+    def test_is_present_after_reactivate(self, tag, target):
+        tag._current_sector = 1
+        tag.clf.exchange.side_effect = 3 * [nfc.clf.TimeoutError]
+        assert tag.is_present is True
+        tag.clf.reactivate.assert_called_once_with(target)
+        assert tag.clf.sense.call_count == 0
+        assert tag._current_sector == 0
 
     def test_format_default(self, tag):
         commands = [
@@ -846,3 +882,107 @@ class TestMemoryReader:
             tag_memory.synchronize()
         assert str(excinfo.value) == "unrecoverable timeout error"
         assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+
+###############################################################################
+#
+# TEST TYPE 2 TAG EMULATION
+#
+###############################################################################
+class TestTagEmulation:
+    @pytest.fixture()
+    def target(self):
+        target = nfc.clf.LocalTarget('106A')
+        target.sens_res = HEX("4400")
+        target.sel_res = HEX("00")
+        target.sdd_res = HEX("01020304050607")
+        target.tt2_cmd = HEX("3000")
+        return target
+
+    @pytest.fixture()
+    def emulation(self, clf, target):
+        tag = nfc.tag.emulate(clf, target)
+        assert isinstance(tag, nfc.tag.tt2.Type2TagEmulation)
+        tag.memory = HEX("01020388 04050607 00000000 E1100600") + \
+            HEX("0303D00000FE") + bytearray(42)
+        return tag
+
+    def test_init(self, emulation, clf, target):
+        assert emulation.target == target
+        assert emulation.cmd == HEX("3000")
+        assert emulation.clf == clf
+
+    def test_str(self, emulation):
+        assert str(emulation) == \
+            "Type2TagEmulation UID=01020304050607 PAGES=16"
+
+    def test_send_response(self, emulation):
+        emulation.clf.exchange.side_effect = [HEX('3004')]
+        assert emulation.send_response(HEX('0A'), 0.5) == HEX('3004')
+        assert emulation.clf.exchange.mock_calls == [mock.call(HEX('0A'), 0.5)]
+
+    @pytest.mark.parametrize("memory", [
+        bytearray(12), bytearray(17), bytearray(18), bytearray(19),
+    ])
+    def test_memory_size_error(self, emulation, memory):
+        with pytest.raises(ValueError):
+            emulation.memory = memory
+
+    def test_read(self, emulation):
+        assert emulation.process_command(HEX("3000")) == \
+            HEX("01020388 04050607 00000000 E1100600")
+        assert emulation.process_command(HEX("3004")) == \
+            HEX("0303D000 00FE0000 00000000 00000000")
+        assert emulation.process_command(HEX("300E")) == \
+            HEX("00000000 00000000 01020388 04050607")
+        assert emulation.process_command(HEX("3010")) == HEX("00")
+
+    def test_fast_read(self, emulation):
+        assert emulation.process_command(HEX("3A0405")) == \
+            HEX("0303D000 00FE0000")
+        assert emulation.process_command(HEX("3A000F")) == emulation.memory
+        assert emulation.process_command(HEX("3A0504")) == HEX("00")
+        assert emulation.process_command(HEX("3A0410")) == HEX("00")
+
+    def test_write(self, emulation):
+        assert emulation.process_command(HEX("A204 0303D100")) == HEX("0A")
+        assert emulation.memory[16:20] == HEX("0303D100")
+        assert emulation.process_command(HEX("3001")) == \
+            HEX("04050607 00000000 E1100600 0303D100")
+        assert emulation.process_command(HEX("3004")) == \
+            HEX("0303D100 00FE0000 00000000 00000000")
+        assert emulation.process_command(HEX("A20F 01020304")) == HEX("0A")
+        assert emulation.process_command(HEX("300E")) == \
+            HEX("00000000 01020304 01020388 04050607")
+
+    def test_write_read_only_pages(self, emulation):
+        assert emulation.process_command(HEX("A200 00000000")) == HEX("00")
+        assert emulation.process_command(HEX("A201 00000000")) == HEX("00")
+        assert emulation.process_command(HEX("A210 00000000")) == HEX("00")
+        assert emulation.memory[0:8] == HEX("01020388 04050607")
+
+    def test_write_lock_and_otp_bits(self, emulation):
+        assert emulation.process_command(HEX("A202 FFFF0010")) == HEX("0A")
+        assert emulation.memory[8:12] == HEX("00000010")
+        assert emulation.process_command(HEX("A202 00001000")) == HEX("0A")
+        assert emulation.memory[8:12] == HEX("00001010")
+        assert emulation.process_command(HEX("A203 0000000F")) == HEX("0A")
+        assert emulation.memory[12:16] == HEX("E110060F")
+        assert emulation.process_command(HEX("A204 00000000")) == HEX("00")
+        assert emulation.process_command(HEX("A205 00000000")) == HEX("0A")
+        assert emulation.process_command(HEX("A20C 00000000")) == HEX("00")
+
+    @pytest.mark.parametrize("cmd", [
+        HEX(""), HEX("50 00"), HEX("C2 FF"), HEX("30"), HEX("A2 04 00"),
+    ])
+    def test_no_response(self, emulation, cmd):
+        assert emulation.process_command(cmd) is None
+
+    def test_ndef_read_write(self, emulation, tag):
+        tag.clf.exchange.side_effect = \
+            lambda data, timeout: emulation.process_command(bytearray(data))
+        assert tag.ndef is not None
+        assert tag.ndef.octets == HEX("D00000")
+        assert tag.ndef.capacity == 46
+        tag.ndef.octets = HEX("D1010354 02656E")
+        assert emulation.memory[16:28] == HEX("0307D101 03540265 6EFE0000")
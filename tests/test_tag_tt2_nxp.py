@@ -37,6 +37,8 @@ def clf(mocker, target):
     mocker.patch.object(clf, 'exchange', autospec=True)
     mocker.patch.object(clf, 'sense', autospec=True)
     clf.sense.return_value = target
+    mocker.patch.object(clf, 'reactivate', autospec=True)
+    clf.reactivate.return_value = target
 
     return clf
 
@@ -5,6 +5,7 @@ import nfc
 import nfc.tag
 import nfc.tag.tt3
 
+import mmap
 import mock
 import pytest
 from pytest_mock import mocker  # noqa: F401
@@ -889,6 +890,102 @@ class TestTagEmulation:
         rsp = HEX(rsp_fmt.format(12))
         assert tag.process_command(cmd) == rsp
 
+    def test_add_memory_service(self, tag):
+        memory = bytearray(32)
+        service = tag.add_memory_service(0x0009, memory)
+        assert isinstance(service, nfc.tag.tt3.MemoryService)
+        assert service.memory is memory and service.writeable is True
+        assert tag.services[0x0009] is service
+        service = nfc.tag.tt3.MemoryService(memory, False)
+        assert tag.add_memory_service(0x000B, service) is service
+
+    def test_read_memory_service(self, tag):
+        memory = bytearray().join([BLOCK_DATA(i) for i in range(4)])
+        tag.add_memory_service(0x000B, memory, writeable=False)
+        cmd = HEX('18 06 02fe010203040506 010b00 05 8000 8001 8003 8002 8003')
+        rsp = HEX('5D 07 02fe010203040506 0000 05') + bytearray().join(
+            [BLOCK_DATA(i) for i in (0, 1, 3, 2, 3)])
+        assert tag.process_command(cmd) == rsp
+
+    def test_read_memory_and_callback_service(self, tag):
+        def read(block_number, rb, re):
+            assert rb is True and re is True
+            return BLOCK_DATA(0xFF)
+
+        tag.add_memory_service(0x0009, BLOCK_DATA(1) + BLOCK_DATA(2))
+        tag.add_service(0x000B, read, None)
+        cmd = HEX('16 06 02fe010203040506 02 0900 0b00 03 8000 8100 8001')
+        rsp = HEX('3D 07 02fe010203040506 0000 03') + BLOCK_DATA(1) + \
+            BLOCK_DATA(0xFF) + BLOCK_DATA(2)
+        assert tag.process_command(cmd) == rsp
+
+    def test_read_memory_service_non_existing_block(self, tag):
+        tag.add_memory_service(0x000B, bytearray(32))
+        cmd = HEX('14 06 02fe010203040506 010b00 03 8000 8001 8002')
+        rsp = HEX('0C 07 02fe010203040506 04A2')
+        assert tag.process_command(cmd) == rsp
+
+    def test_read_memory_service_from_mmap(self, tag):
+        memory = mmap.mmap(-1, 48)
+        memory[16:32] = 16 * b'\x01'
+        tag.add_memory_service(0x000B, memory)
+        cmd = HEX('12 06 02fe010203040506 010b00 02 8001 8002')
+        rsp = HEX('2D 07 02fe010203040506 0000 02') + BLOCK_DATA(1) + \
+            BLOCK_DATA(0)
+        assert tag.process_command(cmd) == rsp
+
+    def test_write_memory_service(self, tag):
+        memory = bytearray(64)
+        tag.add_memory_service(0x0009, memory)
+        cmd = HEX('44 08 02fe010203040506 010900 03 8001 8002 8000') + \
+            BLOCK_DATA(1) + BLOCK_DATA(2) + BLOCK_DATA(3)
+        rsp = HEX('0C 09 02fe010203040506 0000')
+        assert tag.process_command(cmd) == rsp
+        assert memory == BLOCK_DATA(3) + BLOCK_DATA(1) + BLOCK_DATA(2) + \
+            BLOCK_DATA(0)
+
+    def test_write_memory_service_to_mmap(self, tag):
+        memory = mmap.mmap(-1, 32)
+        tag.add_memory_service(0x0009, memory)
+        cmd = HEX('20 08 02fe010203040506 010900 01 8001') + BLOCK_DATA(5)
+        rsp = HEX('0C 09 02fe010203040506 0000')
+        assert tag.process_command(cmd) == rsp
+        assert memory[0:32] == 16 * b'\x00' + 16 * b'\x05'
+
+    def test_write_memory_service_non_existing_block(self, tag):
+        memory = bytearray(32)
+        tag.add_memory_service(0x0009, memory)
+        cmd = HEX('32 08 02fe010203040506 010900 02 8001 8002') + \
+            BLOCK_DATA(1) + BLOCK_DATA(2)
+        rsp = HEX('0C 09 02fe010203040506 02A2')
+        assert tag.process_command(cmd) == rsp
+        assert memory == BLOCK_DATA(0) + BLOCK_DATA(1)
+
+    def test_write_memory_service_read_only(self, tag):
+        memory = bytearray(32)
+        tag.add_memory_service(0x000B, memory, writeable=False)
+        cmd = HEX('20 08 02fe010203040506 010b00 01 8000') + BLOCK_DATA(1)
+        rsp = HEX('0C 09 02fe010203040506 01A2')
+        assert tag.process_command(cmd) == rsp
+        assert memory == bytearray(32)
+
+    def test_ndef_memory_service(self, tag):
+        attribute_data = HEX('1004010001000000000F010000000026')
+        memory = attribute_data + bytearray(16)
+        service = nfc.tag.tt3.NdefMemoryService(memory)
+        tag.add_memory_service(0x0009, service)
+        assert service.ndef == HEX('')
+        service.ndef = HEX('D00000')
+        assert memory[0:16] == HEX('1004010001000000000F010000030029')
+        assert memory[16:19] == HEX('D00000')
+        assert service.ndef == HEX('D00000')
+        service.ndef = HEX('D000')
+        assert memory[0:16] == HEX('1004010001000000000F010000020028')
+        assert service.ndef == HEX('D000')
+        with pytest.raises(ValueError) as excinfo:
+            service.ndef = bytearray(17)
+        assert str(excinfo.value) == "ndef data exceeds the ndef data area"
+
     def test_request_system_code(self, tag):
         rsp = tag.process_command(HEX('0A 0C 02FE010203040506'))
         assert rsp == HEX('0D 0D 02FE010203040506 01 12FC')
@@ -25,6 +25,10 @@ def HEX(s):
 def clf(mocker):
     clf = nfc.ContactlessFrontend()
     mocker.patch.object(clf, 'exchange', autospec=True)
+    mocker.patch('nfc.ContactlessFrontend.max_send_data_size',
+                 new_callable=mock.PropertyMock).return_value = 290
+    mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
+                 new_callable=mock.PropertyMock).return_value = 290
     mocker.patch('os.urandom', new=lambda x: bytes(bytearray(range(x))))
     return clf
 
@@ -48,15 +52,15 @@ felica_sample_1_responses = [
     HEX('0c 0b 0102030405060708 0a11'),
     HEX('0c 0b 0102030405060708 0b11'),
     HEX('0c 0b 0102030405060708 0812'),
-    HEX('1d 07 0102030405060708 00000100011001900700004225098e00000011'),
-    HEX('1d 07 0102030405060708 000001000061a80000c3500000c35000000000'),
-    HEX('0c 07 0102030405060708 01a8'),
+    HEX('0c 07 0102030405060708 04a8'),
+    HEX('2d 07 0102030405060708 000002 00011001900700004225098e00000011'
+        '                              000061a80000c3500000c35000000000'),
     HEX('0c 0b 0102030405060708 1013'),
     HEX('0c 0b 0102030405060708 1213'),
     HEX('0c 0b 0102030405060708 1713'),
     HEX('0c 0b 0102030405060708 0814'),
+    HEX('0c 07 0102030405060708 02a8'),
     HEX('1d 07 0102030405060708 0000019e0100004a0200000000000000000400'),
-    HEX('0c 07 0102030405060708 01a8'),
     HEX('0c 0b 0102030405060708 0a14'),
     HEX('0c 0b 0102030405060708 0815'),
     HEX('0c 0b 0102030405060708 0a15'),
@@ -65,13 +69,13 @@ felica_sample_1_responses = [
     HEX('0c 0b 0102030405060708 0c17'),
     HEX('0c 0b 0102030405060708 0f17'),
     HEX('0c 0b 0102030405060708 ffff'),
-    HEX('1d 07 0102030405060708 000001200000042e02ae410000024a0000019e'),
-    HEX('1d 07 0102030405060708 000001020000032e02ab84000003e8000003e8'),
-    HEX('1d 07 0102030405060708 000001200000020a98ac7d000001f400000000'),
-    HEX('1d 07 0102030405060708 00000104000001099a9dad000001f4000001f4'),
-    HEX('1d 07 0102030405060708 00000100060000000000000000000000000000'),
-    HEX('1d 07 0102030405060708 00000100050000000000000000000000000000'),
-    HEX('0c 07 0102030405060708 01a8'),
+    HEX('0c 07 0102030405060708 40a8'),
+    HEX('6d 07 0102030405060708 000006 200000042e02ae410000024a0000019e'
+        '                              020000032e02ab84000003e8000003e8'
+        '                              200000020a98ac7d000001f400000000'
+        '                              04000001099a9dad000001f4000001f4'
+        '                              00060000000000000000000000000000'
+        '                              00050000000000000000000000000000'),
 ]
 
 felica_sample_1_sys = 0x8092
@@ -448,6 +452,7 @@ Area 0000--FFFE
 
 
 felica_sample_3_responses = [
+    nfc.clf.TimeoutError, nfc.clf.TimeoutError, nfc.clf.TimeoutError,
     nfc.clf.TimeoutError, nfc.clf.TimeoutError, nfc.clf.TimeoutError,
     HEX("1d 07 0102030405060708 0000 01 100b0a009300000000000100000000b9"),
     HEX("1d 07 0102030405060708 0000 01 00000000000000000000000000000000"),
@@ -597,6 +602,135 @@ class TestFelicaStandard:
         assert tag.search_service_code(0x1000) is None
         tag.clf.exchange.assert_called_once_with(cmd, 0.154624)
 
+    def test_search_service_map(self, tag):
+        tag.clf.exchange.side_effect = [
+            HEX('0e 0b 0102030405060708 0000feff'),
+            HEX('0c 0b 0102030405060708 0810'),
+            HEX('0c 0b 0102030405060708 ffff'),
+        ]
+        assert tag.search_service_map() == [(0x0000, 0xFFFE), (0x1008,)]
+        assert tag.search_service_map() == [(0x0000, 0xFFFE), (0x1008,)]
+        assert tag.clf.exchange.mock_calls == [
+            mock.call(HEX('0c 0a 0102030405060708 0000'), 0.154624),
+            mock.call(HEX('0c 0a 0102030405060708 0100'), 0.154624),
+            mock.call(HEX('0c 0a 0102030405060708 0200'), 0.154624),
+        ]
+
+    def test_search_service_map_from_cache(self, tag, tmpdir,
+                                           mocker):  # noqa: F811
+        cache = nfc.tag.tt3_sony.ServiceMapCache(str(tmpdir))
+        FelicaStandard = nfc.tag.tt3_sony.FelicaStandard
+        mocker.patch.object(FelicaStandard, 'service_map_cache', cache)
+        tag.clf.exchange.side_effect = [
+            HEX('0e 0b 0102030405060708 0000feff'),
+            HEX('0c 0b 0102030405060708 0810'),
+            HEX('0c 0b 0102030405060708 ffff'),
+        ]
+        assert tag.search_service_map() == [(0x0000, 0xFFFE), (0x1008,)]
+        assert tmpdir.join("felica-0000-0000.json").check()
+        assert cache.load(tag.pmm, 0x0000) == [(0x0000, 0xFFFE), (0x1008,)]
+
+        tag = nfc.tag.activate(tag.clf, tag.target)
+        tag.clf.exchange.reset_mock()
+        tag.clf.exchange.side_effect = [
+            HEX('0f 03 0102030405060708 02 0100 1100'),
+            HEX('0c 0b 0102030405060708 ffff'),
+        ]
+        assert tag.search_service_map() == [(0x0000, 0xFFFE), (0x1008,)]
+        assert tag.clf.exchange.mock_calls == [
+            mock.call(HEX('0f 02 0102030405060708 02 0000 0810'),
+                      0.46387200000000006),
+            mock.call(HEX('0c 0a 0102030405060708 0200'), 0.154624),
+        ]
+
+    def test_search_service_map_with_outdated_cache(self, tag, tmpdir,
+                                                    mocker):  # noqa: F811
+        cache = nfc.tag.tt3_sony.ServiceMapCache(str(tmpdir))
+        cache.save(tag.pmm, 0x0000, [(0x0000, 0xFFFE), (0x1008,)])
+        FelicaStandard = nfc.tag.tt3_sony.FelicaStandard
+        mocker.patch.object(FelicaStandard, 'service_map_cache', cache)
+        tag.clf.exchange.side_effect = [
+            HEX('0f 03 0102030405060708 02 0100 ffff'),
+            HEX('0e 0b 0102030405060708 0000feff'),
+            HEX('0c 0b 0102030405060708 0910'),
+            HEX('0c 0b 0102030405060708 ffff'),
+        ]
+        assert tag.search_service_map() == [(0x0000, 0xFFFE), (0x1009,)]
+        assert cache.load(tag.pmm, 0x0000) == [(0x0000, 0xFFFE), (0x1009,)]
+        assert tag.clf.exchange.call_count == 4
+
+    def test_service_map_cache_without_entry(self, tmpdir):
+        cache = nfc.tag.tt3_sony.ServiceMapCache(str(tmpdir.join("new")))
+        assert cache.load(HEX('0120'), 0x0003) is None
+        cache.save(HEX('0120'), 0x0003, [])
+        assert cache.load(HEX('0120'), 0x0003) == []
+        tmpdir.join("new", "felica-0120-0003.json").write("[")
+        assert cache.load(HEX('0120'), 0x0003) is None
+
+    def test_batch_read_without_encryption(self, tag):
+        def timeout(blocks):
+            return 302.1E-6 * (8 * blocks + 8) * 64
+
+        def data(*blocks):
+            return HEX(''.join([16 * ('%02x' % x) for x in blocks]))
+
+        tag.clf.exchange.side_effect = [
+            HEX('8d 07 0102030405060708 000008') + data(*range(1, 9)),
+            HEX('4d 07 0102030405060708 000004') + data(9, 10, 11, 12),
+        ]
+        sc1 = nfc.tag.tt3.ServiceCode(68, 0x0B)
+        sc2 = nfc.tag.tt3.ServiceCode(92, 0x0F)
+        requests = [(sc1, range(2)), (sc2, range(10))]
+        assert tag.batch_read_without_encryption(requests) == [
+            data(1, 2), data(3, 4, 5, 6, 7, 8, 9, 10, 11, 12)]
+        assert tag.clf.exchange.mock_calls == [
+            mock.call(HEX('20 06 0102030405060708 02 0b11 0f17 08'
+                          '8000 8001 8100 8101 8102 8103 8104 8105'),
+                      timeout(8)),
+            mock.call(HEX('16 06 0102030405060708 01 0f17 04'
+                          '8006 8007 8008 8009'), timeout(4)),
+        ]
+
+    def test_batch_read_without_encryption_frame_size(self, tag,
+                                                      mocker):  # noqa: F811
+        mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
+                     new_callable=mock.PropertyMock).return_value = 61
+        tag.clf.exchange.side_effect = [
+            HEX('3d 07 0102030405060708 000003') + HEX(48 * '00'),
+            HEX('1d 07 0102030405060708 000001') + HEX(16 * '00'),
+        ]
+        sc = nfc.tag.tt3.ServiceCode(68, 0x0B)
+        assert tag.batch_read_without_encryption([(sc, range(4))]) == [
+            HEX(64 * '00')]
+        assert tag.clf.exchange.call_count == 2
+
+    def test_batch_read_without_encryption_error(self, tag):
+        tag.clf.exchange.side_effect = [
+            HEX('0c 07 0102030405060708 01a8'),
+        ]
+        sc = nfc.tag.tt3.ServiceCode(68, 0x0B)
+        with pytest.raises(nfc.tag.tt3.Type3TagCommandError) as excinfo:
+            tag.batch_read_without_encryption([(sc, range(2))])
+        assert excinfo.value.errno == 0x01A8
+
+    def test_dump_service_with_block_error_position(self, tag):
+        tag.clf.exchange.side_effect = [
+            HEX('0c 07 0102030405060708 08a8'),
+            HEX('3d 07 0102030405060708 000003') + HEX(48 * '00'),
+        ]
+        sc = nfc.tag.tt3.ServiceCode(68, 0x0B)
+        assert tag.dump_service(sc) == [
+            "0000: 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 |"
+            "................|",
+            "*     00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 |"
+            "................|",
+            "0002: 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 |"
+            "................|",
+        ]
+        assert tag.clf.exchange.call_count == 2
+        assert tag.clf.exchange.mock_calls[1][1][0] == HEX(
+            '14 06 0102030405060708 01 0b11 03 8000 8001 8002')
+
     def test_request_system_code(self, tag):
         cmd = HEX('0a 0c 0102030405060708')
         rsp = HEX('0f 0d 0102030405060708 02 0000 12fc')
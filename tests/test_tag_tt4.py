@@ -47,6 +47,8 @@ def test_init_T4A(mocker, rats_response, max_send, max_recv, result):
                  new_callable=mock.PropertyMock).return_value = max_send
     mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
                  new_callable=mock.PropertyMock).return_value = max_recv
+    mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                 new_callable=mock.PropertyMock).return_value = ['106A']
 
     target = nfc.clf.RemoteTarget("106A")
     target.sens_res = HEX("4403")
@@ -88,6 +90,8 @@ def test_init_T4B(mocker, sensb_res, max_send, max_recv, result):
                  new_callable=mock.PropertyMock).return_value = max_send
     mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
                  new_callable=mock.PropertyMock).return_value = max_recv
+    mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                 new_callable=mock.PropertyMock).return_value = ['106A']
 
     target = nfc.clf.RemoteTarget("106B")
     target.sensb_res = HEX(sensb_res)
@@ -100,6 +104,79 @@ def test_init_T4B(mocker, sensb_res, max_send, max_recv, result):
     assert str(tag) == result
 
 
+@pytest.mark.parametrize(  # noqa: F811
+    "rats_response, bitrates, pps_command, pps_response, brty", [
+    ('0670 77 01 0280', ['106A'], None, None, '106A'),
+    ('0670 00 01 0280', ['106A', '212A', '424A'], None, None, '106A'),
+    ('0670 77 01 0280', ['106A', '212A', '424A'], 'D0110A', 'D0', '424A'),
+    ('0670 13 01 0280', ['106A', '212A', '424A'], 'D01105', 'D0', '212A'),
+    ('0670 31 01 0280', ['106A', '212A', '424A'], 'D01105', 'D0', '212A'),
+    ('0670 77 01 0280', ['106A', '212A', '424A'], 'D0110A', 'D1', '106A'),
+    ('0670 77 01 0280', ['106A', '212A', '424A'], 'D0110A', None, '106A'),
+    ('0660 01 0280', ['106A', '212A', '424A'], None, None, '106A'),
+])
+def test_init_T4A_with_pps(mocker, rats_response, bitrates,
+                           pps_command, pps_response, brty):
+    clf = nfc.ContactlessFrontend()
+    mocker.patch.object(clf, 'exchange', autospec=True)
+    mocker.patch('nfc.ContactlessFrontend.max_send_data_size',
+                 new_callable=mock.PropertyMock).return_value = 256
+    mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
+                 new_callable=mock.PropertyMock).return_value = 256
+    mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                 new_callable=mock.PropertyMock).return_value = bitrates
+
+    target = nfc.clf.RemoteTarget("106A")
+    target.sens_res = HEX("4403")
+    target.sel_res = HEX("20")
+    target.sdd_res = HEX("04832F9A272D80")
+
+    commands = [HEX('E080')]
+    responses = [HEX(rats_response)]
+    if pps_command:
+        commands.append(HEX(pps_command))
+        responses.append(HEX(pps_response) if pps_response else
+                         nfc.clf.TimeoutError)
+    clf.exchange.side_effect = responses
+    tag = nfc.tag.activate(clf, target)
+    assert isinstance(tag, nfc.tag.tt4.Type4Tag)
+    assert clf.exchange.mock_calls == [
+        mock.call(_, timeout=0.03) for _ in commands]
+    assert target.brty == brty
+
+
+@pytest.mark.parametrize(  # noqa: F811
+    "sensb_res, bitrates, max_recv, attrib_cmd, brty", [
+    ('5030702A1C 00000011 77 81 85', ['106B'], 256,
+     '1D30702A1C00080100', '106B'),
+    ('5030702A1C 00000011 77 81 85', ['106B', '212B', '424B'], 256,
+     '1D30702A1C00A80100', '424B'),
+    ('5030702A1C 00000011 11 81 85', ['106B', '212B', '424B'], 128,
+     '1D30702A1C00570100', '212B'),
+    ('5030702A1C 00000011 00 81 85', ['106B', '212B', '424B'], 1024,
+     '1D30702A1C000A0100', '106B'),
+])
+def test_init_T4B_with_bitrate(mocker, sensb_res, bitrates, max_recv,
+                               attrib_cmd, brty):
+    clf = nfc.ContactlessFrontend()
+    mocker.patch.object(clf, 'exchange', autospec=True)
+    mocker.patch('nfc.ContactlessFrontend.max_send_data_size',
+                 new_callable=mock.PropertyMock).return_value = 256
+    mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
+                 new_callable=mock.PropertyMock).return_value = max_recv
+    mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                 new_callable=mock.PropertyMock).return_value = bitrates
+
+    target = nfc.clf.RemoteTarget("106B")
+    target.sensb_res = HEX(sensb_res)
+
+    clf.exchange.return_value = HEX('00')
+    tag = nfc.tag.activate(clf, target)
+    clf.exchange.assert_called_once_with(HEX(attrib_cmd), 0.03)
+    assert isinstance(tag, nfc.tag.tt4.Type4Tag)
+    assert target.brty == brty
+
+
 def test_init_wrong_technology():
     clf = nfc.ContactlessFrontend()
     target = nfc.clf.RemoteTarget('212F')
@@ -115,6 +192,8 @@ class TestType4Tag:
                      new_callable=mock.PropertyMock).return_value = 256
         mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
                      new_callable=mock.PropertyMock).return_value = 256
+        mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                     new_callable=mock.PropertyMock).return_value = ['106A']
         return clf
 
     @pytest.fixture()
@@ -152,11 +231,9 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20003b00340406e10408000000 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55036e666370792e6f7267 9000'),
+            HEX('02 000f 20003b00340406e10408000000 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55036e666370792e6f7267 9000'),
             HEX('03 000ed1010a55036e666370792e6f7267 9000'),
             HEX('02 00000000000000000000000000000000 9000'),
             HEX('03 6985')
@@ -171,11 +248,9 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20003b00340406e10408000000 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55036e666370792e6f7267 9000'),
+            HEX('02 000f 20003b00340406e10408000000 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55036e666370792e6f7267 9000'),
             HEX('03 000ed1010a55036e666370792e6f7267 9000'),
             HEX('02 00000000000000000000000000000000 9000'),
             HEX('03 9000')
@@ -190,11 +265,9 @@ class TestType4Tag:
         responses = [
             HEX('029000'),
             HEX('039000'),
-            HEX('02000f9000'),
-            HEX('0320003b00340406 e104 0040 80 00 9000'),
-            HEX('029000'),
-            HEX('03000e9000'),
-            HEX('02d1010a55036e666370792e6f72679000'),
+            HEX('02000f20003b00340406 e104 0040 80 00 9000'),
+            HEX('039000'),
+            HEX('02000ed1010a55036e666370792e6f72679000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.dump() == []
@@ -203,11 +276,9 @@ class TestType4Tag:
         commands = [
             (HEX('0200a4040007d2760000850101'), 0.08095339233038348),
             (HEX('0300a4000c02e103'), 0.08095339233038348),
-            (HEX('0200b0000002'), 0.08095339233038348),
-            (HEX('0300b000020d'), 0.08095339233038348),
-            (HEX('0200a4000c02e104'), 0.08095339233038348),
-            (HEX('0300b0000002'), 0.08095339233038348),
-            (HEX('0200b000020e'), 0.08095339233038348),
+            (HEX('0200b0000011'), 0.08095339233038348),
+            (HEX('0300a4000c02e104'), 0.08095339233038348),
+            (HEX('0200b000003b'), 0.08095339233038348),
             (HEX('0300d60000020000'), 0.08095339233038348),
             (HEX('0200d6000234a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9'
                  'a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9a9'),
@@ -217,11 +288,9 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 000e9000'),
-            HEX('02 d1010a55036e666370792e6f7267 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55036e666370792e6f7267 9000'),
             HEX('03 9000'),
             HEX('02 9000'),
             HEX('03 9000'),
@@ -234,20 +303,16 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02e104'), 0.08095339233038348),
-            (HEX('03 00b0000002'), 0.08095339233038348),
-            (HEX('02 00b000020e'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55036e666370792e6f7267 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55036e666370792e6f7267 9000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.format() is True
@@ -257,21 +322,17 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02e104'), 0.08095339233038348),
-            (HEX('03 00b0000002'), 0.08095339233038348),
-            (HEX('02 00b000020e'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
             (HEX('03 00d60000020000'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55036e666370792e6f7267 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55036e666370792e6f7267 9000'),
             HEX('03 ffff'),
         ]
         tag.clf.exchange.side_effect = responses
@@ -282,20 +343,16 @@ class TestType4Tag:
         commands = [
             (HEX('0200a4040007d2760000850101'), 0.08095339233038348),
             (HEX('0300a4000c02e103'), 0.08095339233038348),
-            (HEX('0200b0000002'), 0.08095339233038348),
-            (HEX('0300b000020d'), 0.08095339233038348),
-            (HEX('0200a4000c02e104'), 0.08095339233038348),
-            (HEX('0300b0000002'), 0.08095339233038348),
-            (HEX('0200b000020e'), 0.08095339233038348),
+            (HEX('0200b0000011'), 0.08095339233038348),
+            (HEX('0300a4000c02e104'), 0.08095339233038348),
+            (HEX('0200b000003b'), 0.08095339233038348),
         ]
         responses = [
             HEX('029000'),
             HEX('039000'),
-            HEX('02000f9000'),
-            HEX('0320003b00340406e104 0040 00 80 9000'),
-            HEX('029000'),
-            HEX('03000e9000'),
-            HEX('02d1010a55036e666370792e6f72679000'),
+            HEX('02000f20003b00340406e104 0040 00 80 9000'),
+            HEX('039000'),
+            HEX('02000ed1010a55036e666370792e6f72679000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.format(wipe=0xA9) is False
@@ -311,20 +368,16 @@ class TestType4Tag:
         commands = [
             (HEX('0200a4040007d2760000850101'), 0.08095339233038348),
             (HEX('0300a4000c02e103'), 0.08095339233038348),
-            (HEX('0200b0000002'), 0.08095339233038348),
-            (HEX('0300b000020d'), 0.08095339233038348),
-            (HEX('0200a4000c02e104'), 0.08095339233038348),
-            (HEX('0300b0000002'), 0.08095339233038348),
-            (HEX('0200b000020e'), 0.08095339233038348),
+            (HEX('0200b0000011'), 0.08095339233038348),
+            (HEX('0300a4000c02e104'), 0.08095339233038348),
+            (HEX('0200b000003b'), 0.08095339233038348),
         ]
         responses = [
             HEX('029000'),
             HEX('039000'),
-            HEX('02') + cc_file[:2] + HEX('9000'),
-            HEX('03') + cc_file[2:] + HEX('9000'),
-            HEX('029000'),
-            HEX('03000e9000'),
-            HEX('02d1010a55036e666370792e6f72679000'),
+            HEX('02') + cc_file + HEX('9000'),
+            HEX('039000'),
+            HEX('02000ed1010a55036e666370792e6f72679000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
@@ -337,8 +390,7 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 05 05 e104 0040 00 00 9000'),
+            HEX('02 000f 20 003b 0034 05 05 e104 0040 00 00 9000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.ndef is None
@@ -354,11 +406,9 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 %s 003b 0034 04 06 e104 0040 00 00 9000' % ver),
-            HEX('02 9000'),
-            HEX('03 000e9000'),
-            HEX('02 d1010a55 036e6663 70792e6f 7267 9000'),
+            HEX('02 000f %s 003b 0034 04 06 e104 0040 00 00 9000' % ver),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 7267 9000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert isinstance(tag.ndef, result)
@@ -367,8 +417,7 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000e 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 9000'),
+            HEX('02 000e 20 003b 0034 04 06 e104 0040 00 9000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.ndef is None
@@ -419,25 +468,155 @@ class TestType4Tag:
         assert tag.ndef is None
         assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
 
-    def test_read_ndef_data_failure_in_part(self, tag):
+    def test_discover_ndef_cc_read_in_two_steps(self, tag):
         commands = [
             (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
             (HEX('03 00b0000002'), 0.08095339233038348),
-            (HEX('02 00b000020e'), 0.08095339233038348),
-            (HEX('03 00b0000f01'), 0.08095339233038348),
+            (HEX('02 00b000020d'), 0.08095339233038348),
+            (HEX('03 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('02 00a4000c02e104'), 0.08095339233038348),
+            (HEX('03 00b000003b'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('02 6700'),
+            HEX('03 000f 9000'),
+            HEX('02 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 9000'),
+            HEX('03 000e d1010a55 036e6663 70792e6f 7267 9000'),
+        ]
+        tag.clf.exchange.side_effect = responses
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.ndef.octets == HEX('d1010a55036e666370792e6f7267')
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+    def test_read_ndef_data_with_max_le(self, tag):
+        commands = [
+            (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('03 00a4000c02e103'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b0000080'), 0.08095339233038348),
+            (HEX('03 00b0008080'), 0.08095339233038348),
+            (HEX('02 00b0010002'), 0.08095339233038348),
+        ]
+        responses = [
             HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55 036e6663 70792e6f 72 9000'),
+            HEX('03 9000'),
+            HEX('02 000f 20 0080 0034 04 06 e104 0400 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 0100') + 126 * HEX('aa') + HEX('9000'),
+            HEX('03') + 128 * HEX('aa') + HEX('9000'),
+            HEX('02') + 2 * HEX('aa') + HEX('9000'),
+        ]
+        tag.clf.exchange.side_effect = responses
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.ndef.octets == 256 * HEX('aa')
+        assert tag.ndef.read_apdu_count == 3
+        assert tag.apdu_count == 7
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+    def test_read_ndef_data_with_extended_le(self, tag):
+        commands = [
+            (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('03 00a4000c02e103'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c000002e104'), 0.08095339233038348),
+            (HEX('02 00b00000000102'), 0.08095339233038348),
+        ]
+        responses = [
+            HEX('02 9000'),
+            HEX('03 9000'),
+            HEX('02 000f 30 ffff 0034 04 06 e104 0400 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 0100') + 256 * HEX('aa') + HEX('9000'),
+        ]
+        tag.clf.exchange.side_effect = responses
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.ndef.octets == 256 * HEX('aa')
+        assert tag.ndef.read_apdu_count == 1
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+    def test_read_ndef_data_with_extended_le_reads_only_nlen(self, tag):
+        commands = [
+            (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('03 00a4000c02e103'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c000002e104'), 0.08095339233038348),
+            (HEX('02 00b00000000102'), 0.08095339233038348),
+            (HEX('03 00b00102000258'), 0.08095339233038348),
+        ]
+        responses = [
+            HEX('02 9000'),
+            HEX('03 9000'),
+            HEX('02 000f 30 ffff 0034 04 06 e104 8000 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 0358') + 256 * HEX('aa') + HEX('9000'),
+            HEX('03') + 600 * HEX('aa') + HEX('9000'),
+        ]
+        tag.clf.exchange.side_effect = responses
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.ndef.octets == 856 * HEX('aa')
+        assert tag.ndef.read_apdu_count == 2
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+    def test_read_ndef_data_with_selection_cache(self, tag):
+        commands = [
+            (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('03 00a4040007d2760000850100'), 0.08095339233038348),
+            (HEX('02 00a4000002e103'), 0.08095339233038348),
+            (HEX('03 00b0000011'), 0.08095339233038348),
+            (HEX('02 00a4000002e104'), 0.08095339233038348),
+            (HEX('03 00b000003b'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
+            (HEX('03 00b000003b'), 0.08095339233038348),
+            (HEX('02 00a4040007d2760000850100'), 0.08095339233038348),
+            (HEX('03 00a4000002e103'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000002e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
+        ]
+        responses = [
+            HEX('02 6a82'),
+            HEX('03 9000'),
+            HEX('02 9000'),
+            HEX('03 000f 10 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('02 9000'),
+            HEX('03 000e d1010a55 036e6663 70792e6f 7267 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 7267 9000'),
+            HEX('03 6f00'),
+            HEX('02 9000'),
+            HEX('03 9000'),
+            HEX('02 000f 10 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 7267 9000'),
+        ]
+        tag.clf.exchange.side_effect = responses
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.ndef.has_changed is False
+        assert tag.ndef.has_changed is True
+        assert isinstance(tag.ndef, nfc.tag.tt4.Type4Tag.NDEF)
+        assert tag.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+    def test_read_ndef_data_failure_in_part(self, tag):
+        commands = [
+            (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
+            (HEX('03 00a4000c02e103'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
+            (HEX('03 00b0000f01'), 0.08095339233038348),
+        ]
+        responses = [
+            HEX('02 9000'),
+            HEX('03 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 72 9000'),
             HEX('02 9000'),
         ]
         tag.clf.exchange.side_effect = responses
@@ -448,18 +627,16 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02e104'), 0.08095339233038348),
-            (HEX('03 00b0000002'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 00 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 00 9000'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.ndef is None
@@ -469,16 +646,14 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02e104'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02e104'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 ffff'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 ffff'),
         ]
         tag.clf.exchange.side_effect = responses
         assert tag.ndef is None
@@ -488,21 +663,17 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007 d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02 e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02 e104'), 0.08095339233038348),
-            (HEX('03 00b0000002'), 0.08095339233038348),
-            (HEX('02 00b000020e'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02 e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
             (HEX('03 00d6000005 0003d50000'), 0.08095339233038348),
         ]
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55 036e6663 70792e6f 7267 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 7267 9000'),
             HEX('03 9000'),
         ]
         tag.clf.exchange.side_effect = responses
@@ -514,11 +685,9 @@ class TestType4Tag:
         commands = [
             (HEX('02 00a4040007 d2760000850101'), 0.08095339233038348),
             (HEX('03 00a4000c02 e103'), 0.08095339233038348),
-            (HEX('02 00b0000002'), 0.08095339233038348),
-            (HEX('03 00b000020d'), 0.08095339233038348),
-            (HEX('02 00a4000c02 e104'), 0.08095339233038348),
-            (HEX('03 00b0000002'), 0.08095339233038348),
-            (HEX('02 00b000020e'), 0.08095339233038348),
+            (HEX('02 00b0000011'), 0.08095339233038348),
+            (HEX('03 00a4000c02 e104'), 0.08095339233038348),
+            (HEX('02 00b000003b'), 0.08095339233038348),
             (HEX('03 00d6000034 0000d5003b30 30303030 30303030 30303030'
                  '30303030 30303030 30303030 30303030 30303030 30303030'
                  '30303030 30303030 3030'), 0.08095339233038348),
@@ -529,11 +698,9 @@ class TestType4Tag:
         responses = [
             HEX('02 9000'),
             HEX('03 9000'),
-            HEX('02 000f 9000'),
-            HEX('03 20 003b 0034 04 06 e104 0040 00 00 9000'),
-            HEX('02 9000'),
-            HEX('03 000e 9000'),
-            HEX('02 d1010a55 036e6663 70792e6f 7267 9000'),
+            HEX('02 000f 20 003b 0034 04 06 e104 0040 00 00 9000'),
+            HEX('03 9000'),
+            HEX('02 000e d1010a55 036e6663 70792e6f 7267 9000'),
             HEX('03 9000'),
             HEX('02 9000'),
             HEX('03 9000'),
@@ -618,6 +785,8 @@ class TestIsoDepInitiator:
                      new_callable=mock.PropertyMock).return_value = 256
         mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
                      new_callable=mock.PropertyMock).return_value = 256
+        mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                     new_callable=mock.PropertyMock).return_value = ['106A']
         return clf
 
     @pytest.fixture()
@@ -904,3 +1073,176 @@ class TestIsoDepInitiator:
             dep.exchange(HEX('0102'), 1.0)
         assert excinfo.value.errno == nfc.tag.PROTOCOL_ERROR
         assert dep.clf.exchange.mock_calls == [mock.call(*_) for _ in commands]
+
+
+###############################################################################
+#
+# TEST TYPE 4 TAG EMULATION
+#
+###############################################################################
+class TestTagEmulation:
+    @pytest.fixture()  # noqa: F811
+    def clf(self, mocker):
+        clf = nfc.ContactlessFrontend()
+        mocker.patch.object(clf, 'exchange', autospec=True)
+        mocker.patch('nfc.ContactlessFrontend.max_send_data_size',
+                     new_callable=mock.PropertyMock).return_value = 256
+        mocker.patch('nfc.ContactlessFrontend.max_recv_data_size',
+                     new_callable=mock.PropertyMock).return_value = 256
+        mocker.patch('nfc.ContactlessFrontend.supported_bitrates',
+                     new_callable=mock.PropertyMock).return_value = ['106A']
+        return clf
+
+    @pytest.fixture()
+    def target(self):
+        target = nfc.clf.LocalTarget('106A')
+        target.sens_res = HEX("4403")
+        target.sel_res = HEX("20")
+        target.sdd_res = HEX("08010203")
+        target.rats_cmd = HEX("E020")
+        target.rats_res = HEX("0575338102")
+        target.tt4_cmd = HEX("02 00A4040007D2760000850101 00")
+        return target
+
+    @pytest.fixture()
+    def emulation(self, clf, target):
+        tag = nfc.tag.emulate(clf, target)
+        assert isinstance(tag, nfc.tag.tt4.Type4TagEmulation)
+        tag.ndef_file = HEX("0003 D00000") + bytearray(59)
+        return tag
+
+    def select_ndef_file(self, emulation):
+        assert emulation.process_command(emulation.cmd) == HEX("02 9000")
+        assert emulation.process_command(HEX("03 00A4000C02E104")) \
+            == HEX("03 9000")
+
+    def test_init(self, emulation, clf, target):
+        assert emulation.target == target
+        assert emulation.cmd == HEX("02 00A4040007D2760000850101 00")
+        assert emulation.clf == clf
+        assert emulation.writeable is True
+
+    def test_str(self, emulation):
+        assert str(emulation) == "Type4TagEmulation UID=08010203 FILE=64"
+
+    def test_send_response(self, emulation):
+        emulation.clf.exchange.side_effect = [HEX('B2')]
+        assert emulation.send_response(HEX('02 9000'), 0.5) == HEX('B2')
+        assert emulation.clf.exchange.mock_calls == [
+            mock.call(HEX('02 9000'), 0.5)]
+
+    @pytest.mark.parametrize("ndef_file", [
+        bytearray(1), bytearray(0x8000),
+    ])
+    def test_ndef_file_size_error(self, emulation, ndef_file):
+        with pytest.raises(ValueError):
+            emulation.ndef_file = ndef_file
+
+    def test_read_capability_container(self, emulation):
+        assert emulation.process_command(emulation.cmd) == HEX("02 9000")
+        assert emulation.process_command(HEX("03 00A4000C02E103")) \
+            == HEX("03 9000")
+        assert emulation.process_command(HEX("02 00B000000F")) \
+            == HEX("02 000F2000FF00FF0406E104004000 00 9000")
+        emulation.writeable = False
+        assert emulation.process_command(HEX("03 00B000000F")) \
+            == HEX("03 000F2000FF00FF0406E104004000 FF 9000")
+        assert emulation.process_command(HEX("02 00D6000001FF")) \
+            == HEX("02 6982")
+
+    def test_read_ndef_file(self, emulation):
+        self.select_ndef_file(emulation)
+        assert emulation.process_command(HEX("02 00B0000005")) \
+            == HEX("02 0003D00000 9000")
+        assert emulation.process_command(HEX("03 00B0003E05")) \
+            == HEX("03 0000 9000")
+        assert emulation.process_command(HEX("02 00B0004100")) \
+            == HEX("02 6B00")
+
+    def test_update_ndef_file(self, emulation):
+        self.select_ndef_file(emulation)
+        assert emulation.process_command(HEX("02 00D6000002 0000")) \
+            == HEX("02 9000")
+        assert emulation.process_command(HEX("03 00D600020401020304")) \
+            == HEX("03 9000")
+        assert emulation.ndef_file[0:6] == HEX("000001020304")
+        assert emulation.process_command(HEX("02 00D6003F020102")) \
+            == HEX("02 6B00")
+        emulation.writeable = False
+        assert emulation.process_command(HEX("03 00D6000002 0003")) \
+            == HEX("03 6982")
+        assert emulation.ndef_file[0:2] == HEX("0000")
+
+    @pytest.mark.parametrize("cmd, rsp", [
+        ("02 00A4040007D2760000850100 00", "02 9000"),
+        ("02 00A4040007D2760000850102 00", "02 6A82"),
+        ("02 00A4010C02E104", "02 6A86"),
+        ("02 00B0000002", "02 6986"),
+        ("02 00D60000020000", "02 6986"),
+        ("02 80A4040007D2760000850101 00", "02 6E00"),
+        ("02 00CA000000", "02 6D00"),
+        ("02 00A404", "02 6700"),
+        ("0A01 00B0000002", "0A01 6986"),
+    ])
+    def test_apdu_errors(self, emulation, cmd, rsp):
+        assert emulation.process_command(HEX(cmd)) == HEX(rsp)
+
+    def test_select_file_without_application(self, emulation):
+        assert emulation.process_command(HEX("02 00A4000C02E103")) \
+            == HEX("02 6A82")
+
+    def test_command_chaining(self, emulation):
+        assert emulation.process_command(HEX("12 00A4040007")) == HEX("A2")
+        assert emulation.process_command(HEX("13 D2760000")) == HEX("A3")
+        assert emulation.process_command(HEX("02 850101 00")) \
+            == HEX("02 9000")
+
+    def test_response_chaining(self, emulation):
+        emulation.ndef_file = HEX("0003 D00000") + bytearray(251)
+        self.select_ndef_file(emulation)
+        rsp = emulation.process_command(HEX("02 00B0000000"))
+        assert rsp == HEX("12 0003D00000") + bytearray(23)
+        assert emulation.process_command(HEX("A2")) == rsp
+        assert emulation.process_command(HEX("B2")) == rsp
+        for i in range(1, 9):
+            rsp = emulation.process_command(HEX("A3" if i & 1 else "A2"))
+            assert rsp == HEX("13" if i & 1 else "12") + bytearray(28)
+        rsp = emulation.process_command(HEX("A3"))
+        assert rsp == HEX("03") + bytearray(4) + HEX("9000")
+        assert emulation.process_command(HEX("B2")) == HEX("A3")
+
+    def test_deselect(self, emulation):
+        assert emulation.process_command(HEX("12 00A4040007")) == HEX("A2")
+        assert emulation.process_command(HEX("C2")) == HEX("C2")
+        assert emulation.process_command(HEX("CA01")) == HEX("CA01")
+        assert emulation.process_command(HEX("03 00B0000002")) \
+            == HEX("03 6986")
+
+    def test_rats(self, emulation, target):
+        assert emulation.process_command(HEX("E080")) == target.rats_res
+        target.rats_res = None
+        assert emulation.process_command(HEX("E050")) == HEX("0578807002")
+        emulation.ndef_file = bytearray(64)
+        self.select_ndef_file(emulation)
+        rsp = emulation.process_command(HEX("02 00B0000000"))
+        assert rsp == HEX("12") + bytearray(60)
+
+    @pytest.mark.parametrize("cmd", ["", "F2 01", "E2"])
+    def test_no_response(self, emulation, cmd):
+        assert emulation.process_command(HEX(cmd)) is None
+
+    def test_ndef_read_write(self, emulation, clf):
+        target = nfc.clf.RemoteTarget("106A")
+        target.sens_res = HEX("4403")
+        target.sel_res = HEX("20")
+        target.sdd_res = HEX("08010203")
+        clf.exchange.side_effect = [HEX('0575338102')]
+        tag = nfc.tag.activate(clf, target)
+        assert isinstance(tag, nfc.tag.tt4.Type4Tag)
+        clf.exchange.side_effect = \
+            lambda data, timeout: emulation.process_command(bytearray(data))
+        assert tag.ndef is not None
+        assert tag.ndef.octets == HEX("D00000")
+        assert tag.ndef.capacity == 62
+        tag.ndef.octets = HEX("D1010354 02656E")
+        assert emulation.ndef_file[0:9] == HEX("0007D101035402656E")